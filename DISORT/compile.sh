@@ -2,19 +2,23 @@
 
 MODEL_CODE="disort_model"
 EXECUTABLE="ssa_ice"
+# Intermediate files of this target, to not overwrite the ones of other builds
+BUILD_DIR="build/${EXECUTABLE}"
 
 # Remove old binary
 if [[ -f "${EXECUTABLE}" ]]; then
   rm ${EXECUTABLE}
 fi
 
+mkdir -p ${BUILD_DIR}
+
 pushd disort-4.0.99
-cat DISOTESTAUX.f DISORT.f BDREF.f DISOBRDF.f ERRPACK.f LINPAK.f LAPACK.f RDI1MACH.f > ../${MODEL_CODE}.f
+cat DISOTESTAUX.f DISORT.f BDREF.f DISOBRDF.f ERRPACK.f LINPAK.f LAPACK.f RDI1MACH.f > ../${BUILD_DIR}/${MODEL_CODE}.f
 popd
 
 # compile flies
-gfortran -O3 -g -fcheck=all -fdump-core -fbounds-check -Wall \
-  getopt.F90  disort_variables.f90 ${EXECUTABLE}.f90 ${MODEL_CODE}.f \
+gfortran -O3 -g -fcheck=all -fdump-core -fbounds-check -Wall -J ${BUILD_DIR} \
+  getopt.F90  disort_variables.f90 ${EXECUTABLE}.f90 ${BUILD_DIR}/${MODEL_CODE}.f \
   -o ${EXECUTABLE}
 
 # Make executable
@@ -0,0 +1,22 @@
+#!/usr/bin/env bash
+
+MODEL_CODE="disort_model"
+LIBRARY="libssa_ice.so"
+# Intermediate files of this target, to not overwrite the ones of other builds
+BUILD_DIR="build/libssa_ice"
+
+# Remove old library
+if [[ -f "${LIBRARY}" ]]; then
+  rm ${LIBRARY}
+fi
+
+mkdir -p ${BUILD_DIR}
+
+pushd disort-4.0.99
+cat DISOTESTAUX.f DISORT.f BDREF.f DISOBRDF.f ERRPACK.f LINPAK.f LAPACK.f RDI1MACH.f > ../${BUILD_DIR}/${MODEL_CODE}.f
+popd
+
+# compile shared library
+gfortran -O3 -fPIC -shared -J ${BUILD_DIR} \
+  disort_variables.f90 ssa_ice_lib.f90 ${BUILD_DIR}/${MODEL_CODE}.f \
+  -o ${LIBRARY}
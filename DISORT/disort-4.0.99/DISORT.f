@@ -547,7 +547,9 @@ c       ** Ensure that SLFTST sets all print flags off
 
    20 CONTINUE
 
-      IF( .NOT.PASS1 .AND. LEN( HEADER ).NE.0 ) THEN
+c     ** HEADER has a fixed length, only a blank HEADER is the null
+c     ** string that removes the banner (see doc/DISORT.txt)
+      IF( .NOT.PASS1 .AND. LEN_TRIM( HEADER ).NE.0 ) THEN
          WRITE( *,'(//,1X,100(''*''),/,A,/,1X,100(''*''))' )
      &    ' DISORT: '//HEADER
       ENDIF
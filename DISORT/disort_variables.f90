@@ -52,6 +52,15 @@ module disort_variables
     ALBMED = 0.0; TRNMED = 0.0; 
   end subroutine allocate_disort_allocatable_arrays
 
+  ! Set all arrays to the same values as after allocation, to reuse
+  ! allocated arrays for multiple runs
+  subroutine reset_disort_allocatable_arrays()
+    DTAUC = 0.0; SSALB = 0.0; PMOM = 0.0; TEMPER = 0.0; UTAU = 0.0; UMU = 0.0; PHI = 0.0;
+    H_LYR = 0.0; RHOQ = 0.0; RHOU = 0.0; EMUST = 0.0; BEMST = 0.0; RHO_ACCURATE = 0.0;
+    RFLDIR = 0.0; RFLDN = 0.0; FLUP = 0.0; DFDT = 0.0; UAVG = 0.0; UU = 0.0;
+    ALBMED = 0.0; TRNMED = 0.0;
+  end subroutine reset_disort_allocatable_arrays
+
   subroutine deallocate_disort_allocatable_arrays()
     deallocate( DTAUC, SSALB, PMOM, TEMPER, UTAU, UMU, PHI, H_LYR )  
     deallocate( RHOQ, RHOU, EMUST, BEMST, RHO_ACCURATE )                
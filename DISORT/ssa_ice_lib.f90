@@ -0,0 +1,112 @@
+! Library version of the ssa_ice program to call the model from other
+! languages, i.e. Python with ctypes, without reading and writing text files.
+!
+! Arrays are passed in memory with the layout of the ssa_ice input and
+! output files: one row per band with one value per grain size.
+module ssa_ice_lib
+  use iso_c_binding
+  use disort_variables
+  implicit none
+
+  ! ANGLE conversion
+  REAL(kind=4),PARAMETER :: PI = 2.*ASIN(1.0)
+  REAL, PARAMETER :: Degree180 = 180.0
+
+contains
+
+  subroutine ssa_ice_albedo(BANDS, GRAINSIZE, ASYMF, SALB, ZENITH, QUIET, &
+                            ALBS) bind(C, name='ssa_ice_albedo')
+    INTEGER(c_int), VALUE, INTENT(IN) :: BANDS, GRAINSIZE, QUIET
+    REAL(c_float), VALUE, INTENT(IN)  :: ZENITH
+    REAL(c_float), INTENT(IN)         :: ASYMF(GRAINSIZE, BANDS)
+    REAL(c_float), INTENT(IN)         :: SALB(GRAINSIZE, BANDS)
+    REAL(c_float), INTENT(OUT)        :: ALBS(GRAINSIZE, BANDS)
+
+    ! Degrees to radians
+    REAL            :: D_to_R    = PI/Degree180
+    REAL            :: ANGLE
+    INTEGER         :: IU, I, J
+    CHARACTER       HEADER*127
+
+    ! DISORT prints a banner with the header for each call, a blank header
+    ! removes it. Errors and warnings are always printed.
+    IF (QUIET /= 0) THEN
+      HEADER = ''
+    ELSE
+      HEADER = 'ssa_ice'
+    END IF
+
+    ANGLE = COS(ZENITH * D_to_R)
+    ACCUR = 0.0
+
+    ! Array sizes are the same for all bands and grain sizes, which allows
+    ! to allocate the arrays once.
+    NSTR = 16
+    NLYR = 1
+    NMOM = NSTR
+    NTAU = NLYR + 1
+    NPHI = 1
+    NUMU = 2
+
+    call allocate_disort_allocatable_arrays( NLYR, NMOM, NSTR, NUMU, NPHI, NTAU )
+
+    DO I = 1, BANDS
+      DO J = 1, GRAINSIZE
+        USRTAU    = .FALSE.
+        USRANG    = .TRUE.
+        LAMBER    = .FALSE.
+        PLANK     = .FALSE.
+        DO_PSEUDO_SPHERE = .FALSE.
+        DELTAMPLUS = .FALSE.
+
+        NSTR = 16
+        NLYR = 1
+        NMOM = NSTR
+        NTAU = NLYR + 1
+        NPHI = 1
+
+        IBCND  = 1
+        ONLYFL = .FALSE.
+        NUMU_O = 1
+        NUMU   = 2*NUMU_O
+
+        call reset_disort_allocatable_arrays()
+
+        DTAUC( 1 ) = 1000.0
+        SSALB( 1 ) = SALB(J,I)
+        CALL  GETMOM( 3, ASYMF(J,I), NMOM, PMOM )
+        PRNT       = .FALSE.
+        ! Solar zenith angle
+        UMU( 1 )   =  ANGLE
+
+        DO IU = 1, NUMU_O
+          UMU( IU + NUMU_O ) = UMU( IU )
+        ENDDO
+
+        DO IU = 1, NUMU_O
+          UMU( IU ) = -UMU( 2*NUMU_O + 1 - IU )
+        ENDDO
+
+        ALBEDO = 0.0
+
+        CALL DISORT( NLYR, NMOM, NSTR, NUMU, NPHI, NTAU,           &
+                 USRANG, USRTAU, IBCND, ONLYFL, PRNT,          &
+                 PLANK, LAMBER, DELTAMPLUS, DO_PSEUDO_SPHERE,  &
+                 DTAUC, SSALB, PMOM, TEMPER, WVNMLO, WVNMHI,   &
+                 UTAU, UMU0, PHI0, UMU, PHI, FBEAM,            &
+                 FISOT, ALBEDO, BTEMP, TTEMP, TEMIS,           &
+                 EARTH_RADIUS, H_LYR,                          &
+                 RHOQ, RHOU, RHO_ACCURATE, BEMST, EMUST,       &
+                 ACCUR,  HEADER,                               &
+                 RFLDIR, RFLDN, FLUP, DFDT, UAVG, UU,          &
+                 ALBMED, TRNMED )
+
+        ALBS(J,I) = ALBMED(1)
+      ENDDO
+    ENDDO
+
+    call deallocate_disort_allocatable_arrays()
+
+  end subroutine ssa_ice_albedo
+
+end module ssa_ice_lib
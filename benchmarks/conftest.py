@@ -0,0 +1,90 @@
+import tracemalloc
+
+import pytest
+
+from spectro_dp.asd.spectrum_cache import SpectrumCache, \
+    shared_spectrum_cache
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+pytest.importorskip('pytest_benchmark')
+
+# Measurement files per site directory of the synthetic campaign
+SITE_FILES = 1000
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--campaign-size', type=int, default=1000,
+        help='Number of synthetic measurement files to benchmark with, '
+             'from 10 to 100000. (Default: 1000)'
+    )
+
+
+@pytest.fixture(scope='session')
+def campaign_size(request):
+    return request.config.getoption('--campaign-size')
+
+
+@pytest.fixture(scope='session')
+def campaign(tmp_path_factory):
+    return tmp_path_factory.mktemp('campaign')
+
+
+@pytest.fixture(scope='session')
+def campaign_files(campaign, campaign_size):
+    """
+    All measurement files of a synthetic campaign with the requested number
+    of files, split into sites of up to SITE_FILES files.
+    """
+    return SyntheticCampaign(seed=0).write_campaign(
+        campaign, campaign_size, sites=-(-campaign_size // SITE_FILES)
+    )
+
+
+@pytest.fixture(scope='session')
+def site(campaign, campaign_files):
+    return campaign.joinpath(f"{SyntheticCampaign.SITE_PREFIX}000")
+
+
+@pytest.fixture(scope='session')
+def site_files(site, campaign_files):
+    return [file for file in campaign_files if file.parent == site]
+
+
+@pytest.fixture(autouse=True)
+def spectrum_cache():
+    """
+    Process wide spectrum cache, disabled unless a benchmark sets a budget,
+    so repeated rounds read from disk.
+    """
+    cache = shared_spectrum_cache()
+    cache.clear()
+    cache.max_bytes = 0
+    yield cache
+    cache.clear()
+    cache.max_bytes = SpectrumCache.MAX_BYTES
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmark a function and record the throughput and the peak memory of
+    one additional call in the extra info of the benchmark report.
+    """
+    def run(function, items, *args, **kwargs):
+        result = benchmark(function, *args, **kwargs)
+
+        tracemalloc.start()
+        function(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        benchmark.extra_info['items'] = items
+        benchmark.extra_info['items_per_second'] = round(
+            items / benchmark.stats.stats.mean, 1
+        )
+        benchmark.extra_info['peak_memory_mb'] = round(peak / 2 ** 20, 2)
+
+        return result
+
+    return run
@@ -0,0 +1,95 @@
+import pytest
+
+from spectro_dp.asd import MeasurementComposite, MeasurementStack, profiler
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+SEQUENCE_FILES = 2 * SyntheticCampaign.SEQUENCE_COUNT
+
+
+def composites(site, site_files):
+    """
+    One albedo composite for each sequence of the site
+    """
+    count = len(site_files) // SEQUENCE_FILES
+    return [
+        MeasurementComposite(
+            site, SyntheticCampaign.FILE_PREFIX,
+            set_1_index=sequence * SEQUENCE_FILES,
+            set_2_index=sequence * SEQUENCE_FILES +
+            SyntheticCampaign.SEQUENCE_COUNT,
+        )
+        for sequence in range(count)
+    ]
+
+
+@pytest.fixture(scope='module')
+def calculated(site, site_files):
+    calculated = composites(site, site_files)
+    for composite in calculated:
+        composite.calculate()
+    return calculated
+
+
+def test_average_set(measure, site, site_files):
+    composite = composites(site, site_files)[0]
+
+    measure(
+        composite._average_set, SyntheticCampaign.SEQUENCE_COUNT,
+        0, SyntheticCampaign.SEQUENCE_COUNT
+    )
+
+
+def test_calculate(measure, site, site_files):
+    def calculate():
+        for composite in composites(site, site_files):
+            composite.calculate()
+
+    measure(calculate, len(site_files) // SEQUENCE_FILES)
+
+
+def test_calculate_profiled(measure, site, site_files):
+    # Compare with test_calculate for the cost of the enabled profiler
+    def calculate():
+        for composite in composites(site, site_files):
+            composite.calculate()
+
+    profiler.enable()
+    try:
+        measure(calculate, len(site_files) // SEQUENCE_FILES)
+    finally:
+        profiler.disable()
+
+
+def test_index_sweep(measure, site, site_files, spectrum_cache):
+    # Sensitivity sweep of the set_1 window over the first sequences, which
+    # reads each file from disk once with the spectrum cache
+    spectrum_cache.max_bytes = spectrum_cache.MAX_BYTES
+    sequences = min(len(site_files) // SEQUENCE_FILES, 10)
+
+    def sweep():
+        for set_1_index in range(sequences * SEQUENCE_FILES - SEQUENCE_FILES):
+            MeasurementComposite(
+                site, SyntheticCampaign.FILE_PREFIX,
+                set_1_index=set_1_index,
+                set_2_index=set_1_index + SyntheticCampaign.SEQUENCE_COUNT,
+            ).calculate()
+
+    measure(sweep, sequences * SEQUENCE_FILES - SEQUENCE_FILES)
+
+
+def test_detector_split(measure, site_files):
+    spectra = MeasurementStack(site_files).data
+
+    def adjust():
+        for spectrum in spectra.copy():
+            MeasurementComposite._adjust_detector_split(spectrum)
+
+    measure(adjust, len(spectra))
+
+
+def test_save(measure, calculated):
+    def save():
+        for composite in calculated:
+            composite.save('benchmark')
+
+    measure(save, len(calculated))
@@ -0,0 +1,42 @@
+from itertools import count
+
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementFile
+from spectro_dp.asd.cube_store import CubeStore
+
+ROWS = 256
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return np.random.default_rng(0).uniform(
+        0, 1, (ROWS, MeasurementFile.BAND_COUNT)
+    ).astype(MeasurementFile.DATA_TYPE)
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+def test_append(measure, rows, tmp_path, compression):
+    stores = count()
+
+    def append_rows():
+        store = CubeStore(
+            tmp_path.joinpath(f"store_{next(stores)}"),
+            compression=compression
+        )
+        for row in rows:
+            store.append(row)
+
+    measure(append_rows, ROWS)
+
+
+def test_append_many(measure, rows, tmp_path):
+    stores = count()
+
+    def append_rows():
+        CubeStore(tmp_path.joinpath(f"store_{next(stores)}")).append_many(
+            [dict(result=row) for row in rows]
+        )
+
+    measure(append_rows, ROWS)
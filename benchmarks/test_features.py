@@ -0,0 +1,19 @@
+import numpy as np
+
+from spectro_dp.asd import MeasurementFile
+from spectro_dp.asd.features import FeaturePipeline, default_features
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+SPECTRA = 10000
+
+
+def test_compute(measure):
+    spectra = np.random.default_rng(0).uniform(
+        0.5, 1, (SPECTRA, MeasurementFile.BAND_COUNT)
+    ).astype(MeasurementFile.DATA_TYPE)
+
+    pipeline = FeaturePipeline(
+        default_features(SyntheticCampaign.irradiance())
+    )
+
+    measure(pipeline.compute, SPECTRA, spectra)
@@ -0,0 +1,17 @@
+import numpy as np
+
+from spectro_dp.asd import MeasurementFile
+from spectro_dp.asd.grain_size import GrainSizeRetrieval
+
+GRAIN_SIZES = 148
+SPECTRA = 10000
+
+
+def test_retrieve(measure):
+    random = np.random.default_rng(0)
+    retrieval = GrainSizeRetrieval(
+        random.uniform(0.5, 1, (MeasurementFile.BAND_COUNT, GRAIN_SIZES))
+    )
+    spectra = random.uniform(0.5, 1, (SPECTRA, MeasurementFile.BAND_COUNT))
+
+    measure(retrieval.retrieve, SPECTRA, spectra, sub_grid=True)
@@ -0,0 +1,32 @@
+from spectro_dp.asd import MeasurementComposite, MeasurementIndex
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+
+def test_build_index(measure, site):
+    index = measure(MeasurementIndex, 1, site)
+    assert len(index) > 0
+
+
+def test_index_lookup(measure, site):
+    index = MeasurementIndex(site)
+    sequences = len(index) // (2 * SyntheticCampaign.SEQUENCE_COUNT)
+
+    def lookup():
+        for sequence in range(sequences):
+            index.files(
+                SyntheticCampaign.FILE_PREFIX,
+                sequence * 2 * SyntheticCampaign.SEQUENCE_COUNT,
+                SyntheticCampaign.SEQUENCE_COUNT,
+            )
+
+    measure(lookup, sequences)
+
+
+def test_file_glob(measure, site):
+    composite = MeasurementComposite(site, SyntheticCampaign.FILE_PREFIX)
+
+    def file_glob():
+        composite._indexes.clear()
+        return composite._file_glob(0, count=SyntheticCampaign.SEQUENCE_COUNT)
+
+    measure(file_glob, 1)
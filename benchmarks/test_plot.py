@@ -0,0 +1,42 @@
+import pytest
+
+from spectro_dp.asd import MeasurementComposite
+from spectro_dp.asd.renderer import Renderer, render_composites
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+# Number of plots per benchmark round
+PLOT_COUNT = 10
+
+
+@pytest.fixture(scope='module')
+def composite(site):
+    composite = MeasurementComposite(site, SyntheticCampaign.FILE_PREFIX)
+    composite.calculate()
+    return composite
+
+
+def test_render(measure, composite, tmp_path):
+    renderer = Renderer()
+
+    def render():
+        for index in range(PLOT_COUNT):
+            renderer.render(composite, tmp_path.joinpath(f"{index}.png"))
+
+    measure(render, PLOT_COUNT)
+
+
+def test_render_new_figure(measure, composite, tmp_path):
+    def render():
+        for index in range(PLOT_COUNT):
+            Renderer().render(composite, tmp_path.joinpath(f"{index}.png"))
+
+    measure(render, PLOT_COUNT)
+
+
+def test_render_composites(measure, composite, tmp_path):
+    jobs = [
+        (composite, tmp_path.joinpath(f"{index}.png"), {})
+        for index in range(PLOT_COUNT)
+    ]
+
+    measure(render_composites, PLOT_COUNT, jobs, workers=2)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from spectro_dp.asd.measurement_stack import MeasurementStack
+from spectro_dp.asd.quality_screen import QualityScreen
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+SPECTRA = 10000
+
+
+def test_screen(measure):
+    spectra = np.repeat(
+        SyntheticCampaign(seed=0).spectrum()[None], SPECTRA, axis=0
+    )
+    groups = np.arange(SPECTRA) // QualityScreen.SET_COUNT
+
+    measure(QualityScreen().screen, SPECTRA, spectra, groups)
+
+
+def test_screen_stack(measure, campaign_files):
+    data = MeasurementStack(campaign_files).data
+
+    measure(QualityScreen().screen, len(campaign_files), data)
+
+
+def test_screen_files(measure, campaign_files):
+    measure(QualityScreen().screen_files, len(campaign_files), campaign_files)
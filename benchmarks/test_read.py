@@ -0,0 +1,57 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from spectro_dp.asd import MeasurementFile, MeasurementHeader
+from spectro_dp.asd.measurement_stack import MeasurementStack
+
+
+@pytest.fixture(scope='module', params=['zip', 'gztar'])
+def archive_files(request, campaign, campaign_files, tmp_path_factory):
+    """
+    All files of the campaign, read from a zip or compressed tar archive
+    """
+    archive = shutil.make_archive(
+        tmp_path_factory.mktemp('archive').joinpath('campaign'),
+        request.param, campaign
+    )
+    return [
+        Path(archive, file.relative_to(campaign)) for file in campaign_files
+    ]
+
+
+def read_files(files, mmap=False):
+    for file in files:
+        MeasurementFile(file, mmap=mmap).data
+
+
+def test_read_files(measure, campaign_files):
+    measure(read_files, len(campaign_files), campaign_files)
+
+
+def test_read_files_mmap(measure, campaign_files):
+    measure(read_files, len(campaign_files), campaign_files, mmap=True)
+
+
+def test_read_stack(measure, campaign_files):
+    measure(
+        lambda: MeasurementStack(campaign_files).data, len(campaign_files)
+    )
+
+
+def test_read_headers(measure, campaign_files):
+    measure(MeasurementHeader.read, len(campaign_files), campaign_files)
+
+
+def test_read_stack_workers(measure, campaign_files):
+    measure(
+        lambda: MeasurementStack(campaign_files, read_workers=8).data,
+        len(campaign_files)
+    )
+
+
+def test_read_stack_archive(measure, archive_files):
+    measure(
+        lambda: MeasurementStack(archive_files).data, len(archive_files)
+    )
@@ -0,0 +1,14 @@
+import numpy as np
+
+from spectro_dp.asd import MeasurementFile
+from spectro_dp.asd.splice_correction import SpliceCorrection
+
+SPECTRA = 10000
+
+
+def test_apply_stack(measure):
+    stack = np.random.default_rng(0).uniform(
+        0.5, 1, (SPECTRA, MeasurementFile.BAND_COUNT)
+    ).astype(MeasurementFile.DATA_TYPE)
+
+    measure(SpliceCorrection().apply, SPECTRA, stack)
@@ -1,9 +1,31 @@
 from .measurement_composite import MeasurementComposite
 from .measurement_file import MeasurementFile
-from .plotter import Plotter
+from .measurement_header import MeasurementHeader
+from .measurement_index import MeasurementIndex
+from .measurement_stack import MeasurementStack
+from .running_statistics import RunningStatistics
 
 __all__ = [
-    MeasurementComposite,
-    MeasurementFile,
-    Plotter,
+    'MeasurementComposite',
+    'MeasurementFile',
+    'MeasurementHeader',
+    'MeasurementIndex',
+    'MeasurementStack',
+    'Plotter',
+    'RunningStatistics',
 ]
+
+# Modules that import matplotlib are loaded on first access
+_LAZY_IMPORTS = {
+    'Plotter': '.plotter',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
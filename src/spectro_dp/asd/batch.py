@@ -0,0 +1,423 @@
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import click
+
+from . import profiler
+from .cube_store import CubeStore
+from .measurement_composite import MeasurementComposite
+from .profiler import profile_options
+from .resampling import BandResampler
+from .set_cache import SetCache
+
+
+class BatchJob:
+    """
+    One composite calculation described by a row of a batch manifest.
+
+    The job processes the composite the same way as the single-run command
+    line interfaces (`asd_albedo` and `asd_reflectance`) and saves the result
+    with MeasurementComposite.save() next to the input files.
+    """
+
+    MODES = {
+        'albedo': dict(
+            set_1_count=10, set_2_count=10, output_file_suffix='albedo'
+        ),
+        'reflectance': dict(
+            set_1_count=1, set_2_count=10, output_file_suffix='reflectance'
+        ),
+    }
+    # Same plot labels as the single-run command line interfaces
+    PLOT_OPTIONS = {
+        'albedo': dict(
+            composite_title='Albedo',
+            set_1_label='Down Measurements',
+            set_2_label='Up Measurements',
+        ),
+        'reflectance': dict(
+            composite_title='Reflectance',
+            set_1_label='Surface',
+            set_2_label='White reference',
+        ),
+    }
+
+    REQUIRED_FIELDS = [
+        'input_dir', 'file_prefix', 'set_1_index', 'set_2_index'
+    ]
+
+    def __init__(self, input_dir, file_prefix, set_1_index, set_2_index,
+                 **kwargs) -> None:
+        """
+        :param input_dir: Directory with all the measurements
+        :param file_prefix: Naming prefix for the input files
+        :param set_1_index: File number of the first set of measurements
+        :param set_2_index: File number of the second set of measurements
+        :param kwargs: Optional - Possible options
+            mode: Either 'albedo' or 'reflectance' (Default: albedo)
+            set_1_count: Number of first set measurements
+                         (Default: depends on mode)
+            set_2_count: Number of second set measurements
+                         (Default: depends on mode)
+            set_2_prefix: Path to set 2 files if different from set 1 files
+            output_file_suffix: Suffix for the saved result
+                                (Default: name of the mode)
+            site: Name of the site (Default: name of the input directory)
+        """
+        self.mode = kwargs.get('mode') or 'albedo'
+        if self.mode not in self.MODES:
+            raise ValueError(
+                f"Unknown mode '{self.mode}'. "
+                f"Valid options: {', '.join(self.MODES)}"
+            )
+        defaults = self.MODES[self.mode]
+
+        self.input_dir = Path(input_dir)
+        self.file_prefix = file_prefix
+        self.set_1_index = int(set_1_index)
+        self.set_2_index = int(set_2_index)
+        self.set_1_count = int(self._option(kwargs, 'set_1_count', defaults))
+        self.set_2_count = int(self._option(kwargs, 'set_2_count', defaults))
+        self.set_2_prefix = kwargs.get('set_2_prefix') or ''
+        self.output_file_suffix = \
+            self._option(kwargs, 'output_file_suffix', defaults)
+        self.site = kwargs.get('site') or self.input_dir.name
+
+    @staticmethod
+    def _option(options, name, defaults):
+        """
+        :param options: Options of the job
+        :param name: Name of the option
+        :param defaults: Default values of the mode
+        :return: Value of the option or the default when it is not given or
+                 empty, i.e. an empty manifest cell. A value of 0 is kept.
+        """
+        value = options.get(name)
+        return defaults[name] if value is None or value == '' else value
+
+    def composite(self, **kwargs) -> MeasurementComposite:
+        """
+        :param kwargs: Further options for MeasurementComposite
+        :return: MeasurementComposite configured for this job
+        """
+        return MeasurementComposite(
+            self.input_dir, self.file_prefix,
+            set_1_index=self.set_1_index, set_1_count=self.set_1_count,
+            set_2_index=self.set_2_index, set_2_count=self.set_2_count,
+            set_2_prefix=self.set_2_prefix, **kwargs
+        )
+
+    def plot_file(self, plot_dir) -> Path:
+        """
+        :param plot_dir: Directory for the plot images
+        :return: Path of the quick-look image for this job
+        """
+        return Path(plot_dir).joinpath(
+            f"{self.site}_{self.file_prefix}_{self.output_file_suffix}.png"
+        )
+
+    def run(self, keep_composite=False, plot_dir=None, sensors=(),
+            read_workers=1, set_cache=None, profile=False) -> dict:
+        """
+        Calculate and save the composite for this job. Errors are reported
+        in the returned status and do not raise.
+
+        :param keep_composite: Return the calculated composite with the
+                               status under the 'composite' key
+                               (Default: False)
+        :param plot_dir: Directory to save a quick-look plot of the
+                         composite to (Default: None; no plot)
+        :param sensors: Names of sensors or paths to spectral response
+                        tables to save the resampled result for
+                        (Default: None)
+        :param read_workers: Number of files read at the same time
+                             (Default: 1)
+        :param set_cache: SetCache to reuse averaged sets from
+                          (Default: None)
+        :param profile: Record the stages and counters of the job and return
+                        them under the 'profile' key, i.e. from a worker
+                        process (Default: False)
+        :return: Dictionary with status, output file and timing of the job
+        """
+        status = dict(
+            input_dir=self.input_dir.as_posix(),
+            file_prefix=self.file_prefix,
+            mode=self.mode,
+            status='ok',
+            output='',
+            plot='',
+            resampled='',
+            message='',
+        )
+        start = time.perf_counter()
+        if profile:
+            job_profiler = profiler.enable()
+
+        try:
+            composite = self.composite(
+                read_workers=read_workers, set_cache=set_cache
+            )
+            composite.calculate()
+            status['output'] = composite.save(self.output_file_suffix)
+            status['resampled'] = ';'.join(
+                composite.save_resampled(self.output_file_suffix, sensor)
+                for sensor in sensors
+            )
+            if plot_dir is not None:
+                from .renderer import shared_renderer
+                status['plot'] = shared_renderer().render(
+                    composite, self.plot_file(plot_dir),
+                    **self.PLOT_OPTIONS[self.mode]
+                )
+            if keep_composite:
+                status['composite'] = composite
+        except Exception as error:
+            # Any failure of one job, i.e. an unreadable file, is recorded
+            # and does not stop the other jobs of the batch
+            status['status'] = 'error'
+            status['message'] = f"{type(error).__name__}: {error}"
+
+        status['seconds'] = round(time.perf_counter() - start, 4)
+        if profile:
+            profiler.disable()
+            status['profile'] = job_profiler.state()
+
+        return status
+
+
+def read_manifest(manifest) -> list:
+    """
+    Read all jobs from a manifest. Supported formats are CSV with a header
+    row and YAML (requires PyYAML), with either a list of jobs or a mapping
+    with a 'jobs' key holding the list.
+
+    Relative input directories are resolved against the manifest location.
+
+    :param manifest: Path to the manifest file
+    :return: List of BatchJob
+    """
+    manifest = Path(manifest)
+
+    if manifest.suffix.lower() in ['.yml', '.yaml']:
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(
+                'Reading YAML manifests requires the PyYAML package'
+            )
+        with open(manifest) as infile:
+            rows = yaml.safe_load(infile) or []
+        if isinstance(rows, dict):
+            rows = rows.get('jobs', [])
+    else:
+        with open(manifest, newline='') as infile:
+            rows = list(csv.DictReader(infile))
+
+    jobs = []
+    for line, row in enumerate(rows, start=1):
+        row = {
+            key.strip(): value.strip() if isinstance(value, str) else value
+            for key, value in row.items() if key is not None
+        }
+        missing = [
+            field for field in BatchJob.REQUIRED_FIELDS
+            if row.get(field) in [None, '']
+        ]
+        if len(missing) > 0:
+            raise ValueError(
+                f"Job {line} is missing required field(s): "
+                f"{', '.join(missing)}"
+            )
+
+        input_dir = Path(str(row.pop('input_dir')))
+        if not input_dir.is_absolute():
+            input_dir = manifest.parent.joinpath(input_dir)
+
+        jobs.append(BatchJob(input_dir, **row))
+
+    return jobs
+
+
+def run_jobs(jobs, workers=1, store=None, store_raw=False, plot_dir=None,
+             sensors=(), read_workers=1, set_cache=None) -> list:
+    """
+    Run all given jobs with a pool of worker processes.
+
+    :param jobs: List of BatchJob
+    :param workers: Number of parallel processes (Default: 1)
+    :param store: Optional CubeStore to add the composite of each
+                  successful job to (Default: None)
+    :param store_raw: Also add all measurements of the composites to the
+                      store (Default: False)
+    :param plot_dir: Directory to save a quick-look plot of each composite
+                     to. Each worker process reuses one figure.
+                     (Default: None; no plots)
+    :param sensors: Names of sensors or paths to spectral response tables to
+                    save the resampled result of each job for
+                    (Default: None)
+    :param read_workers: Number of files each worker process reads at the
+                         same time (Default: 1)
+    :param set_cache: SetCache shared by all jobs, i.e. for white reference
+                      sets used by many jobs (Default: None)
+    :return: List with the status of each job, in the order of the jobs
+    """
+    run = partial(
+        BatchJob.run, keep_composite=store is not None, plot_dir=plot_dir,
+        sensors=tuple(sensors), read_workers=read_workers,
+        set_cache=set_cache,
+    )
+    if plot_dir is not None:
+        Path(plot_dir).mkdir(parents=True, exist_ok=True)
+
+    if workers <= 1 or len(jobs) <= 1:
+        results = [run(job) for job in jobs]
+    else:
+        # Worker processes record to their own profiler, which is merged
+        # into the profiler of this process
+        active = profiler.active()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                partial(run, profile=active is not None), jobs
+            ))
+        for result in results:
+            if 'profile' in result:
+                active.merge(result.pop('profile'))
+
+    if store is not None:
+        # The store is only written by this process
+        store.append_many([
+            store.composite_entry(
+                result.pop('composite'),
+                suffix=job.output_file_suffix,
+                raw=store_raw,
+                site=job.site,
+            )
+            for job, result in zip(jobs, results) if 'composite' in result
+        ])
+
+    return results
+
+
+def write_summary(summary_file, results) -> None:
+    """
+    Write the per-job status and timing to a CSV file.
+
+    :param summary_file: Path of the output file
+    :param results: List of job status dictionaries from BatchJob.run()
+    """
+    fields = [
+        'job', 'input_dir', 'file_prefix', 'mode',
+        'status', 'seconds', 'output', 'plot', 'resampled', 'message',
+    ]
+    with open(summary_file, 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fields)
+        writer.writeheader()
+        for job, result in enumerate(results, start=1):
+            writer.writerow(dict(job=job, **result))
+
+
+@click.command(
+    help='Calculate albedo and reflectance composites for all jobs listed '
+         'in a manifest file (CSV or YAML).'
+)
+@click.option(
+    '-m', '--manifest',
+    prompt=True, type=click.Path(exists=True, dir_okay=False),
+    help='Path to the manifest file. Required columns: input_dir, '
+         'file_prefix, set_1_index, set_2_index. Optional columns: mode, '
+         'set_1_count, set_2_count, set_2_prefix, output_file_suffix, site'
+)
+@click.option(
+    '-w', '--workers',
+    default=1, type=click.IntRange(min=1),
+    help='Number of parallel worker processes. (Default: 1)'
+)
+@click.option(
+    '--read-workers',
+    default=1, type=click.IntRange(min=1),
+    help='Number of files each worker process reads at the same time. '
+         'Higher values speed up reading from network or USB drives. '
+         '(Default: 1)'
+)
+@click.option(
+    '--no-cache',
+    is_flag=True, default=False,
+    help='Always average the measurements from the files instead of '
+         'reusing averages of unchanged files from the set cache.',
+)
+@click.option(
+    '-s', '--summary',
+    type=click.Path(dir_okay=False),
+    help='Path of the CSV file with the status of each job. '
+         'Default: <manifest>_summary.csv next to the manifest'
+)
+@click.option(
+    '--store',
+    type=click.Path(file_okay=False),
+    help='Directory of a campaign store to add all results to. '
+         'Created when it does not exist.'
+)
+@click.option(
+    '--store-raw',
+    is_flag=True, default=False,
+    help='Add all measurements of each composite to the store.'
+)
+@click.option(
+    '--compression',
+    type=click.Choice(['zlib', 'zstd']), default=None,
+    help='Compression for a new store. Default: No compression'
+)
+@click.option(
+    '--plot-out',
+    type=click.Path(file_okay=False), default=None,
+    help='Directory to save a quick-look PNG plot of each result to. '
+         'Created when it does not exist.'
+)
+@click.option(
+    '--sensor', 'sensors',
+    multiple=True,
+    help='Save each result resampled to the bands of a sensor. Either a '
+         'name (landsat8, sentinel2, modis) or the path to a CSV file with '
+         'the spectral response. Can be given multiple times.'
+)
+@profile_options
+def cli(manifest, workers, read_workers, no_cache, summary, store, store_raw,
+        compression, plot_out, sensors):
+    try:
+        jobs = read_manifest(manifest)
+        if store is not None:
+            store = CubeStore(store, compression=compression)
+        # Check all sensors before processing any job
+        for sensor in sensors:
+            BandResampler.load(sensor)
+    except (FileNotFoundError, ValueError, TypeError) as error:
+        print(f"ERROR: {error}")
+        return
+
+    start = time.perf_counter()
+    results = run_jobs(
+        jobs, workers, store, store_raw, plot_out, sensors, read_workers,
+        None if no_cache else SetCache(),
+    )
+    elapsed = time.perf_counter() - start
+
+    if summary is None:
+        manifest = Path(manifest)
+        summary = manifest.with_name(f"{manifest.stem}_summary.csv")
+
+    write_summary(summary, results)
+
+    failed = [result for result in results if result['status'] != 'ok']
+    print(
+        f"Processed {len(results)} job(s) in {elapsed:.2f} seconds "
+        f"with {len(failed)} error(s)"
+    )
+    for result in failed:
+        print(
+            f"  ERROR: {result['input_dir']} {result['file_prefix']}: "
+            f"{result['message']}"
+        )
+    print(f"Summary saved to:\n  {Path(summary).as_posix()}")
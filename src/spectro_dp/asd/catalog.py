@@ -0,0 +1,188 @@
+import os
+from pathlib import Path
+
+import click
+import numpy as np
+
+from .measurement_file import MeasurementFile
+from .measurement_header import MeasurementHeader
+from .measurement_index import MeasurementIndex
+from .profiler import profile_options
+
+
+class MeasurementCatalog:
+    """
+    Columnar catalog of the headers of all ASD measurement files in a
+    directory tree.
+
+    Each header field is stored as one column, with one row per file. This
+    allows to select files by acquisition time or instrument without reading
+    the spectra. Catalogs are saved as compressed .npz archive.
+    """
+
+    FILE_NAME = 'asd_catalog.npz'
+    SKIP_FIELDS = ['signature', 'comments', 'when']
+
+    def __init__(self, root, columns) -> None:
+        """
+        :param root: Root directory of the cataloged files
+        :param columns: Dictionary with column name and array of values.
+                        Requires a 'path' column with paths relative to the
+                        root directory.
+        """
+        self._root = Path(root)
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return self._columns['path'].size
+
+    def __getitem__(self, column) -> np.ndarray:
+        return self._columns[column]
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns.keys())
+
+    @property
+    def files(self) -> list:
+        """
+        :return: List with the paths of all files in the catalog
+        """
+        return [self.root.joinpath(file) for file in self['path']]
+
+    @staticmethod
+    def find_files(root) -> list:
+        """
+        Find all files with a numeric extension and at least a complete
+        header in a directory tree.
+
+        :param root: Root directory to search
+        :return: Sorted list of file paths relative to the root directory
+        """
+        files = []
+
+        for directory, directories, names in os.walk(root):
+            directories.sort()
+            for name in sorted(names):
+                if MeasurementIndex.file_number(name) is None:
+                    continue
+                file = os.path.join(directory, name)
+                if os.path.getsize(file) >= MeasurementFile.HEADER_BYTES:
+                    files.append(Path(os.path.relpath(file, root)))
+
+        return files
+
+    @classmethod
+    def from_directory(cls, root):
+        """
+        Read the headers of all measurement files in a directory tree.
+
+        :param root: Root directory
+        :return: MeasurementCatalog
+        """
+        root = Path(root)
+        files = cls.find_files(root)
+        headers = MeasurementHeader.read(
+            [root.joinpath(file) for file in files]
+        )
+
+        columns = dict(
+            path=np.array([file.as_posix() for file in files], dtype=str),
+            acquisition_time=MeasurementHeader.acquisition_time(headers),
+            comments=np.array([
+                comment.split(b'\x00', 1)[0].decode(
+                    MeasurementFile.HEADER_DECODE
+                )
+                for comment in headers['comments']
+            ], dtype=str),
+        )
+        for field in MeasurementHeader.DTYPE.names:
+            if field not in cls.SKIP_FIELDS:
+                columns[field] = np.ascontiguousarray(headers[field])
+
+        return cls(root, columns)
+
+    @classmethod
+    def load(cls, catalog_file):
+        """
+        :param catalog_file: Path to a saved catalog
+        :return: MeasurementCatalog
+        """
+        with np.load(catalog_file) as catalog:
+            columns = {name: catalog[name] for name in catalog.files}
+
+        return cls(str(columns.pop('root')), columns)
+
+    def save(self, catalog_file) -> str:
+        """
+        Save the catalog as compressed .npz archive.
+
+        :param catalog_file: Path of the output file
+        :return: Full path of saved file
+        """
+        catalog_file = Path(catalog_file).as_posix()
+        with open(catalog_file, 'wb') as outfile:
+            np.savez_compressed(
+                outfile, root=np.array(self.root.as_posix()), **self._columns
+            )
+
+        return catalog_file
+
+    def select(self, start=None, end=None, **fields) -> list:
+        """
+        Select files by acquisition time and header field values.
+
+        :param start: Earliest acquisition time (inclusive)
+        :param end: Latest acquisition time (exclusive)
+        :param fields: Header field names with required value,
+                       e.g.: instrument_number=18020
+        :return: List of paths of matching files
+        """
+        selection = np.ones(len(self), dtype=bool)
+
+        if start is not None:
+            selection &= self['acquisition_time'] >= np.datetime64(start)
+        if end is not None:
+            selection &= self['acquisition_time'] < np.datetime64(end)
+        for field, value in fields.items():
+            selection &= self[field] == value
+
+        return [
+            self.root.joinpath(file) for file in self['path'][selection]
+        ]
+
+
+@click.command(
+    help='Catalog the headers of all ASD measurement files in a directory '
+         'tree.'
+)
+@click.option(
+    '-in', '--input-dir',
+    prompt=True, type=click.Path(exists=True, file_okay=False),
+    help='Path to the root directory of the measurements',
+)
+@click.option(
+    '-o', '--output-file',
+    type=click.Path(dir_okay=False),
+    help='Path of the saved catalog. '
+         f'Default: {MeasurementCatalog.FILE_NAME} in the input directory'
+)
+@profile_options
+def cli(input_dir, output_file):
+    try:
+        catalog = MeasurementCatalog.from_directory(input_dir)
+    except ValueError as error:
+        print(f"ERROR: {error}")
+        return
+
+    if output_file is None:
+        output_file = Path(input_dir).joinpath(MeasurementCatalog.FILE_NAME)
+
+    print(
+        f"Cataloged {len(catalog)} file(s). Catalog saved to:\n"
+        f"  {catalog.save(output_file)}"
+    )
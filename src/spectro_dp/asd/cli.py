@@ -0,0 +1,54 @@
+from importlib import import_module
+
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    Command group that imports the module of a subcommand only when the
+    subcommand is run or its help is shown. Starting one command does not
+    pay for the imports of all other commands.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs) -> None:
+        """
+        :param lazy_commands: Dictionary with the name of each subcommand
+                              and the import path of its click command
+                              in the form 'module:attribute'
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx) -> list:
+        return sorted(
+            set(super().list_commands(ctx)) | set(self.lazy_commands)
+        )
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands:
+            module, attribute = self.lazy_commands[cmd_name].split(':')
+            return getattr(import_module(module, __package__), attribute)
+
+        return super().get_command(ctx, cmd_name)
+
+
+COMMANDS = {
+    'albedo': '.albedo:cli',
+    'batch': '.batch:cli',
+    'catalog': '.catalog:cli',
+    'features': '.features:cli',
+    'grain-size': '.grain_size:cli',
+    'quality': '.quality_screen:cli',
+    'reflectance': '.reflectance:cli',
+    'reflectance-sequence': '.reflectance_sequence:cli',
+    'synthetic': '.synthetic:cli',
+    'white-reference': '.white_reference:cli',
+}
+
+
+@click.group(
+    cls=LazyGroup, lazy_commands=COMMANDS,
+    help='Process field spectrometer data.',
+)
+def cli():
+    pass
@@ -0,0 +1,85 @@
+import click
+
+from .plotter import Plotter
+from .watch import watch_composite
+
+
+def check_watch_options(watch, robust_mean, quality_screen) -> None:
+    """
+    Reject options that the incremental updates of the watch mode do not
+    apply, since they require all files of a set.
+
+    :param watch: Value of the --watch option
+    :param robust_mean: Value of the --robust-mean option
+    :param quality_screen: Value of the --quality-screen option
+    :raises click.UsageError: When --watch is combined with one of them
+    """
+    if not watch:
+        return
+
+    options = [
+        name for name, value in [
+            ('--robust-mean', robust_mean),
+            ('--quality-screen', quality_screen),
+        ] if value
+    ]
+    if len(options) > 0:
+        raise click.UsageError(
+            f"--watch can not be combined with {' and '.join(options)}, "
+            f"which require all files of a set."
+        )
+
+
+def run_composite(composite, output_file_suffix, plot_options, **kwargs):
+    """
+    Shared processing of the albedo and reflectance command line interfaces.
+    Calculate and save the result of the composite and show or save the plot.
+
+    :param composite: MeasurementComposite to process
+    :param output_file_suffix: Suffix to use for the saved file
+    :param plot_options: Options for Plotter.show_composite()
+    :param kwargs: Optional - Possible options
+        save_statistics: Save the statistics of both sets (Default: False)
+        skip_plot: Don't show the plot (Default: False)
+        plot_out: Path of an image file to save the plot to instead of
+                  showing it (Default: None)
+        watch: Update the result while files are written (Default: False)
+        poll_interval: Seconds between checks for new files (Default: 1)
+    """
+    skip_plot = kwargs.get('skip_plot', False)
+    plot_out = kwargs.get('plot_out', None)
+    renderer = None
+    if plot_out is not None:
+        from .renderer import Renderer
+        renderer = Renderer()
+
+    def plot(result, block=True):
+        if renderer is not None:
+            print(
+                f"Plot saved to:\n  "
+                f"{renderer.render(result, plot_out, **plot_options)}"
+            )
+        elif not skip_plot:
+            Plotter.show_composite(result, block=block, **plot_options)
+
+    if kwargs.get('watch', False):
+        def on_update(updated):
+            print(f"Results saved to:\n  {updated.save(output_file_suffix)}")
+            plot(updated, block=False)
+
+        watch_composite(composite, on_update, kwargs.get('poll_interval', 1))
+        if composite.result is None:
+            raise FileNotFoundError('No input files found to average.')
+    else:
+        composite.calculate()
+        print(f"Results saved to:\n  {composite.save(output_file_suffix)}")
+
+    if kwargs.get('save_statistics', False):
+        print(
+            f"Statistics saved to:\n  "
+            f"{composite.save_statistics(output_file_suffix)}"
+        )
+
+    # The image file is already up to date after watching
+    if not (kwargs.get('watch', False) and renderer is not None):
+        plot(composite)
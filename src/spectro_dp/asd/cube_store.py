@@ -0,0 +1,513 @@
+import json
+import os
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from .measurement_file import MeasurementFile
+from .measurement_stack import MeasurementStack
+
+
+class CubeStore:
+    """
+    Append-able binary store for the composites and raw spectra of a
+    field campaign.
+
+    Each dataset is a two-dimensional array with one row per spectrum and one
+    column per band, saved in chunks of rows. Uncompressed chunks are saved
+    as .npy files and read as memory map, so only the requested rows and
+    bands are read from disk. Compressed chunks shuffle the bytes of the
+    values before compressing with zlib or zstd (requires the zstandard
+    package).
+
+    Datasets:
+     * 'result', 'set_1', 'set_2': One row per composite
+     * 'raw': All measurements of a composite, located with the 'raw_start'
+              and 'raw_count' entries of the composite index.
+
+    The index of the composites is stored as JSON lines and holds the site,
+    acquisition time, file prefix, and input directory of each composite.
+
+    Rows of a chunk that is not full yet are written as separate part
+    files, named after the chunk and the row offset of the part. Appending
+    only writes the new rows, and the parts are merged into the chunk file
+    once the chunk is full.
+    """
+
+    SETTINGS_FILE = 'store.json'
+    INDEX_FILE = 'index.jsonl'
+
+    COMPOSITE_DATASETS = ['result', 'set_1', 'set_2']
+    RAW_DATASET = 'raw'
+    COMPRESSION = {None: '.npy', 'zlib': '.zlib', 'zstd': '.zst'}
+    CHUNK_ROWS = 256
+
+    def __init__(self, path, compression=None, chunk_rows=CHUNK_ROWS) -> None:
+        """
+        Open an existing store or create a new one. The compression and
+        chunk size are only used when creating a new store.
+
+        :param path: Directory of the store
+        :param compression: Compression of the chunks, either 'zlib', 'zstd'
+                            or None (Default: None)
+        :param chunk_rows: Number of rows per chunk (Default: 256)
+        """
+        self._path = Path(path)
+        settings_file = self._path.joinpath(self.SETTINGS_FILE)
+
+        if settings_file.exists():
+            with open(settings_file) as infile:
+                self._settings = json.load(infile)
+        else:
+            if compression not in self.COMPRESSION:
+                raise ValueError(
+                    f"Unknown compression '{compression}'. Valid options: "
+                    f"{', '.join(str(option) for option in self.COMPRESSION)}"
+                )
+            self._settings = dict(
+                version=1,
+                compression=compression,
+                chunk_rows=int(chunk_rows),
+                bands=MeasurementFile.BAND_COUNT,
+                dtype=np.dtype(MeasurementFile.DATA_TYPE).str,
+            )
+            self._path.mkdir(parents=True, exist_ok=True)
+            with open(settings_file, 'w') as outfile:
+                json.dump(self._settings, outfile)
+
+        self._index = []
+        index_file = self._path.joinpath(self.INDEX_FILE)
+        if index_file.exists():
+            with open(index_file) as infile:
+                self._index = [json.loads(line) for line in infile if line]
+        self._columns = {}
+
+    def __len__(self) -> int:
+        """
+        :return: Number of composites in the store
+        """
+        return len(self._index)
+
+    def __getitem__(self, row) -> dict:
+        """
+        :param row: Row of the composite
+        :return: Index entry of the composite
+        """
+        return self._index[row]
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def compression(self) -> str:
+        return self._settings['compression']
+
+    @property
+    def chunk_rows(self) -> int:
+        return self._settings['chunk_rows']
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(self._settings['dtype'])
+
+    def row_count(self, dataset) -> int:
+        """
+        :param dataset: Name of the dataset
+        :return: Number of rows in the dataset
+        """
+        if dataset == self.RAW_DATASET:
+            if len(self) == 0:
+                return 0
+            return self[-1]['raw_start'] + self[-1]['raw_count']
+        elif dataset in self.COMPOSITE_DATASETS:
+            return len(self)
+
+        raise ValueError(f"Unknown dataset '{dataset}'")
+
+    def append(self, result, set_1=None, set_2=None, raw=None, **kwargs) \
+            -> int:
+        """
+        Add one composite to the store. Use append_many() to add several
+        composites at once.
+
+        :param result: Result of the composite
+        :param set_1: Averaged set_1 measurements (Default: None)
+        :param set_2: Averaged set_2 measurements (Default: None)
+        :param raw: Array with all measurements of shape (files, bands)
+                    (Default: None)
+        :param kwargs: Optional - Index entries
+            site: Name of the site
+            time: Acquisition time
+            prefix: File prefix of the measurements
+            suffix: File suffix used when exporting to .txt
+            input_dir: Directory of the measurements
+        :return: Row of the added composite
+        """
+        return self.append_many([
+            dict(result=result, set_1=set_1, set_2=set_2, raw=raw, **kwargs)
+        ])[0]
+
+    def append_many(self, composites) -> list:
+        """
+        Add several composites to the store, writing the rows of each
+        dataset and the index once for all composites.
+
+        :param composites: List of dictionaries with the arguments of
+                           append() for each composite, i.e. from
+                           composite_entry()
+        :return: Rows of the added composites
+        """
+        bands = self._settings['bands']
+        missing = np.full(bands, np.nan)
+        raw_start = self.row_count(self.RAW_DATASET)
+        starts = {
+            dataset: self.row_count(dataset)
+            for dataset in self.COMPOSITE_DATASETS + [self.RAW_DATASET]
+        }
+        values = {dataset: [] for dataset in starts}
+        entries = []
+
+        for composite in composites:
+            raw = composite.get('raw')
+            raw = np.empty((0, bands)) if raw is None else raw
+            entry = dict(
+                site=composite.get('site', ''),
+                time=None,
+                prefix=composite.get('prefix', ''),
+                suffix=composite.get('suffix', ''),
+                input_dir=str(composite.get('input_dir', '')),
+                raw_start=raw_start,
+                raw_count=len(raw),
+            )
+            if composite.get('time') is not None:
+                entry['time'] = str(np.datetime64(composite['time'], 's'))
+            raw_start += len(raw)
+            entries.append(entry)
+
+            values['result'].append(composite['result'])
+            for dataset in ['set_1', 'set_2']:
+                value = composite.get(dataset)
+                values[dataset].append(missing if value is None else value)
+            values[self.RAW_DATASET].append(raw)
+
+        if len(entries) == 0:
+            return []
+
+        # The index is written last. Data of an interrupted append is
+        # overwritten by the next one.
+        for dataset, rows in values.items():
+            self._append_rows(
+                dataset, starts[dataset],
+                np.concatenate([
+                    np.asarray(row, dtype=self.dtype).reshape(-1, bands)
+                    for row in rows
+                ])
+            )
+
+        with open(self.path.joinpath(self.INDEX_FILE), 'a') as outfile:
+            outfile.writelines(json.dumps(entry) + '\n' for entry in entries)
+        self._index.extend(entries)
+        self._columns = {}
+
+        return list(range(len(self) - len(entries), len(self)))
+
+    def append_composite(self, composite, suffix='', raw=False, **kwargs) \
+            -> int:
+        """
+        Add a calculated MeasurementComposite to the store.
+
+        :param composite: MeasurementComposite
+        :param suffix: File suffix used when exporting to .txt
+        :param raw: Also store all measurements of the composite
+                    (Default: False)
+        :param kwargs: Optional - Index entries
+            site: Name of the site (Default: Name of the input directory)
+            time: Acquisition time (Default: Time of first set_1 file)
+        :return: Row of the added composite
+        """
+        return self.append_many([
+            self.composite_entry(composite, suffix, raw, **kwargs)
+        ])[0]
+
+    @staticmethod
+    def composite_entry(composite, suffix='', raw=False, **kwargs) -> dict:
+        """
+        Arguments to add a calculated MeasurementComposite with
+        append_many(). See append_composite() for the parameters.
+
+        :return: Dictionary with the arguments of append()
+        """
+        files = composite.set_1_files + composite.set_2_files
+        time = kwargs.get('time')
+        if time is None and len(files) > 0:
+            time = MeasurementFile(files[0]).acquisition_time
+
+        return dict(
+            result=composite.result,
+            set_1=composite.set_1,
+            set_2=composite.set_2,
+            raw=MeasurementStack(files).data if raw else None,
+            site=kwargs.get('site', composite.input_dir.name),
+            time=time,
+            prefix=composite.file_prefix,
+            suffix=suffix,
+            input_dir=composite.input_dir.as_posix(),
+        )
+
+    def read(self, dataset='result', rows=None, bands=None) -> np.ndarray:
+        """
+        Read rows and bands of a dataset. Only the chunks holding the
+        requested rows are read.
+
+        :param dataset: Name of the dataset (Default: result)
+        :param rows: Rows to read as slice or list (Default: All rows)
+        :param bands: Bands to read as slice or list (Default: All bands)
+        :return: Array of shape (rows, bands)
+        """
+        total = self.row_count(dataset)
+        if rows is None or isinstance(rows, slice):
+            rows = np.arange(total)[rows]
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        bands = slice(None) if bands is None else bands
+
+        if rows.size > 0 and (rows.min() < 0 or rows.max() >= total):
+            raise IndexError(
+                f"Rows out of range for dataset '{dataset}' with {total} rows"
+            )
+
+        band_count = np.arange(self._settings['bands'])[bands].size
+        data = np.empty((rows.size, band_count), dtype=self.dtype)
+
+        chunks = rows // self.chunk_rows
+        for chunk in np.unique(chunks):
+            selection = chunks == chunk
+            data[selection] = self._read_chunk(
+                dataset, chunk,
+                min(self.chunk_rows, total - chunk * self.chunk_rows)
+            )[rows[selection] - chunk * self.chunk_rows, bands]
+
+        return data
+
+    def read_raw(self, row) -> np.ndarray:
+        """
+        Read all measurements of one composite.
+
+        :param row: Row of the composite
+        :return: Array of shape (files, bands)
+        """
+        start = self[row]['raw_start']
+        return self.read(
+            self.RAW_DATASET, slice(start, start + self[row]['raw_count'])
+        )
+
+    @staticmethod
+    def band_slice(min_wavelength, max_wavelength) -> slice:
+        """
+        :param min_wavelength: First wavelength to include
+        :param max_wavelength: Last wavelength to include
+        :return: Slice of the bands for the given wavelength range
+        """
+        return slice(
+            min_wavelength - MeasurementFile.MIN_WAVELENGTH,
+            max_wavelength - MeasurementFile.MIN_WAVELENGTH + 1
+        )
+
+    def column(self, name) -> np.ndarray:
+        """
+        Values of one index entry for all composites
+
+        :param name: Name of the index entry
+        :return: Array with one value per composite
+        """
+        if name not in self._columns:
+            values = [entry[name] for entry in self._index]
+            if name == 'time':
+                values = np.array(
+                    ['NaT' if value is None else value for value in values],
+                    dtype='datetime64[s]'
+                )
+            self._columns[name] = np.array(values)
+
+        return self._columns[name]
+
+    def select(self, start=None, end=None, **entries) -> np.ndarray:
+        """
+        Select composites by acquisition time and index entries.
+
+        :param start: Earliest acquisition time (inclusive)
+        :param end: Latest acquisition time (exclusive)
+        :param entries: Index entries with required value, e.g. site='A'
+        :return: Array with the rows of matching composites
+        """
+        selection = np.ones(len(self), dtype=bool)
+
+        if start is not None:
+            selection &= self.column('time') >= np.datetime64(start)
+        if end is not None:
+            selection &= self.column('time') < np.datetime64(end)
+        for name, value in entries.items():
+            selection &= self.column(name) == value
+
+        return np.flatnonzero(selection)
+
+    def export_txt(self, row, directory=None, dataset='result') -> str:
+        """
+        Export a composite dataset as .txt file, using the same format and
+        file name as MeasurementComposite.save(). Sets are saved with the
+        set name appended to the file name.
+
+        :param row: Row of the composite
+        :param directory: Output directory (Default: input directory of the
+                          composite)
+        :param dataset: Name of the dataset (Default: result)
+        :return: Full path of saved file
+        """
+        entry = self[row]
+        if directory is None:
+            directory = entry['input_dir']
+        file_name = f"{entry['prefix']}_{entry['suffix']}"
+        if dataset != 'result':
+            file_name += f"_{dataset}"
+
+        outfile = Path(directory).joinpath(f"{file_name}.txt").as_posix()
+        np.savetxt(outfile, self.read(dataset, [row])[0], fmt='%.4f')
+        return outfile
+
+    def _chunk_file(self, dataset, chunk) -> Path:
+        return self.path.joinpath(
+            dataset, f"{chunk:06d}{self.COMPRESSION[self.compression]}"
+        )
+
+    def _part_file(self, dataset, chunk, offset) -> Path:
+        return self.path.joinpath(
+            dataset,
+            f"{chunk:06d}.{offset:06d}{self.COMPRESSION[self.compression]}"
+        )
+
+    def _part_files(self, dataset, chunk) -> list:
+        """
+        :return: List of (row offset, path) of all parts of a chunk
+        """
+        parts = self.path.joinpath(dataset).glob(
+            f"{chunk:06d}.*{self.COMPRESSION[self.compression]}"
+        )
+        return sorted(
+            (int(part.name.split('.')[1]), part) for part in parts
+        )
+
+    def _read_chunk(self, dataset, chunk, rows) -> np.ndarray:
+        """
+        :param dataset: Name of the dataset
+        :param chunk: Number of the chunk
+        :param rows: Number of rows in the chunk. Full chunks are read from
+                     the chunk file and partly filled ones from the parts.
+        :return: Rows of the chunk
+        :raises ValueError: When the files have fewer rows
+        """
+        if rows == self.chunk_rows:
+            data = self._read_file(self._chunk_file(dataset, chunk))
+            end = len(data)
+        else:
+            data = np.empty(
+                (rows, self._settings['bands']), dtype=self.dtype
+            )
+            end = 0
+            # Parts beyond the rows are left over from interrupted appends
+            for offset, part_file in self._part_files(dataset, chunk):
+                if offset > end or offset >= rows:
+                    break
+                part = self._read_file(part_file)[:rows - offset]
+                data[offset:offset + len(part)] = part
+                end = max(end, offset + len(part))
+
+        if end < rows:
+            raise ValueError(
+                f"Chunk {chunk} of the '{dataset}' dataset in "
+                f"{self.path.as_posix()} is corrupt: {end} of {rows} rows "
+                f"found"
+            )
+
+        return data
+
+    def _read_file(self, chunk_file) -> np.ndarray:
+        if self.compression is None:
+            return np.load(chunk_file, mmap_mode='r')
+
+        data = self._decompress(chunk_file.read_bytes())
+        # Reverse the byte shuffle
+        itemsize = self.dtype.itemsize
+        data = np.frombuffer(data, dtype=np.uint8).reshape(itemsize, -1)
+        return np.ascontiguousarray(data.T).view(self.dtype).reshape(
+            -1, self._settings['bands']
+        )
+
+    def _write_file(self, chunk_file, data) -> None:
+        chunk_file.parent.mkdir(exist_ok=True)
+        temp_file = chunk_file.with_name(chunk_file.name + '.tmp')
+
+        if self.compression is None:
+            with open(temp_file, 'wb') as outfile:
+                np.save(outfile, data)
+        else:
+            # Group the bytes by significance to improve compression
+            itemsize = self.dtype.itemsize
+            shuffled = np.ascontiguousarray(data).view(np.uint8).reshape(
+                -1, itemsize
+            ).T.tobytes()
+            temp_file.write_bytes(self._compress(shuffled))
+
+        os.replace(temp_file, chunk_file)
+
+    def _append_rows(self, dataset, start, rows) -> None:
+        """
+        :param dataset: Name of the dataset
+        :param start: Number of rows in the dataset
+        :param rows: Array with the rows to add
+        """
+        position = 0
+
+        while position < len(rows):
+            chunk, offset = divmod(start + position, self.chunk_rows)
+            count = min(self.chunk_rows - offset, len(rows) - position)
+            data = rows[position:position + count]
+            position += count
+
+            if offset + count < self.chunk_rows:
+                self._write_file(
+                    self._part_file(dataset, chunk, offset), data
+                )
+                continue
+
+            # Merge the parts of a full chunk into the chunk file
+            if offset > 0:
+                data = np.concatenate([
+                    self._read_chunk(dataset, chunk, offset), data
+                ])
+            self._write_file(self._chunk_file(dataset, chunk), data)
+            for _offset, part_file in self._part_files(dataset, chunk):
+                part_file.unlink()
+
+    def _compress(self, data) -> bytes:
+        if self.compression == 'zstd':
+            return self._zstandard().ZstdCompressor().compress(data)
+
+        return zlib.compress(data)
+
+    def _decompress(self, data) -> bytes:
+        if self.compression == 'zstd':
+            return self._zstandard().ZstdDecompressor().decompress(data)
+
+        return zlib.decompress(data)
+
+    @staticmethod
+    def _zstandard():
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(
+                "The 'zstd' compression requires the zstandard package"
+            )
+
+        return zstandard
@@ -0,0 +1,385 @@
+import csv
+from pathlib import Path
+
+import click
+import numpy as np
+
+from .measurement_file import MeasurementFile
+from .profiler import profile_options
+
+
+def band_slice(min_wavelength, max_wavelength) -> slice:
+    """
+    :param min_wavelength: First wavelength in nm to include
+    :param max_wavelength: Last wavelength in nm to include
+    :return: Slice of the ASD bands for the given wavelength range
+    """
+    start = int(round(min_wavelength)) - MeasurementFile.MIN_WAVELENGTH
+    stop = int(round(max_wavelength)) - MeasurementFile.MIN_WAVELENGTH + 1
+    if start < 0 or stop > MeasurementFile.BAND_COUNT or start >= stop:
+        raise ValueError(
+            f"Wavelength range {min_wavelength} to {max_wavelength} is not "
+            f"within {MeasurementFile.MIN_WAVELENGTH} to "
+            f"{MeasurementFile.MAX_WAVELENGTH}"
+        )
+    return slice(start, stop)
+
+
+def _finite_mean(values) -> np.ndarray:
+    """
+    Mean over the last axis, leaving out values that are not finite.
+    """
+    valid = np.isfinite(values)
+    count = valid.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid, values, 0).sum(axis=-1) / count
+
+
+class NormalizedDifference:
+    """
+    Normalized difference (a - b) / (a + b) of two bands, i.e. the
+    normalized difference snow index (NDSI). Each band is the mean over a
+    window of ASD bands centered at the given wavelength.
+    """
+
+    WIDTH = 10  # in nm
+
+    def __init__(self, name, band_a, band_b, width=WIDTH) -> None:
+        """
+        :param name: Column name of the feature
+        :param band_a: Center wavelength in nm of the first band
+        :param band_b: Center wavelength in nm of the second band
+        :param width: Width in nm of each band (Default: 10)
+        """
+        self.name = name
+        self._band_a = band_slice(band_a - width / 2, band_a + width / 2)
+        self._band_b = band_slice(band_b - width / 2, band_b + width / 2)
+
+    @property
+    def columns(self) -> list:
+        return [self.name]
+
+    def __call__(self, spectra) -> dict:
+        """
+        :param spectra: Array with shape (spectra, ASD bands)
+        :return: Dictionary with one array of values per column
+        """
+        band_a = _finite_mean(spectra[:, self._band_a])
+        band_b = _finite_mean(spectra[:, self._band_b])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {self.name: (band_a - band_b) / (band_a + band_b)}
+
+
+class BandDepth:
+    """
+    Continuum removed depth and area of an absorption feature, i.e. of ice
+    around 1030 and 1260 nm.
+
+    The continuum is a straight line between the reflectance at the two
+    shoulders of the feature. The depth is one minus the lowest continuum
+    removed value between the shoulders and the area the sum of one minus
+    the continuum removed values, in nm.
+    """
+
+    # Number of bands averaged for the value at each shoulder
+    SHOULDER_BANDS = 5
+
+    def __init__(self, name, left_shoulder, right_shoulder,
+                 shoulder_bands=SHOULDER_BANDS) -> None:
+        """
+        :param name: Prefix of the column names of the feature
+        :param left_shoulder: Wavelength in nm of the left shoulder
+        :param right_shoulder: Wavelength in nm of the right shoulder
+        :param shoulder_bands: Number of bands averaged at each shoulder
+                               (Default: 5)
+        """
+        self.name = name
+        self._bands = band_slice(left_shoulder, right_shoulder)
+        half = (shoulder_bands - 1) / 2
+        self._left = band_slice(left_shoulder - half, left_shoulder + half)
+        self._right = band_slice(right_shoulder - half, right_shoulder + half)
+
+        # Position of each band between the shoulders, from 0 to 1
+        wavelengths = MeasurementFile.BAND_RANGE[self._bands]
+        self._position = (wavelengths - wavelengths[0]) / \
+            (wavelengths[-1] - wavelengths[0])
+
+    @property
+    def columns(self) -> list:
+        return [f"{self.name}_depth", f"{self.name}_area"]
+
+    def continuum_removed(self, spectra) -> np.ndarray:
+        """
+        :param spectra: Array with shape (spectra, ASD bands)
+        :return: Array with shape (spectra, feature bands)
+        """
+        left = _finite_mean(spectra[:, self._left])[:, np.newaxis]
+        right = _finite_mean(spectra[:, self._right])[:, np.newaxis]
+        continuum = left + (right - left) * self._position
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return spectra[:, self._bands] / continuum
+
+    def __call__(self, spectra) -> dict:
+        """
+        :param spectra: Array with shape (spectra, ASD bands)
+        :return: Dictionary with one array of values per column
+        """
+        absorption = 1 - self.continuum_removed(spectra)
+        valid = np.isfinite(absorption)
+        absorption = np.where(valid, absorption, 0)
+        invalid = ~valid.any(axis=1)
+
+        depth, area = self.columns
+        return {
+            depth: np.where(
+                invalid, np.nan, np.where(valid, absorption, -np.inf).max(1)
+            ),
+            area: np.where(invalid, np.nan, absorption.sum(axis=1)),
+        }
+
+
+class BroadbandAlbedo:
+    """
+    Albedo over a wavelength range, with each band weighted by the incoming
+    solar irradiance. Bands with missing values are left out and the
+    weights of the remaining bands are scaled to one.
+    """
+
+    def __init__(self, name, min_wavelength, max_wavelength,
+                 irradiance) -> None:
+        """
+        :param name: Column name of the feature
+        :param min_wavelength: First wavelength in nm to include
+        :param max_wavelength: Last wavelength in nm to include
+        :param irradiance: Solar irradiance indexed by ASD band, i.e. from
+                           solar_irradiance()
+        """
+        self.name = name
+        self._bands = band_slice(min_wavelength, max_wavelength)
+        weights = np.asarray(irradiance, dtype=np.float64)[self._bands]
+        self._weights = weights / weights.sum()
+
+    @property
+    def columns(self) -> list:
+        return [self.name]
+
+    def __call__(self, spectra) -> dict:
+        """
+        :param spectra: Array with shape (spectra, ASD bands)
+        :return: Dictionary with one array of values per column
+        """
+        spectra = spectra[:, self._bands]
+        valid = np.isfinite(spectra)
+        values = np.where(valid, spectra, 0) @ self._weights
+        weight = valid @ self._weights
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {self.name: values / weight}
+
+
+def solar_irradiance(table) -> np.ndarray:
+    """
+    Solar irradiance at the surface indexed by ASD band, i.e. a reference
+    spectrum like ASTM G173 or one measured at the site.
+
+    :param table: Path to a CSV file with a header row and the columns
+                  wavelength in nm and irradiance. The values are linearly
+                  interpolated to the ASD bands.
+    :return: Array with one value per ASD band
+    """
+    values = np.loadtxt(table, delimiter=',', skiprows=1, ndmin=2)
+    order = np.argsort(values[:, 0])
+    return np.interp(
+        MeasurementFile.BAND_RANGE, values[order, 0], values[order, 1]
+    )
+
+
+class FeaturePipeline:
+    """
+    Compute a set of spectral features for a stack of spectra, i.e. albedo
+    results of a campaign.
+
+    Each feature selects its bands and weights once when created, and all
+    spectra are processed at once with array operations. Spectra are
+    processed in chunks to limit the memory use.
+    """
+
+    # Number of spectra processed at once
+    CHUNK_SPECTRA = 4096
+
+    def __init__(self, features=None) -> None:
+        """
+        :param features: List of features (Default: default_features())
+        """
+        self._features = default_features() if features is None \
+            else list(features)
+        self._columns = [
+            column for feature in self._features for column in feature.columns
+        ]
+        if len(set(self._columns)) != len(self._columns):
+            raise ValueError('Feature column names are not unique')
+
+    @property
+    def features(self) -> list:
+        return self._features
+
+    @property
+    def columns(self) -> list:
+        return self._columns
+
+    def compute(self, spectra) -> dict:
+        """
+        :param spectra: Array with shape (spectra, ASD bands)
+        :return: Dictionary with an array of one value per spectrum for each
+                 column
+        """
+        spectra = np.atleast_2d(spectra)
+        if spectra.shape[1] != MeasurementFile.BAND_COUNT:
+            raise ValueError(
+                f"Spectra need {MeasurementFile.BAND_COUNT} bands, "
+                f"got {spectra.shape[1]}"
+            )
+
+        result = {
+            column: np.empty(len(spectra)) for column in self._columns
+        }
+        for start in range(0, len(spectra), self.CHUNK_SPECTRA):
+            rows = slice(start, start + self.CHUNK_SPECTRA)
+            chunk = spectra[rows].astype(np.float64)
+            for feature in self._features:
+                for column, values in feature(chunk).items():
+                    result[column][rows] = values
+
+        return result
+
+
+def default_features(irradiance=None) -> list:
+    """
+    :param irradiance: Solar irradiance for the broadband albedo, i.e.
+                       from solar_irradiance() (Default: None; no broadband
+                       albedo)
+    :return: List with the NDSI, the depth and area of the ice absorption
+             features around 1030 and 1260 nm, and with an irradiance the
+             visible, near-infrared and total broadband albedo
+    """
+    features = [
+        NormalizedDifference('ndsi', 560, 1640),
+        BandDepth('ice_1030', 950, 1100),
+        BandDepth('ice_1260', 1150, 1300),
+    ]
+    if irradiance is not None:
+        features += [
+            BroadbandAlbedo('albedo_vis', 350, 700, irradiance),
+            BroadbandAlbedo('albedo_nir', 700, 2500, irradiance),
+            BroadbandAlbedo('albedo_broadband', 350, 2500, irradiance),
+        ]
+
+    return features
+
+
+def write_table(outfile, index, features) -> None:
+    """
+    :param outfile: Path of the CSV file
+    :param index: Dictionary with a list of one value per spectrum for each
+                  index column, i.e. file names
+    :param features: Result of FeaturePipeline.compute()
+    """
+    with open(outfile, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(list(index) + list(features))
+        for row in zip(*index.values(), *features.values()):
+            writer.writerow(
+                list(row[:len(index)]) +
+                [f"{value:.6f}" for value in row[len(index):]]
+            )
+
+
+@click.command(
+    help='Calculate spectral features, i.e. NDSI, ice absorption band depths '
+         'and broadband albedo, of all results of a campaign and save them '
+         'as one table.'
+)
+@click.option(
+    '-in', '--input-dir',
+    type=click.Path(exists=True, file_okay=False), default=None,
+    help='Path to a directory with saved results. Sub-directories are '
+         'searched too.',
+)
+@click.option(
+    '-fs', '--file-suffix',
+    default='albedo',
+    help='Suffix of the result files in the input directory. '
+         'Default: albedo'
+)
+@click.option(
+    '--store',
+    type=click.Path(exists=True, file_okay=False), default=None,
+    help='Path to a campaign store to read all results from instead of an '
+         'input directory.',
+)
+@click.option(
+    '--solar-spectrum',
+    type=click.Path(exists=True, dir_okay=False), default=None,
+    help='CSV file with a header row and the columns wavelength in nm and '
+         'solar irradiance, i.e. ASTM G173, to weight the broadband '
+         'albedo. The broadband albedo is only calculated with a spectrum.',
+)
+@click.option(
+    '-o', '--output',
+    type=click.Path(dir_okay=False), default=None,
+    help='Path of the CSV file with the features. '
+         'Default: features.csv in the input directory or store',
+)
+@profile_options
+def cli(input_dir, file_suffix, store, solar_spectrum, output):
+    try:
+        if (input_dir is None) == (store is None):
+            raise ValueError('Either an input directory or a store is needed')
+
+        if store is not None:
+            from .cube_store import CubeStore
+            cube_store = CubeStore(store)
+            spectra = cube_store.read('result')
+            index = dict(
+                row=range(len(cube_store)),
+                site=cube_store.column('site'),
+                time=cube_store.column('time'),
+                prefix=cube_store.column('prefix'),
+            )
+            directory = store
+        else:
+            from .grain_size import read_albedo_files
+            files = sorted(Path(input_dir).rglob(f"*_{file_suffix}.txt"))
+            if len(files) == 0:
+                raise FileNotFoundError(
+                    f"No files ending with _{file_suffix}.txt found"
+                )
+            spectra = read_albedo_files(files)
+            index = dict(
+                file=[file.relative_to(input_dir).as_posix() for file in files]
+            )
+            directory = input_dir
+
+        pipeline = FeaturePipeline(
+            default_features(
+                None if solar_spectrum is None
+                else solar_irradiance(solar_spectrum)
+            )
+        )
+        features = pipeline.compute(spectra)
+    except (FileNotFoundError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return
+
+    if output is None:
+        output = Path(directory).joinpath('features.csv')
+
+    write_table(output, index, features)
+
+    print(
+        f"Calculated {len(pipeline.columns)} feature(s) of "
+        f"{len(spectra)} result(s)\n"
+        f"Results saved to:\n  {Path(output).as_posix()}"
+    )
@@ -0,0 +1,330 @@
+import csv
+from pathlib import Path
+
+import click
+import numpy as np
+
+from .measurement_file import MeasurementFile
+from .profiler import profile_options
+
+
+class GrainSizeRetrieval:
+    """
+    Find the snow grain size of measured albedo spectra by comparing them to
+    modeled albedo, i.e. from the DISORT `ssa_ice` model, with one column per
+    grain size.
+
+    The best fit is the grain size with the lowest root mean square error
+    over the bands of the fit windows. All spectra are compared to all grain
+    sizes at once with matrix products, processed in chunks of spectra to
+    limit the memory use. Bands with missing values in a spectrum are left
+    out of the error for that spectrum.
+
+    With sub-grid interpolation, a parabola through the mean square errors
+    of the best and both neighbouring grain sizes gives a grain size between
+    the modeled ones.
+    """
+
+    # Wavelength ranges in nm sensitive to the grain size
+    WINDOWS = [(950, 1100), (1150, 1300)]
+    # Number of spectra compared at once
+    CHUNK_SPECTRA = 4096
+
+    def __init__(self, model_albedo, grain_sizes=None, wavelengths=None,
+                 windows=None) -> None:
+        """
+        :param model_albedo: Modeled albedo with shape (bands, grain sizes)
+        :param grain_sizes: Grain size of each model column
+                            (Default: Column number starting at 1)
+        :param wavelengths: Wavelength in nm of each model row. The model is
+                            interpolated to the bands of the ASD.
+                            (Default: ASD bands)
+        :param windows: List of (min, max) wavelengths in nm to fit
+                        (Default: WINDOWS)
+        """
+        model_albedo = np.atleast_2d(np.asarray(model_albedo, np.float64))
+
+        if wavelengths is None:
+            if model_albedo.shape[0] != MeasurementFile.BAND_COUNT:
+                raise ValueError(
+                    f"Model has {model_albedo.shape[0]} bands instead of "
+                    f"{MeasurementFile.BAND_COUNT}. Wavelengths of the "
+                    f"model bands are required."
+                )
+        else:
+            model_albedo = self.resample(model_albedo, wavelengths)
+
+        if grain_sizes is None:
+            grain_sizes = np.arange(1, model_albedo.shape[1] + 1)
+        self._grain_sizes = np.asarray(grain_sizes, dtype=np.float64)
+        if self._grain_sizes.size != model_albedo.shape[1]:
+            raise ValueError(
+                f"Got {self._grain_sizes.size} grain size(s) for "
+                f"{model_albedo.shape[1]} model column(s)"
+            )
+
+        self._windows = self.WINDOWS if windows is None else windows
+        self._bands = self.window_bands(self._windows)
+        # Model with shape (grain sizes, fit bands)
+        self._model = np.ascontiguousarray(model_albedo[self._bands].T)
+        self._model_squared = np.square(self._model)
+
+    @property
+    def grain_sizes(self) -> np.ndarray:
+        return self._grain_sizes
+
+    @property
+    def windows(self) -> list:
+        return self._windows
+
+    @property
+    def bands(self) -> np.ndarray:
+        """
+        :return: Band indices used for the fit
+        """
+        return self._bands
+
+    @staticmethod
+    def window_bands(windows) -> np.ndarray:
+        """
+        :param windows: List of (min, max) wavelengths in nm
+        :return: Sorted band indices within any of the windows
+        """
+        wavelengths = MeasurementFile.BAND_RANGE
+        selected = np.zeros(wavelengths.size, dtype=bool)
+        for min_wavelength, max_wavelength in windows:
+            selected |= (wavelengths >= min_wavelength) & \
+                (wavelengths <= max_wavelength)
+
+        if not selected.any():
+            raise ValueError('No bands within the fit windows')
+
+        return np.flatnonzero(selected)
+
+    @staticmethod
+    def resample(model_albedo, wavelengths) -> np.ndarray:
+        """
+        Linearly interpolate the model to the bands of the ASD.
+
+        :param model_albedo: Modeled albedo with shape (bands, grain sizes)
+        :param wavelengths: Increasing wavelength of each model band in nm
+        :return: Albedo with shape (ASD bands, grain sizes)
+        """
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        if wavelengths.size != model_albedo.shape[0]:
+            raise ValueError(
+                f"Got {wavelengths.size} wavelength(s) for "
+                f"{model_albedo.shape[0]} model band(s)"
+            )
+
+        target = np.clip(
+            MeasurementFile.BAND_RANGE, wavelengths[0], wavelengths[-1]
+        )
+        upper = np.clip(
+            np.searchsorted(wavelengths, target), 1, wavelengths.size - 1
+        )
+        lower = upper - 1
+        weight = (target - wavelengths[lower]) / \
+            (wavelengths[upper] - wavelengths[lower])
+
+        return model_albedo[lower] * (1 - weight[:, np.newaxis]) + \
+            model_albedo[upper] * weight[:, np.newaxis]
+
+    def errors(self, spectra) -> np.ndarray:
+        """
+        Root mean square error of each spectrum for each grain size over the
+        fit bands.
+
+        :param spectra: Measured albedo with shape (spectra, ASD bands)
+        :return: Array with shape (spectra, grain sizes)
+        """
+        measured = np.atleast_2d(spectra)[:, self._bands].astype(np.float64)
+        valid = np.isfinite(measured)
+        measured = np.where(valid, measured, 0)
+        valid = valid.astype(np.float64)
+
+        # Sum over the bands of (measured - model) ** 2 with matrix products
+        squared = np.square(measured).sum(axis=1)[:, np.newaxis] - \
+            2 * measured @ self._model.T + \
+            valid @ self._model_squared.T
+        count = valid.sum(axis=1)[:, np.newaxis]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(np.maximum(squared, 0) / count)
+
+    def retrieve(self, spectra, sub_grid=False) -> dict:
+        """
+        Best fitting grain size for each spectrum.
+
+        :param spectra: Measured albedo with shape (spectra, ASD bands)
+        :param sub_grid: Interpolate between the modeled grain sizes
+                         (Default: False)
+        :return: Dictionary with arrays of one value per spectrum
+            * 'grain_size': Grain size of the best fit
+            * 'index': Column of the best fitting model
+            * 'rmse': Root mean square error of the best fit
+        """
+        spectra = np.atleast_2d(spectra)
+        result = dict(
+            grain_size=np.empty(len(spectra)),
+            index=np.empty(len(spectra), dtype=np.int64),
+            rmse=np.empty(len(spectra)),
+        )
+
+        for start in range(0, len(spectra), self.CHUNK_SPECTRA):
+            rows = slice(start, start + self.CHUNK_SPECTRA)
+            errors = self.errors(spectra[rows])
+            invalid = np.isnan(errors).all(axis=1)
+            index = np.argmin(np.where(np.isnan(errors), np.inf, errors), 1)
+            position = index.astype(np.float64)
+
+            if sub_grid and errors.shape[1] > 2:
+                position += self._parabola_offset(errors, index)
+
+            result['index'][rows] = index
+            result['rmse'][rows] = np.where(
+                invalid, np.nan, errors[np.arange(len(index)), index]
+            )
+            result['grain_size'][rows] = np.where(
+                invalid, np.nan,
+                np.interp(
+                    position, np.arange(self._grain_sizes.size),
+                    self._grain_sizes
+                )
+            )
+
+        return result
+
+    @staticmethod
+    def _parabola_offset(errors, index) -> np.ndarray:
+        """
+        Position of the minimum of a parabola through the mean square errors
+        at the best index and both neighbours, relative to the best index.
+        Best fits at the first or last grain size are not interpolated.
+        """
+        interior = (index > 0) & (index < errors.shape[1] - 1)
+        center = np.clip(index, 1, errors.shape[1] - 2)
+        rows = np.arange(len(index))
+        before = np.square(errors[rows, center - 1])
+        middle = np.square(errors[rows, center])
+        after = np.square(errors[rows, center + 1])
+
+        curvature = before - 2 * middle + after
+        with np.errstate(invalid='ignore', divide='ignore'):
+            offset = 0.5 * (before - after) / curvature
+
+        return np.where(
+            interior & np.isfinite(offset) & (curvature > 0),
+            np.clip(offset, -0.5, 0.5), 0
+        )
+
+
+def read_albedo_files(files) -> np.ndarray:
+    """
+    :param files: List of albedo files saved with MeasurementComposite.save()
+    :return: Array with shape (files, ASD bands)
+    """
+    spectra = np.empty((len(files), MeasurementFile.BAND_COUNT))
+    for row, file in enumerate(files):
+        values = np.loadtxt(file)
+        if values.size != MeasurementFile.BAND_COUNT:
+            raise ValueError(
+                f"File {Path(file).as_posix()} does not contain "
+                f"{MeasurementFile.BAND_COUNT} bands"
+            )
+        spectra[row] = values
+
+    return spectra
+
+
+@click.command(
+    help='Retrieve the snow grain size of albedo results by comparing them '
+         'to modeled albedo for a range of grain sizes.'
+)
+@click.option(
+    '-in', '--input-dir',
+    prompt=True, type=click.Path(exists=True, file_okay=False),
+    help='Path to a directory with albedo results. Sub-directories are '
+         'searched too.',
+)
+@click.option(
+    '-fs', '--file-suffix',
+    default='albedo',
+    help='Suffix of the albedo result files. Default: albedo'
+)
+@click.option(
+    '-m', '--model',
+    prompt=True, type=click.Path(exists=True, dir_okay=False),
+    help='Modeled albedo with one line per band and one column per grain '
+         'size, i.e. albedo.csv from ssa_ice',
+)
+@click.option(
+    '--model-wavelengths',
+    type=click.Path(exists=True, dir_okay=False), default=None,
+    help='File with the wavelength in nm of each model band. '
+         'Default: Model bands match the ASD bands',
+)
+@click.option(
+    '--grain-sizes',
+    type=click.Path(exists=True, dir_okay=False), default=None,
+    help='File with the grain size of each model column. '
+         'Default: Column number',
+)
+@click.option(
+    '-w', '--window', 'windows',
+    type=(float, float), multiple=True,
+    help='Wavelength range in nm to fit. Can be given multiple times. '
+         'Default: 950 1100 and 1150 1300',
+)
+@click.option(
+    '--sub-grid',
+    is_flag=True, default=False,
+    help='Interpolate between the modeled grain sizes.'
+)
+@click.option(
+    '-o', '--output',
+    type=click.Path(dir_okay=False), default=None,
+    help='Path of the CSV file with the results. '
+         'Default: grain_size.csv in the input directory'
+)
+@profile_options
+def cli(input_dir, file_suffix, model, model_wavelengths, grain_sizes,
+        windows, sub_grid, output):
+    try:
+        files = sorted(Path(input_dir).rglob(f"*_{file_suffix}.txt"))
+        if len(files) == 0:
+            raise FileNotFoundError(
+                f"No files ending with _{file_suffix}.txt found"
+            )
+
+        retrieval = GrainSizeRetrieval(
+            np.loadtxt(model, ndmin=2),
+            grain_sizes=None if grain_sizes is None else
+            np.loadtxt(grain_sizes, ndmin=1),
+            wavelengths=None if model_wavelengths is None else
+            np.loadtxt(model_wavelengths, ndmin=1),
+            windows=list(windows) or None,
+        )
+        result = retrieval.retrieve(read_albedo_files(files), sub_grid)
+    except (FileNotFoundError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return
+
+    if output is None:
+        output = Path(input_dir).joinpath('grain_size.csv')
+
+    with open(output, 'w', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['file', 'grain_size', 'index', 'rmse'])
+        for row, file in enumerate(files):
+            writer.writerow([
+                file.relative_to(input_dir).as_posix(),
+                f"{result['grain_size'][row]:.4f}",
+                result['index'][row],
+                f"{result['rmse'][row]:.6f}",
+            ])
+
+    print(
+        f"Retrieved grain size of {len(files)} file(s)\n"
+        f"Results saved to:\n  {Path(output).as_posix()}"
+    )
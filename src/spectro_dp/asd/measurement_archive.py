@@ -0,0 +1,294 @@
+import os
+import posixpath
+import stat
+import tarfile
+import threading
+import zipfile
+from pathlib import Path, PurePath
+
+from . import profiler
+
+
+class MeasurementArchive:
+    """
+    Read ASD measurement files from a zip or tar archive without extracting
+    them.
+
+    Files inside an archive are addressed by the path of the archive joined
+    with the path of the member, e.g. 'session.zip/white-reference/
+    210317_a.000'. The members of an archive are indexed once per process
+    and read straight from the archive into memory. Several members are read
+    in the order they are stored, which avoids seeking back in compressed
+    tar archives.
+
+    Archives are recognized by their file extension, see SUFFIXES.
+    """
+
+    SUFFIXES = [
+        '.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2',
+        '.tar.xz', '.txz',
+    ]
+
+    def __init__(self, path) -> None:
+        """
+        :param path: Path to a zip or tar archive
+        """
+        self._path = Path(path)
+        self._mtime_ns = os.stat(self._path).st_mtime_ns
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+        # Member name to (position in the archive, size, archive info)
+        self._members = {}
+        if zipfile.is_zipfile(self._path):
+            self._zip = zipfile.ZipFile(self._path)
+            self._tar = None
+            infos = [
+                (info.header_offset, info.file_size, info.filename, info)
+                for info in self._zip.infolist() if not info.is_dir()
+            ]
+        else:
+            try:
+                self._tar = tarfile.open(self._path)
+            except tarfile.TarError:
+                raise ValueError(
+                    f"File {self._path.as_posix()} is not a zip or tar "
+                    f"archive"
+                )
+            self._zip = None
+            tar_members = {
+                posixpath.normpath(info.name): info
+                for info in self._tar.getmembers()
+            }
+            infos = []
+            for name, info in tar_members.items():
+                target = self._link_target(name, tar_members)
+                if target is not None and target.isfile():
+                    infos.append((target.offset, target.size, name, target))
+
+        for position, size, name, info in infos:
+            self._members[posixpath.normpath(name)] = (position, size, info)
+
+        # Names of the files in each directory of the archive
+        self._directories = {}
+        for name in self._members:
+            directory, _, file_name = name.rpartition('/')
+            self._directories.setdefault(directory, []).append(file_name)
+            while len(directory) > 0:
+                directory = directory.rpartition('/')[0]
+                self._directories.setdefault(directory, [])
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def mtime_ns(self) -> int:
+        """
+        :return: Modification time of the archive
+        """
+        return self._mtime_ns
+
+    @classmethod
+    def is_archive(cls, path) -> bool:
+        """
+        :param path: Path to a file
+        :return: True when the file extension is one of an archive
+        """
+        name = PurePath(path).name.lower()
+        return any(name.endswith(suffix) for suffix in cls.SUFFIXES)
+
+    @classmethod
+    def open(cls, path) -> 'MeasurementArchive':
+        """
+        Archive of this process for the given path. The archive is indexed
+        again when it was modified. Worker processes open their own archive.
+
+        :param path: Path to a zip or tar archive
+        :return: MeasurementArchive
+        """
+        key = os.path.abspath(path)
+        archive = _archives.get(key)
+        if archive is None or archive._pid != os.getpid() or \
+                archive._mtime_ns != os.stat(path).st_mtime_ns:
+            archive = cls(path)
+            _archives[key] = archive
+
+        return archive
+
+    @classmethod
+    def find(cls, path) -> tuple:
+        """
+        Look up the archive containing the given path.
+
+        :param path: Path to a file or directory
+        :return: Tuple of the MeasurementArchive and the name of the member
+                 or directory inside of it, which is an empty string for the
+                 archive itself. None for paths outside of archives.
+        """
+        path = os.fspath(path)
+        parent = path
+        # Existing files and directories take a single lookup
+        while True:
+            try:
+                mode = os.stat(parent).st_mode
+                break
+            except OSError:
+                head = os.path.dirname(parent)
+                if head == parent:
+                    return None
+                parent = head
+
+        if not stat.S_ISREG(mode) or not cls.is_archive(parent):
+            return None
+
+        name = path[len(parent):].lstrip(os.sep)
+        return cls.open(parent), PurePath(name).as_posix() if name else ''
+
+    def is_dir(self, directory) -> bool:
+        """
+        :param directory: Name of a directory in the archive
+        :return: True when the archive contains the directory
+        """
+        return directory in self._directories
+
+    def file_names(self, directory='') -> list:
+        """
+        :param directory: Name of a directory in the archive
+                          (Default: Top level of the archive)
+        :return: List with the names of all files in the directory
+        """
+        return list(self._directories.get(directory, []))
+
+    def size(self, name) -> int:
+        """
+        :param name: Name of a member
+        :return: Size of the member in bytes
+        """
+        return self._member(name)[1]
+
+    def read(self, names, size=None) -> list:
+        """
+        Read members in the order they are stored in the archive.
+
+        :param names: Names of the members
+        :param size: Read at most this number of bytes of each member
+                     (Default: All bytes)
+        :return: List with the bytes of each member in the order of the
+                 names
+        """
+        members = [self._member(name) for name in names]
+        contents = [None] * len(members)
+        order = sorted(
+            range(len(members)), key=lambda index: members[index][0]
+        )
+
+        with self._lock:
+            for index in order:
+                _position, member_size, info = members[index]
+                if self._zip is not None:
+                    infile = self._zip.open(info)
+                else:
+                    infile = self._tar.extractfile(info)
+                with infile:
+                    contents[index] = infile.read(
+                        member_size if size is None else size
+                    )
+                if size is None:
+                    profiler.count('files_read')
+                profiler.count('bytes_read', len(contents[index]))
+
+        return contents
+
+    @staticmethod
+    def _link_target(name, tar_members):
+        """
+        Follow hard and symbolic links between members of a tar archive,
+        which are stored without data.
+
+        :param name: Normalized name of a member
+        :param tar_members: Dictionary of all normalized names to TarInfo
+        :return: TarInfo with the data or None for links that point outside
+                 of the archive
+        """
+        info = tar_members[name]
+        for _ in range(len(tar_members)):
+            if info.islnk():
+                name = posixpath.normpath(info.linkname)
+            elif info.issym():
+                name = posixpath.normpath(posixpath.join(
+                    posixpath.dirname(name), info.linkname
+                ))
+            else:
+                return info
+
+            info = tar_members.get(name)
+            if info is None:
+                return None
+
+        # Links in a cycle
+        return None
+
+    def _member(self, name) -> tuple:
+        try:
+            return self._members[name]
+        except KeyError:
+            raise FileNotFoundError(
+                f"No file {name} in archive {self._path.as_posix()}"
+            )
+
+
+# Archives of this process for MeasurementArchive.open()
+_archives = {}
+
+# Errors of file system calls for files inside of an archive
+MISSING_FILE_ERRORS = (FileNotFoundError, NotADirectoryError)
+
+
+def read_members(files, size=None) -> list:
+    """
+    Read files inside of archives. The files of each archive are read in the
+    order they are stored.
+
+    :param files: List of paths to files inside of archives
+    :param size: Read at most this number of bytes of each file
+                 (Default: All bytes)
+    :return: List with the bytes of each file
+    """
+    archives = {}
+    for index, file in enumerate(files):
+        member = MeasurementArchive.find(file)
+        if member is None:
+            raise FileNotFoundError(
+                f"No such file: {PurePath(file).as_posix()}"
+            )
+        archives.setdefault(member[0], []).append((index, member[1]))
+
+    contents = [None] * len(files)
+    for archive, members in archives.items():
+        for (index, _name), content in zip(
+            members, archive.read([name for _index, name in members], size)
+        ):
+            contents[index] = content
+
+    return contents
+
+
+def file_state(file) -> tuple:
+    """
+    Size and modification time of a file, also of files inside an archive,
+    which have the modification time of the archive.
+
+    :param file: Path to a file
+    :return: Tuple of size in bytes and modification time in nanoseconds
+    """
+    try:
+        status = os.stat(file)
+    except MISSING_FILE_ERRORS:
+        member = MeasurementArchive.find(file)
+        if member is None:
+            raise
+        archive, name = member
+        return archive.size(name), archive.mtime_ns
+
+    return status.st_size, status.st_mtime_ns
@@ -1,9 +1,18 @@
+import csv
+import os
 from pathlib import Path
-from typing import Iterable
 
 import numpy as np
 
+from . import profiler
+from .measurement_archive import MeasurementArchive, file_state
 from .measurement_file import MeasurementFile
+from .measurement_header import MeasurementHeader
+from .measurement_index import MeasurementIndex
+from .measurement_stack import MeasurementStack
+from .resampling import BandResampler
+from .running_statistics import RunningStatistics
+from .splice_correction import SpliceCorrection
 
 
 class MeasurementComposite:
@@ -22,8 +31,6 @@ class MeasurementComposite:
     SECOND_SET_INDEX = 10
     SET_COUNT = 10
 
-    FILE_GLOB = '{file_prefix}*.{file_number:03d}'
-
     def __init__(self,
                  input_dir,
                  file_prefix,
@@ -31,7 +38,8 @@ class MeasurementComposite:
                  set_2_index=SECOND_SET_INDEX,
                  **kwargs) -> None:
         """
-        :param input_dir: Directory with all the measurements
+        :param input_dir: Directory with all the measurements or a zip or
+                          tar archive of it
         :param file_prefix: Naming prefix for the input files
         :param set_1_index: File number of the first set of measurements
                             (Default: 0)
@@ -42,6 +50,24 @@ class MeasurementComposite:
             set_1_count: Number of first set measurements (Default: 10)
             set_2_count: Number of second set measurements (Default: 10)
             debug: Print processing progress
+            index_cache: Store the index of the files in a cache file inside
+                         the input directories (Default: False)
+            robust_mean: Average the sets with an outlier resistant method,
+                         either 'sigma_clip' or 'median' (Default: None)
+            sigma: Number of standard deviations to keep values for the
+                   'sigma_clip' robust mean (Default: 3)
+            splice_correction: Correct the steps at the detector splices,
+                               either 'multiplicative', 'additive' or None
+                               to skip (Default: multiplicative)
+            splice_per_file: Correct each file before averaging instead of
+                             the averaged sets (Default: False)
+            read_workers: Number of files read at the same time, i.e. on
+                          network drives (Default: 1)
+            set_cache: SetCache to store and reuse the averaged sets
+                       (Default: None)
+            quality_screen: QualityScreen to exclude flagged files from the
+                            averages. Each set is screened as one group.
+                            Only used with calculate(). (Default: None)
         """
         self._input_dir = Path(input_dir)
         self._file_prefix = file_prefix
@@ -52,11 +78,50 @@ class MeasurementComposite:
         self._set_2_prefix = kwargs.get('set_2_prefix', '')
 
         self._debug = kwargs.get('debug', False)
+        self._index_cache = kwargs.get('index_cache', False)
+        self._indexes = {}
+
+        self._robust_mean = kwargs.get('robust_mean', None)
+        self._sigma = kwargs.get('sigma', 3.0)
+        if self._robust_mean not in [None] + RunningStatistics.ROBUST_METHODS:
+            raise ValueError(
+                f"Unknown robust mean method '{self._robust_mean}'"
+            )
+
+        self._splice_mode = kwargs.get(
+            'splice_correction', SpliceCorrection.MODES[0]
+        )
+        self._splice_per_file = kwargs.get('splice_per_file', False)
+        if self._splice_mode not in [None] + SpliceCorrection.MODES:
+            raise ValueError(
+                f"Unknown splice correction '{self._splice_mode}'"
+            )
+        # Created from the header of the first file of each set
+        self._splice_corrections = [None, None]
+
+        self._read_workers = kwargs.get(
+            'read_workers', MeasurementStack.READ_WORKERS
+        )
+        self._set_cache = kwargs.get('set_cache', None)
+        self._quality_screen = kwargs.get('quality_screen', None)
+        self._quality_tables = [None, None]
 
         self._set_1 = np.zeros(MeasurementFile.BAND_COUNT, dtype=np.float32)
         self._set_2 = np.zeros(MeasurementFile.BAND_COUNT, dtype=np.float32)
         self._result = None
 
+        self._set_statistics = [RunningStatistics(), RunningStatistics()]
+        # Statistics with the splice correction of the averaged sets
+        self._spliced_statistics = [None, None]
+        self._set_files = [[], []]
+
+        # State for incremental updates with update()
+        self._folded_files = set()
+        self._set_sums = [
+            np.zeros(MeasurementFile.BAND_COUNT, dtype=np.float32),
+            np.zeros(MeasurementFile.BAND_COUNT, dtype=np.float32),
+        ]
+
     @property
     def input_dir(self) -> Path:
         """
@@ -66,6 +131,60 @@ class MeasurementComposite:
         """
         return self._input_dir
 
+    @property
+    def output_dir(self) -> Path:
+        """
+        Directory for the saved results, which is the input directory or the
+        directory of the input archive.
+
+        :return: Path object with the directory
+        """
+        if MeasurementArchive.is_archive(self._input_dir) and \
+                self._input_dir.is_file():
+            return self._input_dir.parent
+
+        return self._input_dir
+
+    @property
+    def file_prefix(self) -> str:
+        return self._file_prefix
+
+    @property
+    def set_1_files(self) -> list:
+        """
+        Files read for the set_1 measurements
+
+        :return: List of file paths
+        """
+        return self._set_files[0]
+
+    @property
+    def set_2_files(self) -> list:
+        """
+        Files read for the set_2 measurements
+
+        :return: List of file paths
+        """
+        return self._set_files[1]
+
+    @property
+    def set_1_quality(self) -> np.ndarray:
+        """
+        :return: Table of the quality screen with one row per file of
+                 set_1_files before excluding flagged files, or None without
+                 a quality screen
+        """
+        return self._quality_tables[0]
+
+    @property
+    def set_2_quality(self) -> np.ndarray:
+        """
+        :return: Table of the quality screen with one row per file of
+                 set_2_files before excluding flagged files, or None without
+                 a quality screen
+        """
+        return self._quality_tables[1]
+
     @property
     def set_1(self) -> np.ndarray:
         """
@@ -84,6 +203,44 @@ class MeasurementComposite:
         """
         return self._set_2
 
+    @property
+    def set_1_statistics(self) -> RunningStatistics:
+        """
+        Per band statistics of the set_1 measurements, with the same splice
+        correction as set_1
+
+        :return: RunningStatistics with count, mean, variance, min and max
+        """
+        return self._statistics(0)
+
+    @property
+    def set_2_statistics(self) -> RunningStatistics:
+        """
+        Per band statistics of the set_2 measurements, with the same splice
+        correction as set_2
+
+        :return: RunningStatistics with count, mean, variance, min and max
+        """
+        return self._statistics(1)
+
+    @property
+    def set_1_std(self) -> np.ndarray:
+        """
+        Standard deviation of set_1 measurements per band
+
+        :return: Array indexed by band
+        """
+        return self.set_1_statistics.std
+
+    @property
+    def set_2_std(self) -> np.ndarray:
+        """
+        Standard deviation of set_2 measurements per band
+
+        :return: Array indexed by band
+        """
+        return self.set_2_statistics.std
+
     @property
     def result(self) -> np.ndarray:
         """
@@ -96,7 +253,8 @@ class MeasurementComposite:
     def save(self, file_suffix) -> str:
         """
         Save the result as .txt file with the given suffix. The file will be
-        stored in the initialized input directory along with the input files.
+        stored in the initialized input directory along with the input files,
+        or next to the input archive.
         Each entry will have four decimal point precision.
 
         This method requires the results to be calculated first.
@@ -105,10 +263,11 @@ class MeasurementComposite:
         :return Full path of saved file
         """
         if self.result is not None:
-            outfile = self.input_dir.joinpath(
+            outfile = self.output_dir.joinpath(
                 f"{self._file_prefix}_{file_suffix}.txt"
             ).as_posix()
-            np.savetxt(outfile, self.result, fmt='%.4f')
+            with profiler.stage('save'):
+                np.savetxt(outfile, self.result, fmt='%.4f')
             return outfile
         else:
             print(
@@ -116,10 +275,96 @@ class MeasurementComposite:
             )
             return ''
 
+    def save_statistics(self, file_suffix) -> str:
+        """
+        Save the per band statistics of both sets as .txt file with the
+        given suffix, followed by '_statistics'. The file will be stored in
+        the output directory (see output_dir).
+
+        Columns are the wavelength and the mean, standard deviation, minimum
+        and maximum of set_1 followed by the same values for set_2. The
+        statistics include the splice correction of the sets.
+
+        This method requires the results to be calculated first.
+
+        :param file_suffix: Name to use as a file name suffix
+        :return Full path of saved file
+        """
+        if self.result is not None:
+            outfile = self.output_dir.joinpath(
+                f"{self._file_prefix}_{file_suffix}_statistics.txt"
+            ).as_posix()
+            columns = [MeasurementFile.BAND_RANGE]
+            header = ['wavelength']
+            for name, statistics in [
+                ('set_1', self.set_1_statistics),
+                ('set_2', self.set_2_statistics),
+            ]:
+                columns += [
+                    statistics.mean, statistics.std,
+                    statistics.min, statistics.max,
+                ]
+                header += [
+                    f"{name}_{value}"
+                    for value in ['mean', 'std', 'min', 'max']
+                ]
+            with profiler.stage('save'):
+                np.savetxt(
+                    outfile, np.column_stack(columns),
+                    fmt='%.4f', header=' '.join(header)
+                )
+            return outfile
+        else:
+            print(
+                "ERROR: No results calculated. Did you run calculate() first?"
+            )
+            return ''
+
+    def save_resampled(self, file_suffix, sensor) -> str:
+        """
+        Save the sets and result resampled to the bands of another sensor as
+        .csv file with the given suffix, followed by the sensor name. The
+        file will be stored in the output directory (see output_dir).
+
+        Columns are the band name and center wavelength, the resampled sets
+        and the resampled result (see BandResampler.resample_composite()).
+
+        This method requires the results to be calculated first.
+
+        :param file_suffix: Name to use as a file name suffix
+        :param sensor: Name of a sensor in BandResampler.SENSORS or path to a
+                       spectral response table
+        :return Full path of saved file
+        """
+        if self.result is None:
+            print(
+                "ERROR: No results calculated. Did you run calculate() first?"
+            )
+            return ''
+
+        resampler = BandResampler.load(sensor)
+        resampled = resampler.resample_composite(self)
+
+        outfile = self.output_dir.joinpath(
+            f"{self._file_prefix}_{file_suffix}_{Path(sensor).stem}.csv"
+        ).as_posix()
+        with open(outfile, 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(['band', 'center', 'set_1', 'set_2', 'result'])
+            for band, name in enumerate(resampler.band_names):
+                writer.writerow([
+                    name, f"{resampler.centers[band]:.1f}",
+                    f"{resampled['set_1'][band]:.4f}",
+                    f"{resampled['set_2'][band]:.4f}",
+                    f"{resampled['result'][band]:.4f}",
+                ])
+
+        return outfile
+
     def calculate(self) -> np.array:
         """
         Calculate the ratio of set_1 versus set_2 measurement values.
-        The ratio will be corrected by the detector split spike.
+        The sets are corrected for the steps at the detector splices.
 
         result = set_1 / set_2
 
@@ -132,25 +377,161 @@ class MeasurementComposite:
             self._set_2_index, self._set_2_count, True
         )
 
+        self._calculate_result()
+
+    @property
+    def complete(self) -> bool:
+        """
+        Indicate whether update() has read all files of both sets.
+
+        :return: True when all set_1 and set_2 files were read
+        """
+        return [statistics.count for statistics in self._set_statistics] == \
+            [self._set_1_count, self._set_2_count]
+
+    def update(self) -> bool:
+        """
+        Incrementally calculate the result while the measurement files are
+        still being written. Each call adds the files that appeared since the
+        last call to the averages of the sets. Files are only read once.
+        Files that are not completely written yet are skipped and checked
+        again with the next call.
+
+        Sets are averaged with the arithmetic mean, an optional robust mean
+        requires all files and is only used with calculate().
+
+        The result is recalculated once both sets have at least one file.
+
+        :return: True if the result was recalculated
+        """
+        # Rescan the directories to find new files
+        self._indexes.clear()
+        updated = False
+
+        sets = [
+            (self._set_1_index, self._set_1_count),
+            (self._set_2_index, self._set_2_count),
+        ]
+        for set_number, (start_index, file_count) in enumerate(sets):
+            files = []
+            for file in self._file_glob(
+                start_index, set_number == 1, file_count
+            ):
+                if file in self._folded_files:
+                    continue
+                if file_state(file)[0] < MeasurementFile.FILE_BYTES:
+                    self._print_progress(f"  Incomplete: {file.as_posix()}")
+                    continue
+
+                self._print_progress(
+                    f"Adding to set-{set_number + 1}:\n  - {file.as_posix()}"
+                )
+                files.append(file)
+
+            if len(files) == 0:
+                continue
+
+            stack = MeasurementStack(files, self._read_workers)
+            correction = self._splice_correction(set_number, files[0])
+            if correction is not None and self._splice_per_file:
+                correction.apply(stack.data)
+
+            for file, data in zip(files, stack.data):
+                self._set_sums[set_number] += data
+                self._set_statistics[set_number].add(data)
+                self._set_files[set_number].append(file)
+                self._folded_files.add(file)
+            updated = True
+
+        if not updated or \
+                0 in [statistics.count for statistics in self._set_statistics]:
+            return False
+
+        self._set_1 = self._set_sums[0] / self._set_statistics[0].count
+        self._set_2 = self._set_sums[1] / self._set_statistics[1].count
+        self._calculate_result()
+
+        return True
+
+    def _calculate_result(self) -> None:
         self._print_progress("Calculating: set-1 / set-2")
 
-        # Fix the spike for each set to also reflect this when using the
-        # sets individually in plots
-        self._result = self._adjust_detector_split(self._set_1)
-        self._result = self._adjust_detector_split(self._set_2)
+        # Fix the steps for each set to also reflect this when using the
+        # sets individually in plots. The statistics get the same correction
+        # as the averages, while the running statistics are kept to add the
+        # spectra of later updates.
+        if not self._splice_per_file:
+            with profiler.stage('splice'):
+                for set_number, (set_data, correction) in enumerate(zip(
+                    [self._set_1, self._set_2], self._splice_corrections
+                )):
+                    if correction is None:
+                        continue
+                    scale, offset = correction.adjustment(set_data)
+                    correction.apply(set_data)
+                    self._spliced_statistics[set_number] = \
+                        self._set_statistics[set_number].transformed(
+                            scale, offset
+                        )
+
         self._result = (self._set_1 / self._set_2)
 
-    def _file_glob(self, file_index, set_2=False) -> Iterable[Path]:
+    def _statistics(self, set_number) -> RunningStatistics:
+        if self._spliced_statistics[set_number] is not None:
+            return self._spliced_statistics[set_number]
+        return self._set_statistics[set_number]
+
+    def _splice_correction(self, set_number, file) -> SpliceCorrection:
+        """
+        Correction of the detector splices for a set, created once from the
+        header of the first read file of the set.
+
+        :param set_number: 0 for the first and 1 for the second set
+        :param file: Path to a file of the set
+        :return: SpliceCorrection or None when the correction is disabled
+        """
+        if self._splice_mode is None:
+            return None
+
+        if self._splice_corrections[set_number] is None:
+            self._splice_corrections[set_number] = \
+                SpliceCorrection.from_header(
+                    MeasurementHeader.read([file])[0], mode=self._splice_mode
+                )
+
+        return self._splice_corrections[set_number]
+
+    def _file_glob(self, file_index, set_2=False, count=1) -> list:
+        """
+        Find the files for a range of file numbers. Files are matched with
+        the pattern: '{file_prefix}*.{file_number:03d}'
+
+        :param file_index: First file number
+        :param set_2: Boolean indicator for first or second set. Triggers
+                      a potential different handling for the file name.
+        :param count: Number of file numbers to find (Default: 1)
+        :return: List of file paths
+        """
         if set_2 and len(self._set_2_prefix) > 0:
             file_prefix = self._set_2_prefix + self._file_prefix
         else:
             file_prefix = self._file_prefix
 
-        file_glob = self.FILE_GLOB.format(
-            file_prefix=file_prefix,
-            file_number=file_index
-        )
-        return self.input_dir.glob(file_glob)
+        # Prefixes can contain a sub-directory, e.g.: white-reference/
+        directory, file_prefix = os.path.split(file_prefix)
+        directory = self.input_dir.joinpath(directory)
+
+        with profiler.stage('glob'):
+            if directory not in self._indexes:
+                if not MeasurementIndex.exists(directory):
+                    return []
+                self._indexes[directory] = MeasurementIndex(
+                    directory, cache=self._index_cache
+                )
+
+            return self._indexes[directory].files(
+                file_prefix, file_index, count
+            )
 
     def _average_set(self, start_index, file_count, set_2=False) -> np.ndarray:
         """
@@ -162,24 +543,117 @@ class MeasurementComposite:
                       a potential different handling for the file name.
         :return: Array with averages for each band
         """
-        measurements = np.zeros(MeasurementFile.BAND_COUNT, dtype=np.float32)
-        read_count = 0
+        files = self._file_glob(start_index, set_2, file_count)
 
-        for file_number in range(start_index, start_index + file_count):
-            for file in self._file_glob(file_number, set_2):
-                self._print_progress(f"  - {file.as_posix()}")
-                measurements += MeasurementFile(file).data
-                read_count += 1
+        for file in files:
+            self._print_progress(f"  - {file.as_posix()}")
 
-        if measurements.sum() == 0:
+        if len(files) == 0:
             raise FileNotFoundError('No input files found to average.')
-        elif read_count != file_count:
+        elif len(files) != file_count:
             print(
-                f'Warning: Only read {read_count} input file(s), but '
+                f'Warning: Only read {len(files)} input file(s), but '
                 f'{file_count} file(s) were set to be read'
             )
 
-        return measurements / read_count
+        set_number = 1 if set_2 else 0
+        self._set_files[set_number] = files
+        correction = self._splice_correction(set_number, files[0])
+
+        cache_key = None
+        if self._set_cache is not None:
+            cache_key = self._set_cache.key(
+                files,
+                robust_mean=self._robust_mean,
+                sigma=self._sigma,
+                splice_correction=self._splice_mode
+                if self._splice_per_file else None,
+                quality_screen=None if self._quality_screen is None
+                else self._quality_screen.settings(),
+            )
+            cached = self._set_cache.get(cache_key)
+            if cached is not None:
+                profiler.count('set_cache_hits')
+                self._print_progress("  Read average from cache")
+                self._set_statistics[set_number] = \
+                    RunningStatistics.from_state(cached)
+                self._quality_tables[set_number] = cached.get('quality')
+                return cached['average']
+            profiler.count('set_cache_misses')
+
+        stack = MeasurementStack(files, self._read_workers)
+        # Read before the stages below, which time the processing only
+        data = stack.data
+        quality = {}
+        if self._quality_screen is not None:
+            data = self._screen_set(set_number, files, data)
+            quality['quality'] = self._quality_tables[set_number]
+
+        if correction is not None and self._splice_per_file:
+            with profiler.stage('splice'):
+                correction.apply(data)
+
+        with profiler.stage('average'):
+            statistics = RunningStatistics()
+            statistics.add_stack(data)
+            self._set_statistics[set_number] = statistics
+
+            if self._robust_mean is None:
+                average = data.mean(axis=0)
+            else:
+                average = statistics.robust_mean(
+                    data, self._robust_mean, self._sigma
+                ).astype(MeasurementFile.DATA_TYPE)
+
+        if cache_key is not None:
+            self._set_cache.put(
+                cache_key, average=average, **statistics.state(), **quality
+            )
+
+        return average
+
+    def _screen_set(self, set_number, files, data) -> np.ndarray:
+        """
+        Screen the files of a set and remove the flagged ones.
+
+        The set is the group the files are compared to. Checks of the whole
+        group (QualityScreen.GROUP_CHECKS), i.e. the drift across the set,
+        flag all files alike and are only printed as a warning.
+
+        :param set_number: 0 for the first and 1 for the second set
+        :param files: Files of the set
+        :param data: Spectra of the files
+        :return: Spectra of the files that passed the screen
+        """
+        with profiler.stage('screen'):
+            table = self._quality_screen.screen(data)
+        self._quality_tables[set_number] = table
+
+        group_mask = np.uint8(
+            self._quality_screen.mask(self._quality_screen.GROUP_CHECKS)
+        )
+        group_flags = np.bitwise_or.reduce(table['flags'] & group_mask)
+        if group_flags != 0:
+            print(
+                f"Warning: Set-{set_number + 1} failed: "
+                f"{', '.join(self._quality_screen.reasons(group_flags))}"
+            )
+
+        file_flags = table['flags'] & ~group_mask
+        passed = file_flags == 0
+        for file, flags in zip(files, file_flags):
+            if flags != 0:
+                print(
+                    f"Warning: Excluded {file.as_posix()}, failed: "
+                    f"{', '.join(self._quality_screen.reasons(flags))}"
+                )
+        if not passed.any():
+            raise ValueError(
+                f"All files of set-{set_number + 1} failed the quality "
+                f"screen."
+            )
+
+        return data if passed.all() else data[passed]
 
     def _print_progress(self, message) -> None:
         """
@@ -202,6 +676,6 @@ class MeasurementComposite:
         :param band: Band number to use for spike adjustment. (Default: 650)
         :return: Spike adjust measurement for the first 650 bands
         """
-        band_ratio = measurement[band + 1] / measurement[band]
-        measurement[0:band + 1] *= band_ratio
-        return measurement
+        return SpliceCorrection(
+            [MeasurementFile.BAND_RANGE[band]]
+        ).apply(measurement)
@@ -1,20 +1,39 @@
+import os
 from pathlib import PurePath
 
 import numpy as np
 
+from . import profiler
+from .measurement_archive import MISSING_FILE_ERRORS, MeasurementArchive
+from .measurement_header import MeasurementHeader
+from .spectrum_cache import shared_spectrum_cache
+
 
 class MeasurementFile:
     """
     Manage output file of one measurement with the ASD field spectrometer.
 
     Each band has a measurement recorded as a digital number (DN)
+
+    The data can optionally be accessed as a read-only memory map of the file,
+    which only reads the bands from disk that are accessed.
+
+    Read data is kept in the process wide spectrum cache (see
+    shared_spectrum_cache()) and is read-only, so other instances for the
+    same unchanged file do not read it again.
+
+    Files can also be inside a zip or tar archive, e.g.
+    'session.zip/210317_a.000' (see MeasurementArchive). Their data is always
+    read into memory.
     """
 
-    HEADER_BYTES = 484
+    HEADER_BYTES = MeasurementHeader.BYTES
     HEADER_DECODE = 'ISO-8859-1'
     NULL_BYTE = '\x00'
 
     BAND_COUNT = 2151
+    DATA_TYPE = np.float32
+    FILE_BYTES = HEADER_BYTES + BAND_COUNT * np.dtype(DATA_TYPE).itemsize
 
     MIN_WAVELENGTH = 350  # in micro-meter
     MAX_WAVELENGTH = 2500  # in micro-meter
@@ -23,37 +42,145 @@ class MeasurementFile:
     X_LABEL = r'Wavelength $\mu m$'
     Y_LABEL = 'DN'
 
-    def __init__(self, filepath) -> None:
+    def __init__(self, filepath, mmap=False) -> None:
+        """
+        :param filepath: Path to the measurement file
+        :param mmap: Access the data as read-only memory map instead of
+                     reading all bands into memory. (Default: False)
+        """
         self._filepath = PurePath(filepath)
+        self._mmap = mmap
+        self._header_bytes = None
         self._header = None
+        self._header_record = None
         self._data = None
 
     @property
     def file(self) -> PurePath:
         return self._filepath
 
+    @property
+    def mmap(self) -> bool:
+        return self._mmap
+
     @property
     def header(self) -> bytes:
         if self._header is None:
-            self._header = self._read_header()
+            self._header = self._read_header().decode(
+                self.HEADER_DECODE
+            ).split(self.NULL_BYTE, 1)[0]
 
         return self._header
 
+    @property
+    def header_record(self) -> np.record:
+        """
+        All fields of the binary header
+
+        :return: Record with the fields of MeasurementHeader.DTYPE
+        """
+        if self._header_record is None:
+            self._header_record = MeasurementHeader.from_bytes(
+                self._read_header()
+            )[0]
+
+        return self._header_record
+
+    @property
+    def acquisition_time(self) -> np.datetime64:
+        return MeasurementHeader.acquisition_time(self.header_record)
+
     @property
     def data(self) -> np.array:
         if self._data is None:
-            self._data = np.fromfile(
+            if self.mmap and os.path.isfile(self.file):
+                self._check_size(os.stat(self.file).st_size)
+                self._data = np.memmap(
+                    self.file.as_posix(),
+                    mode='r',
+                    offset=self.HEADER_BYTES,
+                    shape=(self.BAND_COUNT,),
+                    dtype=self.DATA_TYPE,
+                )
+            else:
+                self._data = self._read_data()
+
+        return self._data
+
+    def _read_data(self) -> np.ndarray:
+        """
+        Read all bands, or take them from the process wide spectrum cache
+        when the file did not change since it was last read.
+
+        :return: Array with the data of each band
+        """
+        cache = shared_spectrum_cache()
+        key = cache.key(self.file) if cache.enabled else None
+        if key is not None:
+            data = cache.get(key)
+            if data is not None:
+                return data
+
+        try:
+            data = np.fromfile(
                 self.file.as_posix(),
                 offset=self.HEADER_BYTES,
-                dtype=np.float32
+                dtype=self.DATA_TYPE
+            )
+        except MISSING_FILE_ERRORS:
+            content = self._read_member()
+            if content is None:
+                raise
+            self._check_size(len(content))
+            data = np.frombuffer(
+                content, offset=self.HEADER_BYTES, dtype=self.DATA_TYPE
+            )
+        else:
+            self._check_size(self.HEADER_BYTES + data.nbytes)
+            profiler.count('files_read')
+            profiler.count('bytes_read', data.nbytes)
+
+        if key is not None:
+            data = cache.put(key, data)
+
+        return data
+
+    def _check_size(self, file_bytes) -> None:
+        """
+        Check for expected number of bands
+
+        :param file_bytes: Size of the file in bytes
+        """
+        if file_bytes != self.FILE_BYTES:
+            raise ValueError(
+                f"File {self.file.as_posix()} does not contain "
+                f"{self.BAND_COUNT} bands"
             )
 
-            # Check for expected number of bands
-            assert self._data.size == self.BAND_COUNT
-
-        return self._data
-
-    def _read_header(self) -> str:
-        with open(self.file, 'rb') as infile:
-            header = infile.read(self.HEADER_BYTES)
-        return header.decode(self.HEADER_DECODE).split(self.NULL_BYTE, 1)[0]
+    def _read_header(self) -> bytes:
+        if self._header_bytes is None:
+            try:
+                with open(self.file, 'rb') as infile:
+                    self._header_bytes = infile.read(self.HEADER_BYTES)
+                profiler.count('bytes_read', len(self._header_bytes))
+            except MISSING_FILE_ERRORS:
+                self._header_bytes = self._read_member(self.HEADER_BYTES)
+                if self._header_bytes is None:
+                    raise
+
+        return self._header_bytes
+
+    def _read_member(self, size=None) -> bytes:
+        """
+        Read the file from a zip or tar archive.
+
+        :param size: Read at most this number of bytes (Default: All bytes)
+        :return: Bytes of the file or None when the file is not inside of an
+                 archive
+        """
+        member = MeasurementArchive.find(self.file)
+        if member is None:
+            return None
+
+        archive, name = member
+        return archive.read([name], size)[0]
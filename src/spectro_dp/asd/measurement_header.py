@@ -0,0 +1,159 @@
+from pathlib import PurePath
+
+import numpy as np
+
+from . import profiler
+from .measurement_archive import MISSING_FILE_ERRORS, read_members
+
+
+class MeasurementHeader:
+    """
+    Parse the binary header of ASD measurement files.
+
+    The 484 byte header is described with a NumPy structured data type,
+    which allows to read the headers of many files into one record array and
+    access each field as a column.
+
+    Field layout follows the ASD file format specification. Fields not used
+    for processing, like the application data block, are skipped.
+    """
+
+    BYTES = 484
+
+    DTYPE = np.dtype(dict(
+        names=[
+            'signature', 'comments', 'when',
+            'program_version', 'file_version', 'dc_corrected', 'dc_time',
+            'data_type', 'reference_time',
+            'channel_1_wavelength', 'wavelength_step', 'data_format',
+            'channels',
+            'gps_heading', 'gps_speed',
+            'gps_latitude', 'gps_longitude', 'gps_altitude',
+            'gps_timestamp',
+            'integration_time', 'fo', 'dcc', 'calibration',
+            'instrument_number',
+            'y_min', 'y_max', 'x_min', 'x_max', 'bits',
+            'dc_count', 'reference_count', 'sample_count', 'instrument',
+            'swir1_gain', 'swir2_gain', 'swir1_offset', 'swir2_offset',
+            'splice1_wavelength', 'splice2_wavelength',
+        ],
+        formats=[
+            'S3', 'S157', ('<i2', (9,)),
+            'u1', 'u1', 'u1', '<i4',
+            'u1', '<i4',
+            '<f4', '<f4', 'u1',
+            '<u2',
+            '<f8', '<f8',
+            '<f8', '<f8', '<f8',
+            '<i4',
+            '<u4', '<i2', '<i2', '<u2',
+            '<u2',
+            '<f4', '<f4', '<f4', '<f4', '<u2',
+            '<u2', '<u2', '<u2', 'u1',
+            '<u2', '<u2', '<u2', '<u2',
+            '<f4', '<f4',
+        ],
+        offsets=[
+            0, 3, 160,
+            178, 179, 181, 182,
+            186, 187,
+            191, 195, 199,
+            204,
+            334, 342,
+            350, 358, 366,
+            377,
+            390, 394, 396, 398,
+            400,
+            402, 406, 410, 414, 418,
+            425, 427, 429, 431,
+            436, 438, 440, 442,
+            444, 448,
+        ],
+        itemsize=BYTES,
+    ))
+
+    DATA_TYPES = {
+        0: 'raw',
+        1: 'reflectance',
+        2: 'radiance',
+        3: 'no units',
+        4: 'irradiance',
+        5: 'quality index',
+        6: 'transmittance',
+        7: 'unknown',
+        8: 'absorbance',
+    }
+
+    @classmethod
+    def read(cls, files) -> np.ndarray:
+        """
+        Read the headers of all given files into one record array. Files
+        can also be inside of archives, see MeasurementArchive.
+
+        :param files: List of paths to ASD measurement files
+        :return: Structured array with one record per file
+        """
+        headers = np.zeros((len(files), cls.BYTES), dtype=np.uint8)
+        # Files inside of archives, which are read together
+        members = []
+
+        for index, (row, file) in enumerate(zip(headers, files)):
+            try:
+                with open(file, 'rb') as infile:
+                    read_bytes = infile.readinto(row)
+            except MISSING_FILE_ERRORS:
+                members.append(index)
+                continue
+
+            cls._check_size(file, read_bytes)
+            profiler.count('bytes_read', read_bytes)
+
+        if len(members) > 0:
+            for index, content in zip(members, read_members(
+                [files[index] for index in members], cls.BYTES
+            )):
+                cls._check_size(files[index], len(content))
+                headers[index] = np.frombuffer(content, dtype=np.uint8)
+
+        return cls.from_bytes(headers)
+
+    @classmethod
+    def _check_size(cls, file, read_bytes) -> None:
+        if read_bytes != cls.BYTES:
+            raise ValueError(
+                f"File {PurePath(file).as_posix()} is missing a complete "
+                f"header"
+            )
+
+    @classmethod
+    def from_bytes(cls, headers) -> np.ndarray:
+        """
+        Parse raw header bytes.
+
+        :param headers: Bytes of one header or array of shape (files, 484)
+        :return: Structured array with one record per header
+        """
+        headers = np.frombuffer(headers, dtype=np.uint8) \
+            if isinstance(headers, bytes) else headers
+
+        return np.ascontiguousarray(headers).view(cls.DTYPE).reshape(-1)
+
+    @staticmethod
+    def acquisition_time(headers) -> np.ndarray:
+        """
+        Convert the recorded acquisition time of the headers to date times.
+        The time is stored as C 'tm' structure in the time zone of the
+        instrument computer, with months starting at zero and years since 1900.
+
+        :param headers: Structured array from read() or a single record
+        :return: Array of type datetime64[s], or a single value for a record
+        """
+        when = headers['when'].astype(np.int64)
+        seconds, minutes, hours, day, month, year = when[..., :6].T
+
+        date = (year + 1900 - 1970).astype('datetime64[Y]')
+        date = date.astype('datetime64[M]') + month
+        date = date.astype('datetime64[D]') + (day - 1)
+
+        return date.astype('datetime64[s]') + \
+            (hours * 3600 + minutes * 60 + seconds)
@@ -0,0 +1,197 @@
+import json
+import os
+from bisect import bisect_left
+from pathlib import Path
+
+from .measurement_archive import MeasurementArchive
+
+
+class MeasurementIndex:
+    """
+    Index of ASD measurement files in one directory.
+
+    The directory is listed once and each file with a numeric extension is
+    stored by its file number, e.g. '210317_a.012' is file number 12.
+    Extensions are zero padded to three digits, as written by the
+    spectrometer, and file numbers above 999 have more digits, i.e.
+    '210317_a.1000'. Other extensions, i.e. '.12' or '.0012', are skipped.
+
+    The index can optionally be stored in a cache file inside the directory,
+    which is used as long as the modification time of the directory does not
+    change.
+
+    Directories can also be a zip or tar archive or a directory inside of
+    one, e.g. 'session.zip/white-reference'. The files are then listed from
+    the index of the archive and no cache file is used.
+    """
+
+    CACHE_FILE = '.spectro_dp_index.json'
+
+    def __init__(self, directory, cache=False) -> None:
+        """
+        :param directory: Directory with the measurement files
+        :param cache: Read and store the index from a cache file in the
+                      directory (Default: False)
+        """
+        self._directory = Path(directory)
+        self._archive = MeasurementArchive.find(self._directory)
+        self._cache = cache and self._archive is None
+        self._numbers = []
+        self._names = []
+
+        if not (self._cache and self._read_cache()):
+            self._scan()
+            if self._cache:
+                self._write_cache()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @staticmethod
+    def exists(directory) -> bool:
+        """
+        :param directory: Path to a directory, an archive or a directory
+                          inside of an archive
+        :return: True when the directory exists
+        """
+        if os.path.isdir(directory):
+            return True
+
+        archive = MeasurementArchive.find(directory)
+        return archive is not None and archive[0].is_dir(archive[1])
+
+    @property
+    def cache_file(self) -> Path:
+        return self.directory.joinpath(self.CACHE_FILE)
+
+    def files(self, file_prefix, start_index, count=1, exact=False) -> list:
+        """
+        Look up all files for a range of file numbers. This matches the
+        same files as the glob pattern '{file_prefix}*.{file_number:03d}',
+        or '{file_prefix}.{file_number:03d}' with exact.
+
+        :param file_prefix: Naming prefix of the files
+        :param start_index: First file number
+        :param count: Number of file numbers to look up (Default: 1)
+        :param exact: Only match files named exactly with the prefix and
+                      the file number, i.e. not '210317_ab.001' for the
+                      prefix '210317_a' (Default: False)
+        :return: List of file paths, sorted by file number and name
+        """
+        first = bisect_left(self._numbers, start_index)
+        last = bisect_left(self._numbers, start_index + count, lo=first)
+
+        return [
+            self.directory.joinpath(name)
+            for name in self._names[first:last]
+            if self._matches(name, file_prefix, exact)
+        ]
+
+    @staticmethod
+    def _matches(name, file_prefix, exact) -> bool:
+        stem = name.rpartition('.')[0]
+        return stem == file_prefix if exact else stem.startswith(file_prefix)
+
+    def numbered_files(self, file_prefix) -> list:
+        """
+        Look up all files with the given prefix.
+
+        :param file_prefix: Naming prefix of the files
+        :return: List of (file number, file path), sorted by file number and
+                 name
+        """
+        return [
+            (number, self.directory.joinpath(name))
+            for number, name in zip(self._numbers, self._names)
+            if name.rpartition('.')[0].startswith(file_prefix)
+        ]
+
+    @staticmethod
+    def file_number(name):
+        """
+        Parse the file number from the numeric extension of a file name.
+        Only extensions with three digits, or more without leading zeros,
+        are file numbers. This matches the '{file_number:03d}' format.
+
+        :param name: File name
+        :return: File number or None for files without a numeric extension
+        """
+        stem, _, extension = name.rpartition('.')
+        if len(stem) > 0 and extension.isascii() and extension.isdigit():
+            number = int(extension)
+            if extension == f"{number:03d}":
+                return number
+
+        return None
+
+    def _scan(self) -> None:
+        entries = []
+
+        if self._archive is not None:
+            archive, directory = self._archive
+            for name in archive.file_names(directory):
+                number = self.file_number(name)
+                if number is not None:
+                    entries.append((number, name))
+            self._set_entries(entries)
+            return
+
+        with os.scandir(self.directory) as directory:
+            for entry in directory:
+                number = self.file_number(entry.name)
+                if number is not None and entry.is_file():
+                    entries.append((number, entry.name))
+
+        self._set_entries(entries)
+
+    def _set_entries(self, entries) -> None:
+        entries = sorted(entries)
+        self._numbers = [number for number, _name in entries]
+        self._names = [name for _number, name in entries]
+
+    def _directory_mtime(self) -> int:
+        return os.stat(self.directory).st_mtime_ns
+
+    def _read_cache(self) -> bool:
+        """
+        Read the index from the cache file.
+
+        :return: True if the cache is valid for the current directory state
+        """
+        try:
+            with open(self.cache_file) as infile:
+                cache = json.load(infile)
+        except (OSError, ValueError):
+            return False
+
+        if cache.get('mtime_ns') != self._directory_mtime():
+            return False
+
+        # Names are parsed again for caches written by older versions
+        entries = []
+        for _number, name in cache.get('files', []):
+            number = self.file_number(name)
+            if number is not None:
+                entries.append((number, name))
+        self._set_entries(entries)
+        return True
+
+    def _write_cache(self) -> None:
+        try:
+            # Creating the cache file changes the modification time of the
+            # directory. Hence, the time is recorded after opening the file.
+            with open(self.cache_file, 'w') as outfile:
+                json.dump(
+                    dict(
+                        mtime_ns=self._directory_mtime(),
+                        files=list(zip(self._numbers, self._names)),
+                    ),
+                    outfile
+                )
+        except OSError:
+            # Directories without write permission are not cached
+            pass
@@ -0,0 +1,268 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePath
+
+import numpy as np
+
+from . import profiler
+from .measurement_archive import MISSING_FILE_ERRORS, read_members
+from .measurement_file import MeasurementFile
+from .measurement_header import MeasurementHeader
+from .spectrum_cache import shared_spectrum_cache
+
+
+class MeasurementStack:
+    """
+    Read a list of ASD measurement files into one two-dimensional array.
+
+    The data of all files is read into a single preallocated array with one
+    row per file and one column per band. Each file payload is read directly
+    into its row without intermediate arrays. Files in the process wide
+    spectrum cache (see shared_spectrum_cache()) are copied from the cache
+    instead, and read files are added to it.
+
+    Files can also be inside of zip or tar archives (see
+    MeasurementArchive), which are read after the files on the file system.
+
+    On storage with a high latency, i.e. network drives, several files can be
+    read at the same time with a pool of threads. Each thread reads into the
+    row of its file, so the order of the files is kept. Errors are raised for
+    the first failing file in the order of the files.
+    """
+
+    READ_WORKERS = 1
+
+    def __init__(self, files, read_workers=READ_WORKERS) -> None:
+        """
+        :param files: List of paths to ASD measurement files
+        :param read_workers: Number of files read at the same time
+                             (Default: 1)
+        """
+        self._files = [PurePath(file) for file in files]
+        self._read_workers = max(int(read_workers), 1)
+        self._headers = [None] * len(self._files)
+        self._header_records = None
+        self._data = None
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def files(self) -> list:
+        """
+        :return: List with paths of all files in the stack
+        """
+        return self._files
+
+    @property
+    def headers(self) -> list:
+        """
+        Header of each file, read on first access.
+
+        :return: List with the header of each file
+        """
+        return [self.header(index) for index in range(len(self))]
+
+    @property
+    def header_records(self) -> np.ndarray:
+        """
+        Binary header fields of all files, read on first access.
+
+        :return: Structured array with one record per file
+        """
+        if self._header_records is None:
+            self._header_records = MeasurementHeader.read(self.files)
+
+        return self._header_records
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        Data of all files, read on first access.
+
+        :return: Array with shape (number of files, MeasurementFile.BAND_COUNT)
+        """
+        if self._data is None:
+            self._data = self._read()
+
+        return self._data
+
+    def header(self, index) -> str:
+        """
+        Header of one file in the stack, read on first access.
+
+        :param index: Position of the file in the stack
+        :return: Decoded header of the file
+        """
+        if self._headers[index] is None:
+            self._headers[index] = MeasurementFile(self.files[index]).header
+
+        return self._headers[index]
+
+    def read(self) -> None:
+        """
+        Read the header and data of all files with a single read of each
+        file, instead of reading headers and data separately on first
+        access.
+        """
+        files = np.empty(
+            (len(self), MeasurementFile.FILE_BYTES), dtype=np.uint8
+        )
+        with profiler.stage('read'):
+            self._read_rows(self._read_file, files)
+
+        self._header_records = MeasurementHeader.from_bytes(
+            files[:, :MeasurementFile.HEADER_BYTES]
+        )
+        self._data = np.ascontiguousarray(
+            files[:, MeasurementFile.HEADER_BYTES:]
+        ).view(MeasurementFile.DATA_TYPE)
+
+    def mean(self) -> np.ndarray:
+        """
+        :return: Array with the mean of all files for each band
+        """
+        return self.data.mean(axis=0)
+
+    def median(self) -> np.ndarray:
+        """
+        :return: Array with the median of all files for each band
+        """
+        return np.median(self.data, axis=0)
+
+    def std(self) -> np.ndarray:
+        """
+        :return: Array with the standard deviation of all files for each band
+        """
+        return self.data.std(axis=0)
+
+    def _read(self) -> np.ndarray:
+        data = np.empty(
+            (len(self), MeasurementFile.BAND_COUNT),
+            dtype=MeasurementFile.DATA_TYPE
+        )
+
+        # Rows of files that are not in the spectrum cache
+        rows = range(len(self))
+        cache = shared_spectrum_cache()
+        if cache.enabled:
+            keys = [cache.key(file) for file in self.files]
+            rows = []
+            for row, key in enumerate(keys):
+                cached = cache.get(key)
+                if cached is None:
+                    rows.append(row)
+                else:
+                    data[row] = cached
+
+        with profiler.stage('read'):
+            self._read_rows(
+                self._read_row,
+                [data[row] for row in rows],
+                [self.files[row] for row in rows],
+                offset=MeasurementFile.HEADER_BYTES,
+            )
+
+        if cache.enabled:
+            for row in rows:
+                cache.put(keys[row], data[row])
+
+        return data
+
+    def _read_rows(self, read, rows, files=None, offset=0) -> None:
+        """
+        Read each file into its row of the given array. Files inside of
+        archives are read afterwards, with the files of each archive in the
+        order they are stored.
+
+        :param read: Function to read one file into one row, which returns
+                     False for files that are not on the file system
+        :param rows: Array or list with one row per file
+        :param files: Files to read (Default: All files of the stack)
+        :param offset: Bytes at the start of each file that are not read
+                       into the rows (Default: 0)
+        """
+        files = self.files if files is None else files
+        workers = min(self._read_workers, len(files))
+        if workers <= 1:
+            found = [read(row, file) for row, file in zip(rows, files)]
+        else:
+            # File reads release the GIL and wait in parallel. Results are
+            # collected in file order to raise the first error.
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                found = list(executor.map(read, rows, files))
+
+        members = [index for index, on_disk in enumerate(found) if not on_disk]
+        if len(members) == 0:
+            return
+
+        for index, content in zip(
+            members, read_members([files[index] for index in members])
+        ):
+            row = rows[index].view(np.uint8)
+            MeasurementStack._check_size(
+                files[index], len(content) - offset, row, 0
+            )
+            row[:] = np.frombuffer(content, dtype=np.uint8, offset=offset)
+
+    @staticmethod
+    def _read_row(row, file) -> bool:
+        """
+        Read the data of one file into the given row.
+
+        :param row: Array to read the bands into
+        :param file: Path to the file
+        :return: False when the file is not on the file system, i.e. inside
+                 of an archive
+        """
+        try:
+            with open(file, 'rb') as infile:
+                infile.seek(MeasurementFile.HEADER_BYTES)
+                read_bytes = infile.readinto(row)
+                trailing_bytes = len(infile.read(1))
+        except MISSING_FILE_ERRORS:
+            return False
+
+        MeasurementStack._check_size(file, read_bytes, row, trailing_bytes)
+        profiler.count('files_read')
+        profiler.count('bytes_read', read_bytes)
+
+        return True
+
+    @staticmethod
+    def _read_file(row, file) -> bool:
+        """
+        Read the header and data of one file into the given row of bytes.
+
+        :param row: Array of MeasurementFile.FILE_BYTES bytes
+        :param file: Path to the file
+        :return: False when the file is not on the file system, i.e. inside
+                 of an archive
+        """
+        try:
+            with open(file, 'rb') as infile:
+                read_bytes = infile.readinto(row)
+                trailing_bytes = len(infile.read(1))
+        except MISSING_FILE_ERRORS:
+            return False
+
+        MeasurementStack._check_size(file, read_bytes, row, trailing_bytes)
+        profiler.count('files_read')
+        profiler.count('bytes_read', read_bytes)
+
+        return True
+
+    @staticmethod
+    def _check_size(file, read_bytes, row, trailing_bytes) -> None:
+        """
+        Check for expected number of bands
+
+        :param file: Path to the file
+        :param read_bytes: Number of bytes read into the row
+        :param row: Array the file was read into
+        :param trailing_bytes: Number of bytes left in the file
+        """
+        if read_bytes != row.nbytes or trailing_bytes != 0:
+            raise ValueError(
+                f"File {PurePath(file).as_posix()} does not contain "
+                f"{MeasurementFile.BAND_COUNT} bands"
+            )
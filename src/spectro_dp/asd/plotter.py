@@ -1,13 +1,15 @@
 from contextlib import contextmanager
 
-import matplotlib.pyplot as plt
-
+from . import profiler
 from .measurement_file import MeasurementFile
 
 
 class Plotter:
     """
     Base class to plot results of measurement composites
+
+    Matplotlib is imported with the first plot to keep the start of the
+    command line interfaces fast when no plot is shown.
     """
 
     TITLE = "Measurements"
@@ -15,6 +17,8 @@ class Plotter:
 
     FIGURE_DEFAULTS = dict(dpi=300)
     LINE_OPTS = dict(lw=1)
+    # Seconds to process window events for non-blocking plots
+    PAUSE = 0.1
 
     @staticmethod
     @contextmanager
@@ -26,6 +30,8 @@ class Plotter:
             Options:
              * 'composite_title': Title for the plot
         """
+        import matplotlib.pyplot as plt
+
         plt.figure(**Plotter.FIGURE_DEFAULTS)
 
         yield plt
@@ -54,46 +60,59 @@ class Plotter:
              * 'composite_title': Title for the plot
              * 'set_1_label': Legend label for set_1
              * 'set_2_label': Legend label for set_2
+             * 'block': Wait for the plot window to be closed (Default: True).
+                        Non-blocking calls replace the previously shown plot.
         """
-        fig, (ax1, ax2) = plt.subplots(
-            2, 1, sharex=True, **Plotter.FIGURE_DEFAULTS
-        )
-
-        label_set_1 = kwargs.get('set_1_label', 'Set 1')
-        label_set_2 = kwargs.get('set_2_label', 'Set 2')
-
-        x_ticks = MeasurementFile.BAND_RANGE
-
-        ax1.set_title(Plotter.TITLE)
-        ax1.plot(
-            x_ticks, measurement_composite.set_1,
-            label=label_set_1, c='goldenrod', **Plotter.LINE_OPTS
-        )
-        ax1.plot(
-            x_ticks, measurement_composite.set_2,
-            label=label_set_2, c='skyblue', **Plotter.LINE_OPTS
-        )
-        ax1.set_ylim(bottom=0)
-        ax1.legend(
-            bbox_to_anchor=(0., 1.0, 1., .1),
-            loc='lower left',
-            ncol=2,
-            mode="expand",
-            borderaxespad=0.,
-            framealpha=0,
-        )
-
-        ax2.plot(
-            x_ticks, measurement_composite.result,
-            c='slateblue', **Plotter.LINE_OPTS
-        )
-
-        ax2.set_title(
-            kwargs.get('composite_title', Plotter.AX2_TITLE)
-        )
-        ax2.set_xlim(x_ticks.min() - 1, x_ticks.max() + 1)
-        ax2.set_ylim(0, 1)
-        ax2.set_xlabel(MeasurementFile.X_LABEL)
-
-        plt.tight_layout()
-        plt.show()
+        import matplotlib.pyplot as plt
+
+        block = kwargs.get('block', True)
+
+        # Only time the drawing, not the display of the plot
+        with profiler.stage('plot'):
+            fig, (ax1, ax2) = plt.subplots(
+                2, 1, sharex=True,
+                num=None if block else Plotter.TITLE, clear=not block,
+                **Plotter.FIGURE_DEFAULTS
+            )
+
+            label_set_1 = kwargs.get('set_1_label', 'Set 1')
+            label_set_2 = kwargs.get('set_2_label', 'Set 2')
+
+            x_ticks = MeasurementFile.BAND_RANGE
+
+            ax1.set_title(Plotter.TITLE)
+            ax1.plot(
+                x_ticks, measurement_composite.set_1,
+                label=label_set_1, c='goldenrod', **Plotter.LINE_OPTS
+            )
+            ax1.plot(
+                x_ticks, measurement_composite.set_2,
+                label=label_set_2, c='skyblue', **Plotter.LINE_OPTS
+            )
+            ax1.set_ylim(bottom=0)
+            ax1.legend(
+                bbox_to_anchor=(0., 1.0, 1., .1),
+                loc='lower left',
+                ncol=2,
+                mode="expand",
+                borderaxespad=0.,
+                framealpha=0,
+            )
+
+            ax2.plot(
+                x_ticks, measurement_composite.result,
+                c='slateblue', **Plotter.LINE_OPTS
+            )
+
+            ax2.set_title(
+                kwargs.get('composite_title', Plotter.AX2_TITLE)
+            )
+            ax2.set_xlim(x_ticks.min() - 1, x_ticks.max() + 1)
+            ax2.set_ylim(0, 1)
+            ax2.set_xlabel(MeasurementFile.X_LABEL)
+
+            plt.tight_layout()
+        if block:
+            plt.show()
+        else:
+            plt.pause(Plotter.PAUSE)
@@ -0,0 +1,237 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import click
+
+
+class Profiler:
+    """
+    Wall and CPU time of processing stages, i.e. globbing, reading,
+    averaging, saving and plotting, and counters, i.e. of read files and
+    bytes or cache hits.
+
+    Stages are timed with a context manager and can be nested, with the time
+    of a nested stage also counted for the enclosing stage. The CPU time is
+    the time of the whole process, including all threads.
+
+    One profiler is active for the process with enable(). The module
+    functions stage() and count() record to the active profiler and do
+    nothing when profiling is disabled.
+    """
+
+    def __init__(self) -> None:
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stages(self) -> dict:
+        """
+        :return: Dictionary with calls, wall and CPU seconds of each stage
+        """
+        return self._stages
+
+    @property
+    def counters(self) -> dict:
+        return self._counters
+
+    @contextmanager
+    def stage(self, name) -> None:
+        """
+        Time the enclosed code as the given stage.
+
+        :param name: Name of the stage
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.add_stage(
+                name, time.perf_counter() - wall, time.process_time() - cpu
+            )
+
+    def add_stage(self, name, wall, cpu, calls=1) -> None:
+        """
+        :param name: Name of the stage
+        :param wall: Wall time in seconds
+        :param cpu: CPU time in seconds
+        :param calls: Number of calls of the stage (Default: 1)
+        """
+        with self._lock:
+            stage = self._stages.setdefault(
+                name, dict(calls=0, wall=0.0, cpu=0.0)
+            )
+            stage['calls'] += calls
+            stage['wall'] += wall
+            stage['cpu'] += cpu
+
+    def count(self, name, value=1) -> None:
+        """
+        :param name: Name of the counter
+        :param value: Value to add (Default: 1)
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def merge(self, state) -> None:
+        """
+        Add the stages and counters of another profiler, i.e. from a worker
+        process.
+
+        :param state: Dictionary from state()
+        """
+        for name, stage in state['stages'].items():
+            self.add_stage(name, stage['wall'], stage['cpu'], stage['calls'])
+        for name, value in state['counters'].items():
+            self.count(name, value)
+
+    def state(self) -> dict:
+        """
+        :return: Dictionary with copies of the stages and counters
+        """
+        with self._lock:
+            return dict(
+                stages={
+                    name: dict(stage) for name, stage in self._stages.items()
+                },
+                counters=dict(self._counters),
+            )
+
+    def records(self) -> list:
+        """
+        :return: List with one dictionary per stage and counter
+        """
+        state = self.state()
+        return [
+            dict(type='stage', name=name, **stage)
+            for name, stage in state['stages'].items()
+        ] + [
+            dict(type='counter', name=name, value=value)
+            for name, value in state['counters'].items()
+        ]
+
+    def save(self, outfile) -> str:
+        """
+        Save all stages and counters as JSON lines.
+
+        :param outfile: Path of the output file
+        :return: Path of the saved file
+        """
+        with open(outfile, 'w') as output:
+            for record in self.records():
+                output.write(json.dumps(record) + '\n')
+
+        return str(outfile)
+
+    def summary(self) -> str:
+        """
+        :return: Table of all stages and counters
+        """
+        state = self.state()
+        width = max(
+            [len('Stage')] + [len(name) for name in state['stages']] +
+            [len(name) for name in state['counters']]
+        )
+        lines = [
+            f"{'Stage':<{width}}  {'Calls':>8}  {'Wall [s]':>10}  "
+            f"{'CPU [s]':>10}"
+        ]
+        for name, stage in state['stages'].items():
+            lines.append(
+                f"{name:<{width}}  {stage['calls']:>8}  "
+                f"{stage['wall']:>10.4f}  {stage['cpu']:>10.4f}"
+            )
+        if len(state['counters']) > 0:
+            lines.append('')
+            lines.append(f"{'Counter':<{width}}  {'Value':>8}")
+            for name, value in state['counters'].items():
+                lines.append(f"{name:<{width}}  {value:>8}")
+
+        return '\n'.join(lines)
+
+
+_active = None
+# Shared context of disabled stages
+_DISABLED = nullcontext()
+
+
+def active() -> Profiler:
+    """
+    :return: The active profiler or None when profiling is disabled
+    """
+    return _active
+
+
+def enable(profiler=None) -> Profiler:
+    """
+    :param profiler: Profiler to record to (Default: new Profiler)
+    :return: The active profiler
+    """
+    global _active
+    _active = Profiler() if profiler is None else profiler
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def stage(name):
+    """
+    :param name: Name of the stage
+    :return: Context manager timing the stage with the active profiler
+    """
+    if _active is None:
+        return _DISABLED
+    return _active.stage(name)
+
+
+def count(name, value=1) -> None:
+    """
+    :param name: Name of the counter
+    :param value: Value to add (Default: 1)
+    """
+    if _active is not None:
+        _active.count(name, value)
+
+
+def profile_options(command):
+    """
+    Decorator that adds the --profile and --profile-out options to a click
+    command. With either option, the command runs with an active profiler
+    and the stages and counters are printed or saved afterwards.
+    """
+    @click.option(
+        '--profile-out',
+        type=click.Path(dir_okay=False), default=None,
+        help='Save the time of each processing stage and counters of read '
+             'files and bytes to this file as JSON lines.',
+    )
+    @click.option(
+        '--profile',
+        is_flag=True, default=False,
+        help='Print the time of each processing stage and counters of read '
+             'files and bytes.',
+    )
+    @functools.wraps(command)
+    def wrapper(*args, profile, profile_out, **kwargs):
+        if not profile and profile_out is None:
+            return command(*args, **kwargs)
+
+        profiler = enable()
+        try:
+            with profiler.stage('total'):
+                return command(*args, **kwargs)
+        finally:
+            disable()
+            if profile:
+                print(profiler.summary())
+            if profile_out is not None:
+                print(f"Profile saved to:\n  {profiler.save(profile_out)}")
+
+    return wrapper
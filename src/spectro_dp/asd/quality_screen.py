@@ -0,0 +1,396 @@
+import csv
+import os
+from pathlib import Path
+
+import click
+import numpy as np
+
+from . import profiler
+from .catalog import MeasurementCatalog
+from .measurement_file import MeasurementFile
+from .measurement_index import MeasurementIndex
+from .measurement_stack import MeasurementStack
+from .profiler import profile_options
+from .splice_correction import SpliceCorrection
+
+
+class QualityScreen:
+    """
+    Screen raw spectra for failed measurements before they are averaged.
+
+    All checks are computed at once for a whole stack of spectra, with one
+    row per file. Files are compared to the other files of their group, i.e.
+    the set of ten measurements they are averaged with. The checks are:
+     * 'saturated': Number of bands at or above the saturation level
+     * 'negative': Number of bands below zero
+     * 'dark': Mean signal is below DARK_DN or below DARK_FRACTION of the
+               median signal of the group, i.e. a dark current only frame
+     * 'deviation': Mean absolute difference to the median spectrum of the
+                    group, relative to the mean of the median spectrum
+     * 'splice_step': Ratio of the bands at the VNIR to SWIR1 splice
+                      (1000 nm) relative to the median ratio of the group
+     * 'drift': Change of the linear trend of the mean signal from the
+                first to the last file of the group, relative to the trend
+                value at the first file. Files are taken in the given order,
+                i.e. a white reference sequence.
+
+    The result is a table (structured array) with the value of each check
+    and a bit mask of the failed checks in the 'flags' column. The checks
+    of GROUP_CHECKS describe the whole group and have the same value and
+    flag for all of its files.
+    """
+
+    FLAGS = [
+        'saturated', 'negative', 'dark', 'deviation', 'splice_step', 'drift',
+    ]
+    GROUP_CHECKS = ['drift']
+    # Close to the full scale of the 16 bit detectors, leaving room for the
+    # subtracted dark current
+    SATURATION_DN = 60000
+    NEGATIVE_FRACTION = 0.2
+    DARK_DN = 100
+    DARK_FRACTION = 0.05
+    DEVIATION_LIMIT = 0.1
+    SPLICE_BAND = SpliceCorrection.SPLICE_WAVELENGTHS[0] - \
+        MeasurementFile.MIN_WAVELENGTH
+    SPLICE_STEP_LIMIT = 0.05
+    DRIFT_LIMIT = 0.05
+    # Files per group for screen_files()
+    SET_COUNT = 10
+    # Files read and screened at once by screen_files()
+    CHUNK_FILES = 4096
+
+    DTYPE = np.dtype([
+        ('saturated', '<i4'),
+        ('negative', '<i4'),
+        ('signal', '<f4'),
+        ('deviation', '<f4'),
+        ('splice_step', '<f4'),
+        ('drift', '<f4'),
+        ('flags', 'u1'),
+    ])
+
+    def __init__(self, checks=None, **limits) -> None:
+        """
+        :param checks: Names of the checks that flag a file
+                       (Default: All of FLAGS)
+        :param limits: Optional - Thresholds of the checks
+            saturation_dn: DN from which a band is saturated (Default: 60000)
+            negative_fraction: Fraction of negative bands to flag a file
+                               (Default: 0.2)
+            dark_dn: Mean signal below which a file is dark (Default: 100)
+            dark_fraction: Fraction of the median signal of the group below
+                           which a file is dark (Default: 0.05)
+            deviation_limit: Maximum deviation (Default: 0.1)
+            splice_band: Last VNIR band before the splice (Default: 650)
+            splice_step_limit: Maximum splice step (Default: 0.05)
+            drift_limit: Maximum drift (Default: 0.05)
+        """
+        self._checks = list(self.FLAGS if checks is None else checks)
+        for check in self._checks:
+            if check not in self.FLAGS:
+                raise ValueError(
+                    f"Unknown quality check '{check}'. "
+                    f"Valid options: {', '.join(self.FLAGS)}"
+                )
+
+        self._saturation_dn = limits.get('saturation_dn', self.SATURATION_DN)
+        self._negative_fraction = limits.get(
+            'negative_fraction', self.NEGATIVE_FRACTION
+        )
+        self._dark_dn = limits.get('dark_dn', self.DARK_DN)
+        self._dark_fraction = limits.get('dark_fraction', self.DARK_FRACTION)
+        self._deviation_limit = limits.get(
+            'deviation_limit', self.DEVIATION_LIMIT
+        )
+        self._splice_band = limits.get('splice_band', self.SPLICE_BAND)
+        self._splice_step_limit = limits.get(
+            'splice_step_limit', self.SPLICE_STEP_LIMIT
+        )
+        self._drift_limit = limits.get('drift_limit', self.DRIFT_LIMIT)
+
+    @property
+    def checks(self) -> list:
+        return self._checks
+
+    def settings(self) -> dict:
+        """
+        :return: Dictionary with the checks and all thresholds
+        """
+        return dict(
+            checks=self._checks,
+            saturation_dn=self._saturation_dn,
+            negative_fraction=self._negative_fraction,
+            dark_dn=self._dark_dn,
+            dark_fraction=self._dark_fraction,
+            deviation_limit=self._deviation_limit,
+            splice_band=self._splice_band,
+            splice_step_limit=self._splice_step_limit,
+            drift_limit=self._drift_limit,
+        )
+
+    @classmethod
+    def mask(cls, checks) -> int:
+        """
+        :param checks: Names of checks
+        :return: Bit mask of the checks for the 'flags' column
+        """
+        return sum(1 << cls.FLAGS.index(check) for check in checks)
+
+    @classmethod
+    def reasons(cls, flags) -> list:
+        """
+        :param flags: Bit mask of the 'flags' column of one file
+        :return: Names of the failed checks
+        """
+        return [
+            name for bit, name in enumerate(cls.FLAGS) if int(flags) >> bit & 1
+        ]
+
+    def screen(self, data, groups=None) -> np.ndarray:
+        """
+        :param data: Array with one spectrum per row, i.e.
+                     MeasurementStack.data
+        :param groups: Group label of each row. Rows of one group are
+                       compared with each other. (Default: One group)
+        :return: Table with one row per spectrum and the columns of DTYPE
+        """
+        data = np.asarray(data, dtype=MeasurementFile.DATA_TYPE)
+        table = np.zeros(len(data), dtype=self.DTYPE)
+        if len(data) == 0:
+            return table
+        if groups is None:
+            groups = np.zeros(len(data), dtype=int)
+
+        table['saturated'] = np.count_nonzero(
+            data >= self._saturation_dn, axis=1
+        )
+        table['negative'] = np.count_nonzero(data < 0, axis=1)
+        table['signal'] = data.mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            steps = data[:, self._splice_band + 1] / \
+                data[:, self._splice_band]
+
+        flags = {
+            'saturated': table['saturated'] > 0,
+            'negative': table['negative'] >
+            self._negative_fraction * data.shape[1],
+            'dark': np.zeros(len(data), dtype=bool),
+        }
+
+        # Groups of the same size are stacked along a new axis and screened
+        # together, which needs one pass for each distinct group size
+        _labels, inverse, counts = np.unique(
+            groups, return_inverse=True, return_counts=True
+        )
+        order = np.argsort(inverse.ravel(), kind='stable')
+        starts = np.cumsum(counts) - counts
+        for size in np.unique(counts):
+            rows = order[starts[counts == size][:, None] + np.arange(size)]
+            self._screen_groups(data, rows, table, steps, flags['dark'])
+
+        flags['deviation'] = table['deviation'] > self._deviation_limit
+        flags['splice_step'] = \
+            np.abs(table['splice_step']) > self._splice_step_limit
+        flags['drift'] = np.abs(table['drift']) > self._drift_limit
+
+        for bit, name in enumerate(self.FLAGS):
+            if name in self._checks:
+                table['flags'] |= flags[name].astype(np.uint8) << bit
+
+        return table
+
+    def _screen_groups(self, data, rows, table, steps, dark) -> None:
+        """
+        Screen groups of the same size.
+
+        :param data: All spectra
+        :param rows: Array with the row numbers of one group per row
+        :param table: Table to fill the group values into
+        :param steps: Splice step ratio of all spectra
+        :param dark: Dark flag of all spectra to fill
+        """
+        first = rows[0, 0]
+        if np.array_equal(rows.ravel(), np.arange(first, first + rows.size)):
+            # Consecutive groups are a view without copying the data
+            block = data[first:first + rows.size].reshape(
+                *rows.shape, data.shape[1]
+            )
+        else:
+            block = data[rows]
+        signal = table['signal'][rows]
+        median = self._median(block)
+
+        difference = block - median[:, None]
+        np.abs(difference, out=difference)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['deviation'][rows] = \
+                difference.mean(axis=2) / \
+                np.abs(median).mean(axis=1)[:, None]
+            table['splice_step'][rows] = \
+                steps[rows] / np.median(steps[rows], axis=1)[:, None] - 1
+
+            dark[rows] = signal < np.maximum(
+                self._dark_dn,
+                self._dark_fraction * np.median(signal, axis=1)
+            )[:, None]
+
+            # Least squares line through the signal of each group
+            positions = np.arange(rows.shape[1])
+            centered = positions - positions.mean()
+            slope = (signal * centered).sum(axis=1) / \
+                max((centered ** 2).sum(), 1)
+            start = signal.mean(axis=1) - slope * positions.mean()
+            table['drift'][rows] = \
+                (slope * positions[-1] / start)[:, None]
+
+    @staticmethod
+    def _median(block) -> np.ndarray:
+        """
+        Median along the second axis. Sorting the few files of a group is
+        faster than np.median, which partitions along the strided axis.
+
+        :param block: Array with the groups along the first axis
+        :return: Median of each group
+        """
+        block = np.sort(block, axis=1)
+        size = block.shape[1]
+        return (block[:, (size - 1) // 2] + block[:, size // 2]) / 2
+
+    def screen_files(self, files, set_count=SET_COUNT,
+                     read_workers=MeasurementStack.READ_WORKERS) \
+            -> np.ndarray:
+        """
+        Screen measurement files of a whole campaign. Files are grouped by
+        directory, file prefix and file number, with set_count consecutive
+        file numbers per group, i.e. 0-9, 10-19, ... for the default.
+
+        :param files: List of paths of complete measurement files
+        :param set_count: Number of file numbers per group (Default: 10)
+        :param read_workers: Number of files read at the same time
+                             (Default: 1)
+        :return: Table with one row per file, in the order of the files
+        """
+        group_ids = {}
+        groups = np.empty(len(files), dtype=int)
+        for row, file in enumerate(files):
+            directory, name = os.path.split(file)
+            stem, _, _extension = name.rpartition('.')
+            key = (
+                directory, stem,
+                (MeasurementIndex.file_number(name) or 0) // set_count,
+            )
+            groups[row] = group_ids.setdefault(key, len(group_ids))
+
+        table = np.zeros(len(files), dtype=self.DTYPE)
+        order = np.argsort(groups, kind='stable')
+        # Chunks hold whole groups, with at least one group per chunk
+        ends = np.flatnonzero(np.diff(groups[order], append=-1)) + 1
+        start = 0
+        while start < len(order):
+            end = ends[max(
+                np.searchsorted(ends, start, side='right'),
+                np.searchsorted(
+                    ends, start + self.CHUNK_FILES, side='right'
+                ) - 1,
+            )]
+            rows = order[start:end]
+            data = MeasurementStack(
+                [files[row] for row in rows], read_workers
+            ).data
+            with profiler.stage('screen'):
+                table[rows] = self.screen(data, groups[rows])
+            start = end
+
+        return table
+
+    @classmethod
+    def save(cls, outfile, files, table) -> str:
+        """
+        Save a table as CSV file with one row per file.
+
+        :param outfile: Path of the CSV file
+        :param files: File paths of the rows
+        :param table: Table from screen() or screen_files()
+        :return: Full path of saved file
+        """
+        outfile = Path(outfile).as_posix()
+        columns = [
+            name for name in cls.DTYPE.names if name != 'flags'
+        ]
+        with profiler.stage('save'), open(outfile, 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(['file', 'flagged', 'reasons'] + columns)
+            for file, row in zip(files, table):
+                reasons = cls.reasons(row['flags'])
+                writer.writerow(
+                    [Path(file).as_posix(), int(len(reasons) > 0),
+                     ';'.join(reasons)] +
+                    [f"{row[column]:g}" for column in columns]
+                )
+
+        return outfile
+
+
+@click.command(
+    help='Screen all ASD measurement files in a directory tree for '
+         'saturated, dark, deviating and drifting spectra and save a table '
+         'of flagged files.'
+)
+@click.option(
+    '-in', '--input-dir',
+    prompt=True, type=click.Path(exists=True, file_okay=False),
+    help='Path to the root directory of the measurements',
+)
+@click.option(
+    '--set-count',
+    default=QualityScreen.SET_COUNT, type=click.IntRange(min=1),
+    help='Number of consecutive file numbers compared with each other. '
+         f'(Default: {QualityScreen.SET_COUNT})',
+)
+@click.option(
+    '--check', 'checks',
+    type=click.Choice(QualityScreen.FLAGS), multiple=True,
+    help='Check that flags files. Can be given multiple times. '
+         'Default: All checks',
+)
+@click.option(
+    '--read-workers',
+    default=1, type=click.IntRange(min=1),
+    help='Number of files read at the same time. Higher values speed up '
+         'reading from network or USB drives. (Default: 1)',
+)
+@click.option(
+    '-o', '--output-file',
+    type=click.Path(dir_okay=False), default=None,
+    help='Path of the CSV file with the flags. '
+         'Default: quality.csv in the input directory',
+)
+@profile_options
+def cli(input_dir, set_count, checks, read_workers, output_file):
+    try:
+        with profiler.stage('glob'):
+            files = [
+                file for file in (
+                    Path(input_dir).joinpath(file)
+                    for file in MeasurementCatalog.find_files(input_dir)
+                )
+                if os.path.getsize(file) == MeasurementFile.FILE_BYTES
+            ]
+        if len(files) == 0:
+            raise FileNotFoundError('No complete measurement files found.')
+
+        screen = QualityScreen(checks=checks or None)
+        table = screen.screen_files(files, set_count, read_workers)
+    except (FileNotFoundError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return
+
+    if output_file is None:
+        output_file = Path(input_dir).joinpath('quality.csv')
+
+    print(
+        f"Flagged {np.count_nonzero(table['flags'])} of {len(files)} "
+        f"file(s). Table saved to:\n"
+        f"  {QualityScreen.save(output_file, files, table)}"
+    )
@@ -1,7 +1,10 @@
 import click
 
+from .composite_cli import check_watch_options, run_composite
 from .measurement_composite import MeasurementComposite
-from .plotter import Plotter
+from .profiler import profile_options
+from .quality_screen import QualityScreen
+from .set_cache import SetCache
 
 
 @click.command(
@@ -51,41 +54,111 @@ from .plotter import Plotter
     default=10, type=int,
     help='Total count of white reference measurements. (Default: 10)'
 )
+@click.option(
+    '--robust-mean',
+    type=click.Choice(['sigma_clip', 'median']), default=None,
+    help='Average the measurements with an outlier resistant method '
+         'instead of the arithmetic mean.',
+)
+@click.option(
+    '--splice-correction',
+    type=click.Choice(['multiplicative', 'additive', 'none']),
+    default='multiplicative',
+    help='Correction of the steps at the detector splices. '
+         '(Default: multiplicative)',
+)
+@click.option(
+    '--splice-per-file',
+    is_flag=True, default=False,
+    help='Correct the detector splices of each file before averaging.',
+)
+@click.option(
+    '--read-workers',
+    default=1, type=click.IntRange(min=1),
+    help='Number of files read at the same time. Higher values speed up '
+         'reading from network or USB drives. (Default: 1)',
+)
+@click.option(
+    '--no-cache',
+    is_flag=True, default=False,
+    help='Always average the measurements from the files instead of '
+         'reusing averages of unchanged files from the set cache.',
+)
+@click.option(
+    '--quality-screen',
+    is_flag=True, default=False,
+    help='Exclude saturated, dark and deviating measurements from the '
+         'averages and warn about sets that drift.',
+)
+@click.option(
+    '--save-statistics',
+    is_flag=True, default=False,
+    help='Save mean, standard deviation, minimum and maximum of each '
+         'measurement set alongside the result.',
+)
 @click.option(
     '--skip-plot',
     is_flag=True, default=False,
     help="Don't show plot of the result",
 )
+@click.option(
+    '--plot-out',
+    type=click.Path(dir_okay=False), default=None,
+    help='Save the plot of the result to this image file instead of '
+         'showing it. The format is taken from the extension, '
+         'e.g. .png or .svg',
+)
+@click.option(
+    '--watch',
+    is_flag=True, default=False,
+    help='Update the result while the measurement files are written. '
+         'Stops once all files are read or with Ctrl+C.',
+)
+@click.option(
+    '--poll-interval',
+    default=1.0, type=click.FloatRange(min=0),
+    help='Seconds between checks for new files with --watch. (Default: 1)',
+)
 @click.option(
     '--debug',
     is_flag=True, default=False,
     help='Print information of processed files while processing',
 )
+@profile_options
 def cli(
         input_dir,
         file_prefix, output_file_suffix,
         r_index, r_count,
         wrp, wr_index, wr_count,
-        skip_plot, debug
+        robust_mean, splice_correction, splice_per_file, read_workers,
+        no_cache, quality_screen, save_statistics,
+        skip_plot, plot_out, watch, poll_interval, debug
 ):
+    check_watch_options(watch, robust_mean, quality_screen)
+
     try:
         composite = MeasurementComposite(
             input_dir, file_prefix,
             set_1_index=r_index, set_1_count=r_count,
             set_2_index=wr_index, set_2_count=wr_count, set_2_prefix=wrp,
-            debug=debug
+            robust_mean=robust_mean, debug=debug,
+            splice_correction=None if splice_correction == 'none'
+            else splice_correction,
+            splice_per_file=splice_per_file, read_workers=read_workers,
+            set_cache=None if no_cache else SetCache(),
+            quality_screen=QualityScreen() if quality_screen else None,
+        )
+        plot_options = dict(
+            composite_title='Reflectance',
+            set_1_label='Surface',
+            set_2_label='White reference',
         )
-        composite.calculate()
-
-        print(f"Results saved to:\n  {composite.save(output_file_suffix)}")
 
-        if not skip_plot:
-            Plotter.show_composite(
-                composite,
-                composite_title='Reflectance',
-                set_1_label='Surface',
-                set_2_label='White reference'
-            )
+        run_composite(
+            composite, output_file_suffix, plot_options,
+            save_statistics=save_statistics, skip_plot=skip_plot,
+            plot_out=plot_out, watch=watch, poll_interval=poll_interval,
+        )
 
-    except FileNotFoundError as fnfe:
-        print(f"ERROR: {fnfe}")
+    except (FileNotFoundError, ValueError) as error:
+        print(f"ERROR: {error}")
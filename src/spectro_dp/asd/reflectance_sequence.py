@@ -0,0 +1,423 @@
+import csv
+import os
+from pathlib import Path
+
+import click
+import numpy as np
+
+from .measurement_file import MeasurementFile
+from .measurement_header import MeasurementHeader
+from .measurement_index import MeasurementIndex
+from .measurement_stack import MeasurementStack
+from .profiler import profile_options
+from .splice_correction import SpliceCorrection
+
+
+class ReflectanceSequence:
+    """
+    Calculate the reflectance of a long sequence of surface measurements,
+    i.e. a transect, with white references taken periodically during the
+    session.
+
+    Consecutive white reference files form a group, which is averaged to one
+    white reference. Each surface measurement is divided by the group
+    closest in time ('nearest') or by the linear interpolation between the
+    groups before and after the measurement ('interpolate'). Measurements
+    before the first or after the last group use the closest group.
+
+    All files are read once, with the header and data in a single read, and
+    the reflectance of all surface measurements is calculated at once.
+    """
+
+    MODES = ['nearest', 'interpolate']
+    OUTPUT_SUFFIX = 'reflectance_sequence'
+
+    def __init__(self, surface_files, white_reference_groups,
+                 mode=MODES[0], **kwargs) -> None:
+        """
+        :param surface_files: List of surface measurement files
+        :param white_reference_groups: List with a list of white reference
+                                       files for each group
+        :param mode: Either 'nearest' or 'interpolate' (Default: nearest)
+        :param kwargs: Optional - Possible options
+            splice_correction: Correct the steps at the detector splices,
+                               either 'multiplicative', 'additive' or None
+                               to skip (Default: multiplicative)
+            read_workers: Number of files read at the same time
+                          (Default: 1)
+        """
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Unknown mode '{mode}'. "
+                f"Valid options: {', '.join(self.MODES)}"
+            )
+        if len(surface_files) == 0:
+            raise FileNotFoundError('No surface measurement files found')
+        white_reference_groups = [
+            group for group in white_reference_groups if len(group) > 0
+        ]
+        if len(white_reference_groups) == 0:
+            raise FileNotFoundError('No white reference files found')
+
+        self._surface_files = list(surface_files)
+        self._groups = white_reference_groups
+        self._mode = mode
+        self._splice_mode = kwargs.get(
+            'splice_correction', SpliceCorrection.MODES[0]
+        )
+        if self._splice_mode not in [None] + SpliceCorrection.MODES:
+            raise ValueError(
+                f"Unknown splice correction '{self._splice_mode}'"
+            )
+        self._read_workers = kwargs.get(
+            'read_workers', MeasurementStack.READ_WORKERS
+        )
+
+        self._surface_times = None
+        self._white_reference_times = None
+        self._white_references = None
+        self._result = None
+
+    @classmethod
+    def from_directory(cls, input_dir, file_prefix, white_reference_ranges=(),
+                       white_reference_prefix='', **kwargs) \
+            -> 'ReflectanceSequence':
+        """
+        Find the surface and white reference files of a session. White
+        references are either given by ranges of file numbers, with one group
+        per range, or by a different prefix, with one group for each run of
+        consecutive file numbers.
+
+        :param input_dir: Directory with all the measurements or a zip or
+                          tar archive of it
+        :param file_prefix: Naming prefix for the input files
+        :param white_reference_ranges: List of (first file number, count) of
+                                       white reference files
+        :param white_reference_prefix: Path to white reference files if
+                                       different from the surface files,
+                                       e.g. 'white-reference/'
+        :param kwargs: Options for the sequence, see __init__()
+        :return: ReflectanceSequence
+        """
+        input_dir = Path(input_dir)
+        if len(white_reference_ranges) == 0 and \
+                len(white_reference_prefix) == 0:
+            raise ValueError(
+                'White references need either file number ranges or a prefix'
+            )
+
+        files = cls._numbered_files(input_dir, file_prefix)
+
+        if len(white_reference_prefix) > 0:
+            white_references = cls._numbered_files(
+                input_dir, white_reference_prefix + file_prefix
+            )
+            white_paths = {path for _number, path in white_references}
+            groups = []
+            previous = None
+            for number, path in white_references:
+                if previous is None or number != previous + 1:
+                    groups.append([])
+                groups[-1].append(path)
+                previous = number
+        else:
+            white_paths = set()
+            groups = []
+            for first, count in white_reference_ranges:
+                groups.append([
+                    path for number, path in files
+                    if first <= number < first + count
+                ])
+                white_paths.update(groups[-1])
+
+        surface_files = [
+            path for _number, path in files if path not in white_paths
+        ]
+
+        return cls(surface_files, groups, **kwargs)
+
+    @staticmethod
+    def _numbered_files(input_dir, file_prefix) -> list:
+        # Prefixes can contain a sub-directory, e.g.: white-reference/
+        directory, file_prefix = os.path.split(file_prefix)
+        directory = input_dir.joinpath(directory)
+        if not MeasurementIndex.exists(directory):
+            return []
+
+        return MeasurementIndex(directory).numbered_files(file_prefix)
+
+    @property
+    def surface_files(self) -> list:
+        return self._surface_files
+
+    @property
+    def white_reference_groups(self) -> list:
+        return self._groups
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def surface_times(self) -> np.ndarray:
+        """
+        :return: Acquisition time of each surface measurement
+        """
+        return self._surface_times
+
+    @property
+    def white_reference_times(self) -> np.ndarray:
+        """
+        :return: Mean acquisition time of each white reference group
+        """
+        return self._white_reference_times
+
+    @property
+    def white_references(self) -> np.ndarray:
+        """
+        :return: Averaged white reference of each group with shape
+                 (groups, bands)
+        """
+        return self._white_references
+
+    @property
+    def result(self) -> np.ndarray:
+        """
+        :return: Reflectance with shape (surface measurements, bands)
+        """
+        return self._result
+
+    def calculate(self) -> np.ndarray:
+        """
+        Read all files and calculate the reflectance of each surface
+        measurement.
+
+        :return: Reflectance with shape (surface measurements, bands)
+        """
+        group_sizes = [len(group) for group in self._groups]
+        stack = MeasurementStack(
+            self._surface_files + [
+                file for group in self._groups for file in group
+            ],
+            self._read_workers,
+        )
+        stack.read()
+
+        times = MeasurementHeader.acquisition_time(
+            stack.header_records
+        ).astype(np.int64)
+        surface_count = len(self._surface_files)
+        surface = stack.data[:surface_count]
+        white_references = stack.data[surface_count:]
+
+        # Mean time and spectrum of each group
+        starts = np.cumsum([0] + group_sizes[:-1])
+        sizes = np.array(group_sizes)
+        group_times = np.add.reduceat(times[surface_count:], starts) / sizes
+        self._white_references = (
+            np.add.reduceat(white_references, starts, axis=0, dtype=np.float64)
+            / sizes[:, np.newaxis]
+        ).astype(MeasurementFile.DATA_TYPE)
+
+        if self._splice_mode is not None:
+            correction = SpliceCorrection.from_header(
+                stack.header_records[0], mode=self._splice_mode
+            )
+            correction.apply(surface)
+            correction.apply(self._white_references)
+
+        # Groups in time order for the search of the closest groups
+        order = np.argsort(group_times, kind='stable')
+        group_times = group_times[order]
+        self._white_references = self._white_references[order]
+        self._groups = [self._groups[index] for index in order]
+
+        self._surface_times = times[:surface_count].astype('datetime64[s]')
+        self._white_reference_times = \
+            np.round(group_times).astype(np.int64).astype('datetime64[s]')
+        self._result = surface / self._white_reference_at(
+            times[:surface_count], group_times
+        )
+
+        return self._result
+
+    def _white_reference_at(self, times, group_times) -> np.ndarray:
+        """
+        :param times: Acquisition times of the surface measurements in
+                      seconds
+        :param group_times: Increasing mean times of the groups in seconds
+        :return: White reference for each time with shape (times, bands)
+        """
+        after = np.clip(
+            np.searchsorted(group_times, times, side='right'),
+            1, max(group_times.size - 1, 1)
+        )
+        before = after - 1
+        if group_times.size == 1:
+            after = before
+
+        span = group_times[after] - group_times[before]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.clip(
+                np.where(span > 0, (times - group_times[before]) / span, 0),
+                0, 1
+            )
+
+        if self._mode == 'nearest':
+            closest = np.where(weight > 0.5, after, before)
+            return self._white_references[closest]
+
+        weight = weight.astype(MeasurementFile.DATA_TYPE)[:, np.newaxis]
+        return self._white_references[before] * (1 - weight) + \
+            self._white_references[after] * weight
+
+    def save(self, output_file) -> str:
+        """
+        Save the reflectance of all surface measurements to one CSV file,
+        with one row per measurement and one column per band.
+
+        :param output_file: Path of the CSV file
+        :return: Full path of the saved file or empty string when there is
+                 no result
+        """
+        if self._result is None:
+            return ''
+
+        with open(output_file, 'w', newline='') as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(
+                ['file', 'time'] + MeasurementFile.BAND_RANGE.tolist()
+            )
+            for file, time, reflectance in zip(
+                self._surface_files, self._surface_times, self._result
+            ):
+                writer.writerow(
+                    [Path(file).name, str(time)] +
+                    [f"{value:.4f}" for value in reflectance]
+                )
+
+        return Path(output_file).as_posix()
+
+    def append_to_store(self, store, site=None) -> list:
+        """
+        Add the reflectance of each surface measurement to a campaign store.
+
+        :param store: CubeStore
+        :param site: Name of the site (Default: Name of the input directory)
+        :return: Rows of the added measurements
+        """
+        composites = []
+        for file, time, reflectance in zip(
+            self._surface_files, self._surface_times, self._result
+        ):
+            file = Path(file)
+            composites.append(dict(
+                result=reflectance,
+                site=file.parent.name if site is None else site,
+                time=time,
+                prefix=file.name,
+                suffix=self.OUTPUT_SUFFIX,
+                input_dir=file.parent.as_posix(),
+            ))
+
+        return store.append_many(composites)
+
+
+@click.command(
+    help='Calculate the reflectance of a whole session of surface '
+         'measurements with periodic white references, using the white '
+         'references closest in time to each measurement.'
+)
+@click.option(
+    '-in', '--input-dir',
+    prompt=True, type=click.Path(exists=True),
+    help='Path to input directory containing the measurements or a zip or '
+         'tar archive of it',
+)
+@click.option(
+    '-fp', '--file-prefix',
+    prompt=True,
+    help='Prefix of the filename for an individual measurement.'
+)
+@click.option(
+    '--white-reference', '-wr', 'white_reference_ranges',
+    type=(int, int), multiple=True,
+    help='Start index and count of a group of white reference files. '
+         'Can be given multiple times.',
+)
+@click.option(
+    '--white-reference-prefix', '-wrp',
+    default='',
+    help='Path to white reference files if different from the surface '
+         'files. Consecutive file numbers form one group.',
+)
+@click.option(
+    '--interpolate',
+    is_flag=True, default=False,
+    help='Interpolate between the white references before and after each '
+         'measurement instead of using the closest in time.',
+)
+@click.option(
+    '--splice-correction',
+    type=click.Choice(['multiplicative', 'additive', 'none']),
+    default='multiplicative',
+    help='Correction of the steps at the detector splices. '
+         '(Default: multiplicative)',
+)
+@click.option(
+    '--read-workers',
+    default=1, type=click.IntRange(min=1),
+    help='Number of files read at the same time. Higher values speed up '
+         'reading from network or USB drives. (Default: 1)',
+)
+@click.option(
+    '-o', '--output',
+    type=click.Path(dir_okay=False), default=None,
+    help='Path of the CSV file with the reflectance. Default: '
+         '<file_prefix>_reflectance_sequence.csv in the input directory',
+)
+@click.option(
+    '--store',
+    type=click.Path(file_okay=False), default=None,
+    help='Directory of a campaign store to add each reflectance to. '
+         'Created when it does not exist.',
+)
+@profile_options
+def cli(input_dir, file_prefix, white_reference_ranges,
+        white_reference_prefix, interpolate, splice_correction, read_workers,
+        output, store):
+    try:
+        sequence = ReflectanceSequence.from_directory(
+            input_dir, file_prefix,
+            white_reference_ranges=white_reference_ranges,
+            white_reference_prefix=white_reference_prefix,
+            mode='interpolate' if interpolate else 'nearest',
+            splice_correction=None if splice_correction == 'none'
+            else splice_correction,
+            read_workers=read_workers,
+        )
+        sequence.calculate()
+    except (FileNotFoundError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return
+
+    if output is None:
+        # Results of archives are saved next to the archive
+        input_dir = Path(input_dir)
+        if input_dir.is_file():
+            input_dir = input_dir.parent
+        output = input_dir.joinpath(
+            f"{file_prefix}_{ReflectanceSequence.OUTPUT_SUFFIX}.csv"
+        )
+
+    print(
+        f"Calculated reflectance of {len(sequence.surface_files)} "
+        f"measurement(s) with {len(sequence.white_reference_groups)} white "
+        f"reference group(s)\n"
+        f"Results saved to:\n  {sequence.save(output)}"
+    )
+
+    if store is not None:
+        from .cube_store import CubeStore
+        sequence.append_to_store(CubeStore(store))
+        print(f"  {Path(store).as_posix()}")
@@ -0,0 +1,193 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from . import profiler
+from .measurement_file import MeasurementFile
+from .plotter import Plotter
+
+
+class Renderer:
+    """
+    Render plots of measurement composites to image files without a
+    display, i.e. for unattended runs.
+
+    The figure has the same layout as Plotter.show_composite() and is created
+    once. Rendering another composite only updates the data of the existing
+    lines and the layout for the titles before saving. The image format is
+    taken from the file extension, e.g. '.png' or '.svg'.
+    """
+
+    DPI = 100
+
+    def __init__(self, dpi=DPI) -> None:
+        """
+        :param dpi: Resolution of saved images (Default: 100)
+        """
+        self._figure = Figure(dpi=dpi)
+        FigureCanvasAgg(self._figure)
+        self._ax1, self._ax2 = self._figure.subplots(2, 1, sharex=True)
+        self._labels = None
+
+        x_ticks = MeasurementFile.BAND_RANGE
+        self._set_1_line, = self._ax1.plot(
+            x_ticks, x_ticks * 0, c='goldenrod', **Plotter.LINE_OPTS
+        )
+        self._set_2_line, = self._ax1.plot(
+            x_ticks, x_ticks * 0, c='skyblue', **Plotter.LINE_OPTS
+        )
+        self._result_line, = self._ax2.plot(
+            x_ticks, x_ticks * 0, c='slateblue', **Plotter.LINE_OPTS
+        )
+
+        self._ax1.set_title(Plotter.TITLE)
+        self._ax2.set_xlim(x_ticks.min() - 1, x_ticks.max() + 1)
+        self._ax2.set_ylim(0, 1)
+        self._ax2.set_xlabel(MeasurementFile.X_LABEL)
+
+    @property
+    def figure(self) -> Figure:
+        return self._figure
+
+    def render(self, measurement_composite, outfile, **kwargs) -> str:
+        """
+        Save the plot of a measurement composite to an image file.
+
+        :param measurement_composite: MeasurementComposite
+        :param outfile: Path of the image file
+        :param kwargs: Arguments to pass to the plot
+            Options:
+             * 'composite_title': Title for the plot
+             * 'set_1_label': Legend label for set_1
+             * 'set_2_label': Legend label for set_2
+        :return: Full path of the saved file
+        """
+        labels = (
+            kwargs.get('set_1_label', 'Set 1'),
+            kwargs.get('set_2_label', 'Set 2'),
+        )
+        if labels != self._labels:
+            self._set_1_line.set_label(labels[0])
+            self._set_2_line.set_label(labels[1])
+            self._ax1.legend(
+                bbox_to_anchor=(0., 1.0, 1., .1),
+                loc='lower left',
+                ncol=2,
+                mode="expand",
+                borderaxespad=0.,
+                framealpha=0,
+            )
+            self._labels = labels
+
+        self._ax2.set_title(
+            kwargs.get('composite_title', Plotter.AX2_TITLE)
+        )
+        # Titles and labels of each render can need a different layout
+        self._figure.tight_layout()
+
+        self._set_1_line.set_ydata(measurement_composite.set_1)
+        self._set_2_line.set_ydata(measurement_composite.set_2)
+        self._result_line.set_ydata(measurement_composite.result)
+
+        self._ax1.relim()
+        self._ax1.autoscale_view(scalex=False)
+        self._ax1.set_ylim(bottom=0)
+
+        outfile = Path(outfile).as_posix()
+        with profiler.stage('plot'):
+            self._figure.savefig(outfile)
+
+        return outfile
+
+
+def render_spectra(spectra, outfile, dpi=Renderer.DPI, **kwargs) -> str:
+    """
+    Save a plot of raw measurements to an image file, with the same layout
+    as Plotter.show().
+
+    :param spectra: List of tuples with the legend label and the data of
+                    each measurement
+    :param outfile: Path of the image file
+    :param dpi: Resolution of saved images (Default: 100)
+    :param kwargs: Arguments to pass to the plot
+        Options:
+         * 'title': Title for the plot
+    :return: Full path of the saved file
+    """
+    figure = Figure(dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+
+    for label, data in spectra:
+        ax.plot(
+            MeasurementFile.BAND_RANGE, data, label=label, **Plotter.LINE_OPTS
+        )
+    if len(spectra) > 0:
+        ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+
+    ax.set_xlabel(MeasurementFile.X_LABEL)
+    ax.set_xlim(left=MeasurementFile.MIN_WAVELENGTH)
+    ax.set_ylabel(MeasurementFile.Y_LABEL)
+    ax.set_ylim(bottom=0)
+    ax.set_title(kwargs.get('title', Plotter.TITLE))
+    figure.tight_layout()
+
+    outfile = Path(outfile).as_posix()
+    with profiler.stage('plot'):
+        figure.savefig(outfile)
+
+    return outfile
+
+
+# Renderer of this process for shared_renderer()
+_shared_renderer = None
+
+
+def shared_renderer(dpi=Renderer.DPI) -> Renderer:
+    """
+    Process wide renderer to reuse one figure across calls, i.e. in the
+    worker processes of a batch run.
+
+    :param dpi: Resolution of saved images (Default: 100)
+    :return: Renderer
+    """
+    global _shared_renderer
+    if _shared_renderer is None or _shared_renderer.figure.dpi != dpi:
+        _shared_renderer = Renderer(dpi)
+    return _shared_renderer
+
+
+def _render_job(job, dpi) -> str:
+    measurement_composite, outfile, options = job
+    return shared_renderer(dpi).render(
+        measurement_composite, outfile, **options
+    )
+
+
+def render_composites(jobs, workers=1, dpi=Renderer.DPI) -> list:
+    """
+    Render many composites with a pool of worker processes. Each process
+    reuses one figure for all its composites.
+
+    :param jobs: List of tuples with a MeasurementComposite, the path of the
+                 image file, and a dictionary with plot options for
+                 Renderer.render()
+    :param workers: Number of parallel processes (Default: 1)
+    :param dpi: Resolution of saved images (Default: 100)
+    :return: List with full path of all saved files
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        renderer = Renderer(dpi)
+        return [
+            renderer.render(composite, outfile, **options)
+            for composite, outfile, options in jobs
+        ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            partial(_render_job, dpi=dpi), jobs,
+            chunksize=max(1, len(jobs) // (workers * 4))
+        ))
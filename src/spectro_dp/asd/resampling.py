@@ -0,0 +1,226 @@
+import csv
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .measurement_file import MeasurementFile
+
+
+class BandResampler:
+    """
+    Resample spectra with the bands of the ASD to the bands of another
+    sensor, i.e. a satellite.
+
+    Each sensor band is a weighted average of the ASD bands, with the
+    weights from the spectral response of the band. The weights of all
+    sensor bands are one (sensor bands, ASD bands) matrix, so a whole stack
+    of spectra is resampled with one matrix multiplication. Values that are
+    not finite are left out and the weights of the remaining bands are
+    scaled to one.
+
+    The response is either given as a table or approximated with a Gaussian
+    from the center wavelength and full width at half maximum (FWHM) of each
+    band. Gaussian definitions for common sensors are available by name
+    with for_sensor().
+    """
+
+    # Band name: (center wavelength, FWHM) in nm, from the published band
+    # ranges of each sensor.
+    SENSORS = {
+        'landsat8': {
+            'B1': (443, 20), 'B2': (482, 65), 'B3': (562, 75),
+            'B4': (655, 50), 'B5': (865, 40), 'B6': (1610, 100),
+            'B7': (2200, 200), 'B8': (590, 180), 'B9': (1375, 30),
+        },
+        'sentinel2': {
+            'B1': (442.7, 21), 'B2': (492.4, 66), 'B3': (559.8, 36),
+            'B4': (664.6, 31), 'B5': (704.1, 15), 'B6': (740.5, 15),
+            'B7': (782.8, 20), 'B8': (832.8, 106), 'B8A': (864.7, 21),
+            'B9': (945.1, 20), 'B10': (1373.5, 31), 'B11': (1613.7, 91),
+            'B12': (2202.4, 175),
+        },
+        'modis': {
+            'B1': (645, 50), 'B2': (858.5, 35), 'B3': (469, 20),
+            'B4': (555, 20), 'B5': (1240, 20), 'B6': (1640, 24),
+            'B7': (2130, 50),
+        },
+    }
+    # Minimum sum of weights of finite values for a resampled value
+    MIN_WEIGHT = 0.5
+
+    def __init__(self, weights, band_names, centers=None) -> None:
+        """
+        :param weights: Spectral response with shape
+                        (sensor bands, ASD bands). Each row is scaled to a
+                        sum of one.
+        :param band_names: Name of each sensor band
+        :param centers: Center wavelength of each sensor band
+                        (Default: Weighted mean wavelength of each band)
+        """
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        if weights.shape[1] != MeasurementFile.BAND_COUNT:
+            raise ValueError(
+                f"Weights need {MeasurementFile.BAND_COUNT} columns, "
+                f"got {weights.shape[1]}"
+            )
+        if len(band_names) != weights.shape[0]:
+            raise ValueError(
+                f"Got {len(band_names)} band name(s) for "
+                f"{weights.shape[0]} band(s)"
+            )
+
+        total = weights.sum(axis=1, keepdims=True)
+        if (total <= 0).any():
+            raise ValueError(
+                'Each band needs a response within the ASD wavelengths'
+            )
+
+        self._weights = weights / total
+        self._band_names = list(band_names)
+        if centers is None:
+            centers = self._weights @ MeasurementFile.BAND_RANGE
+        self._centers = np.asarray(centers, dtype=np.float64)
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights
+
+    @property
+    def band_names(self) -> list:
+        return self._band_names
+
+    @property
+    def centers(self) -> np.ndarray:
+        return self._centers
+
+    def __len__(self) -> int:
+        return len(self._band_names)
+
+    @classmethod
+    def from_gaussian(cls, centers, fwhm, band_names=None) \
+            -> 'BandResampler':
+        """
+        :param centers: Center wavelength in nm of each band
+        :param fwhm: Full width at half maximum in nm of each band
+        :param band_names: Name of each band (Default: Band number)
+        :return: BandResampler
+        """
+        centers = np.asarray(centers, dtype=np.float64)[:, np.newaxis]
+        sigma = np.asarray(fwhm, dtype=np.float64)[:, np.newaxis] / \
+            (2 * np.sqrt(2 * np.log(2)))
+        weights = np.exp(
+            -0.5 * np.square((MeasurementFile.BAND_RANGE - centers) / sigma)
+        )
+        if band_names is None:
+            band_names = [str(band) for band in range(1, len(centers) + 1)]
+
+        return cls(weights, band_names, centers[:, 0])
+
+    @classmethod
+    def from_response_table(cls, table) -> 'BandResampler':
+        """
+        Load the spectral response from a CSV file with a header row. The
+        first column is the wavelength in nm and each following column the
+        response of one band, named in the header. The response is linearly
+        interpolated to the ASD bands and zero outside of the table.
+
+        :param table: Path to the CSV file
+        :return: BandResampler
+        """
+        with open(table, newline='') as infile:
+            reader = csv.reader(infile)
+            header = next(reader)
+            values = np.array(
+                [[float(value) for value in row] for row in reader if row]
+            )
+
+        wavelengths, responses = values[:, 0], values[:, 1:]
+        order = np.argsort(wavelengths)
+        weights = np.stack([
+            np.interp(
+                MeasurementFile.BAND_RANGE, wavelengths[order],
+                response[order], left=0, right=0,
+            )
+            for response in responses.T
+        ])
+
+        return cls(weights, [name.strip() for name in header[1:]])
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def for_sensor(cls, sensor) -> 'BandResampler':
+        """
+        Resampler with Gaussian responses for a sensor listed in SENSORS.
+        The resampler is created once and reused for further calls.
+
+        :param sensor: Name of the sensor
+        :return: BandResampler
+        """
+        if sensor not in cls.SENSORS:
+            raise ValueError(
+                f"Unknown sensor '{sensor}'. "
+                f"Valid options: {', '.join(cls.SENSORS)}"
+            )
+        bands = cls.SENSORS[sensor]
+        centers, fwhm = zip(*bands.values())
+
+        return cls.from_gaussian(centers, fwhm, list(bands))
+
+    @classmethod
+    def load(cls, sensor) -> 'BandResampler':
+        """
+        :param sensor: Name of a sensor in SENSORS or path to a response
+                       table (see from_response_table())
+        :return: BandResampler
+        """
+        if sensor in cls.SENSORS:
+            return cls.for_sensor(sensor)
+
+        table = Path(sensor).resolve()
+        return _load_response_table(
+            cls, table.as_posix(), table.stat().st_mtime_ns
+        )
+
+    def resample(self, spectra) -> np.ndarray:
+        """
+        :param spectra: One spectrum or array with shape (..., ASD bands)
+        :return: Array with shape (..., sensor bands)
+        """
+        spectra = np.asarray(spectra)
+        valid = np.isfinite(spectra)
+
+        if valid.all():
+            return spectra @ self._weights.T
+
+        values = np.where(valid, spectra, 0) @ self._weights.T
+        weight = valid @ self._weights.T
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(
+                weight >= self.MIN_WEIGHT, values / weight, np.nan
+            )
+
+    def resample_composite(self, composite) -> dict:
+        """
+        Band averages of a calculated MeasurementComposite. The resampled
+        result is the ratio of the resampled sets, which weights each band
+        by the measured signal like a sensor with these bands would.
+
+        :param composite: MeasurementComposite
+        :return: Dictionary with 'set_1', 'set_2' and 'result' arrays
+                 indexed by sensor band
+        """
+        set_1 = self.resample(composite.set_1)
+        set_2 = self.resample(composite.set_2)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = set_1 / set_2
+
+        return dict(set_1=set_1, set_2=set_2, result=result)
+
+
+@lru_cache(maxsize=16)
+def _load_response_table(cls, table, _modified) -> BandResampler:
+    # The modification time is part of the cache key to reload changed tables
+    return cls.from_response_table(table)
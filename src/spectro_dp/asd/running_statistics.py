@@ -0,0 +1,235 @@
+import numpy as np
+
+from .measurement_file import MeasurementFile
+
+
+class RunningStatistics:
+    """
+    Single pass per band statistics over a stream of spectra.
+
+    Spectra are added one at a time or as stacks without keeping them in
+    memory. Mean and variance use Welford's algorithm, with the parallel
+    variant by Chan et al. to add whole stacks, in double precision.
+
+    For outlier resistant means, a second pass over the spectra can
+    calculate a sigma clipped or median mean with robust_mean().
+    """
+
+    ROBUST_METHODS = ['sigma_clip', 'median']
+    # Number of spectra per chunk when adding stacks
+    CHUNK_ROWS = 1024
+    # Number of bands per chunk for the median and the sigma clipped mean
+    CHUNK_BANDS = 256
+    # Maximum number of clipping rounds of the sigma clipped mean
+    CLIP_ITERATIONS = 10
+
+    def __init__(self, band_count=MeasurementFile.BAND_COUNT) -> None:
+        """
+        :param band_count: Number of bands of each spectrum
+                           (Default: MeasurementFile.BAND_COUNT)
+        """
+        self._count = 0
+        self._mean = np.zeros(band_count, dtype=np.float64)
+        self._m2 = np.zeros(band_count, dtype=np.float64)
+        self._min = np.full(band_count, np.inf)
+        self._max = np.full(band_count, -np.inf)
+
+    @property
+    def count(self) -> int:
+        """
+        :return: Number of added spectra
+        """
+        return self._count
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._mean
+
+    @property
+    def variance(self) -> np.ndarray:
+        """
+        Population variance of all added spectra
+
+        :return: Array indexed by band
+        """
+        if self.count == 0:
+            return np.full_like(self._m2, np.nan)
+
+        return self._m2 / self.count
+
+    @property
+    def std(self) -> np.ndarray:
+        """
+        Population standard deviation of all added spectra
+
+        :return: Array indexed by band
+        """
+        return np.sqrt(self.variance)
+
+    @property
+    def min(self) -> np.ndarray:
+        return self._min
+
+    @property
+    def max(self) -> np.ndarray:
+        return self._max
+
+    def add(self, spectrum) -> None:
+        """
+        Add a single spectrum
+
+        :param spectrum: Array indexed by band
+        """
+        self._count += 1
+        delta = spectrum - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (spectrum - self._mean)
+        np.minimum(self._min, spectrum, out=self._min)
+        np.maximum(self._max, spectrum, out=self._max)
+
+    def state(self) -> dict:
+        """
+        :return: Dictionary with the count and arrays of the statistics, i.e.
+                 to save them
+        """
+        return dict(
+            count=np.int64(self._count), mean=self._mean, m2=self._m2,
+            min=self._min, max=self._max,
+        )
+
+    @classmethod
+    def from_state(cls, state) -> 'RunningStatistics':
+        """
+        :param state: Dictionary from state()
+        :return: RunningStatistics with the given statistics
+        """
+        statistics = cls(len(state['mean']))
+        statistics._count = int(state['count'])
+        statistics._mean[:] = state['mean']
+        statistics._m2[:] = state['m2']
+        statistics._min[:] = state['min']
+        statistics._max[:] = state['max']
+
+        return statistics
+
+    def transformed(self, scale, offset) -> 'RunningStatistics':
+        """
+        Statistics of the added spectra after a linear transformation
+        `spectrum * scale + offset`, i.e. a splice correction of the
+        average. Spectra added to this instance are not added to the
+        returned one.
+
+        :param scale: Scale indexed by band
+        :param offset: Offset indexed by band
+        :return: New RunningStatistics
+        """
+        statistics = RunningStatistics(len(self._mean))
+        statistics._count = self._count
+        statistics._mean[:] = self._mean * scale + offset
+        statistics._m2[:] = self._m2 * np.square(scale)
+        low = self._min * scale + offset
+        high = self._max * scale + offset
+        np.minimum(low, high, out=statistics._min)
+        np.maximum(low, high, out=statistics._max)
+
+        return statistics
+
+    def add_stack(self, spectra) -> None:
+        """
+        Add multiple spectra at once. Spectra are processed in chunks to
+        limit the memory use.
+
+        :param spectra: Array with shape (spectra, bands)
+        """
+        for start in range(0, spectra.shape[0], self.CHUNK_ROWS):
+            self._add_chunk(spectra[start:start + self.CHUNK_ROWS])
+
+    def _add_chunk(self, spectra) -> None:
+        count = spectra.shape[0]
+        mean = spectra.mean(axis=0, dtype=np.float64)
+        m2 = np.square(spectra - mean).sum(axis=0)
+
+        total = self._count + count
+        delta = mean - self._mean
+        self._mean += delta * (count / total)
+        self._m2 += m2 + np.square(delta) * (self._count * count / total)
+        self._count = total
+
+        np.minimum(self._min, spectra.min(axis=0), out=self._min)
+        np.maximum(self._max, spectra.max(axis=0), out=self._max)
+
+    def robust_mean(self, spectra, method='sigma_clip', sigma=3.0) \
+            -> np.ndarray:
+        """
+        Second pass over the same spectra that were added to calculate an
+        outlier resistant mean. Spectra are processed in chunks to limit
+        the memory use.
+
+        Methods:
+         * 'sigma_clip': Mean of all values per band within the given
+                         number of standard deviations from the median.
+                         Each value is compared to the sample standard
+                         deviation of the other values, which the value
+                         itself does not inflate. Values are clipped
+                         again with the kept values until no more are
+                         rejected.
+         * 'median': Median per band
+
+        :param spectra: Array with shape (spectra, bands)
+        :param method: Either 'sigma_clip' or 'median'
+                       (Default: sigma_clip)
+        :param sigma: Number of standard deviations to keep values
+                      with the 'sigma_clip' method (Default: 3)
+        :return: Array indexed by band
+        """
+        if method == 'median':
+            median = np.empty(spectra.shape[1], dtype=np.float64)
+            for start in range(0, spectra.shape[1], self.CHUNK_BANDS):
+                bands = slice(start, start + self.CHUNK_BANDS)
+                median[bands] = np.median(spectra[:, bands], axis=0)
+            return median
+        elif method != 'sigma_clip':
+            raise ValueError(
+                f"Unknown robust mean method '{method}'. "
+                f"Valid options: {', '.join(self.ROBUST_METHODS)}"
+            )
+
+        mean = np.empty(spectra.shape[1], dtype=np.float64)
+        for start in range(0, spectra.shape[1], self.CHUNK_BANDS):
+            bands = slice(start, start + self.CHUNK_BANDS)
+            mean[bands] = self._sigma_clip(
+                np.asarray(spectra[:, bands], dtype=np.float64), sigma
+            )
+        return mean
+
+    def _sigma_clip(self, values, sigma) -> np.ndarray:
+        """
+        :param values: Array with shape (spectra, bands)
+        :param sigma: Number of standard deviations to keep values
+        :return: Mean of the kept values per band
+        """
+        keep = np.ones(values.shape, dtype=bool)
+        for _ in range(self.CLIP_ITERATIONS):
+            count = keep.sum(axis=0)
+            median = np.nanmedian(np.where(keep, values, np.nan), axis=0)
+            # Sample variance of the other kept values of each value from
+            # the sums of the kept values, centered for precision
+            centered = np.where(keep, values - median, 0)
+            total = centered.sum(axis=0)
+            squares = np.square(centered).sum(axis=0)
+            others = count - 1
+            with np.errstate(invalid='ignore', divide='ignore'):
+                variance = (
+                    squares - np.square(centered)
+                    - np.square(total - centered) / others
+                ) / (others - 1)
+                limit = sigma * np.sqrt(np.maximum(variance, 0))
+            # At least three values are needed for the deviation of others
+            clipped = keep & (
+                (np.abs(values - median) <= limit) | (count < 3)
+            )
+            if np.array_equal(clipped, keep):
+                break
+            keep = clipped
+
+        return np.where(keep, values, 0).sum(axis=0) / keep.sum(axis=0)
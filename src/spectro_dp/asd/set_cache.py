@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .measurement_archive import file_state
+
+
+class SetCache:
+    """
+    On-disk cache of averaged measurement sets, i.e. a white reference set
+    that is used for many reflectance measurements.
+
+    Each entry is saved as one .npz file, named after a hash of the resolved
+    paths, sizes and modification times of the averaged files and the
+    averaging settings. Changing, adding or removing a file of a set gives a
+    new key, so only the changed sets are read again.
+
+    The total size of the cache is bounded. When a new entry exceeds the
+    limit, the least recently used entries are removed. Using an entry
+    updates the modification time of its file, which marks the use.
+    Failures to read or write the cache are ignored and the set is averaged
+    from the files.
+    """
+
+    CACHE_DIR = Path.home().joinpath('.cache', 'spectro_dp', 'sets')
+    # Environment variable with the path to the cache directory
+    CACHE_VARIABLE = 'SPECTRO_DP_SET_CACHE'
+    MAX_BYTES = 256 * 1024 ** 2
+    SUFFIX = '.npz'
+    # Changes with the layout of the cache entries
+    VERSION = 1
+
+    def __init__(self, directory=None, max_bytes=MAX_BYTES) -> None:
+        """
+        :param directory: Directory of the cache (Default: Value of the
+                          SPECTRO_DP_SET_CACHE environment variable or
+                          ~/.cache/spectro_dp/sets)
+        :param max_bytes: Maximum total size of all entries (Default: 256 MB)
+        """
+        if directory is None:
+            directory = os.environ.get(self.CACHE_VARIABLE, self.CACHE_DIR)
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def key(self, files, **settings) -> str:
+        """
+        :param files: List of averaged files
+        :param settings: Options that change the averaged result
+        :return: Hex digest of the file states and settings
+        """
+        entries = []
+        for file in files:
+            entries.append([
+                Path(file).resolve().as_posix(), *file_state(file)
+            ])
+
+        return hashlib.sha256(
+            json.dumps(
+                dict(version=self.VERSION, files=entries, settings=settings),
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    def entry_file(self, key) -> Path:
+        return self.directory.joinpath(f"{key}{self.SUFFIX}")
+
+    def get(self, key) -> dict:
+        """
+        :param key: Key of the entry
+        :return: Dictionary with the saved arrays or None when the key is
+                 not cached
+        """
+        entry_file = self.entry_file(key)
+        try:
+            with np.load(entry_file) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+            os.utime(entry_file)
+        except (OSError, ValueError):
+            return None
+
+        return arrays
+
+    def put(self, key, **arrays) -> None:
+        """
+        Save arrays under the given key and remove the least recently used
+        entries above the size limit.
+
+        :param key: Key of the entry
+        :param arrays: Arrays to save
+        """
+        entry_file = self.entry_file(key)
+        temp_file = entry_file.with_name(f"{entry_file.name}.{os.getpid()}")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(temp_file, 'wb') as outfile:
+                np.savez(outfile, **arrays)
+            os.replace(temp_file, entry_file)
+        except OSError:
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the total size is
+        within the limit.
+        """
+        entries = []
+        for entry_file in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = os.stat(entry_file)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry_file))
+
+        total = sum(size for _mtime, size, _file in entries)
+        for _mtime, size, entry_file in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry_file.unlink()
+            except OSError:
+                # Removed by another process
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """
+        Remove all entries
+        """
+        for entry_file in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                entry_file.unlink()
+            except OSError:
+                pass
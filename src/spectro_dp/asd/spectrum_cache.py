@@ -0,0 +1,164 @@
+import os
+import threading
+from collections import OrderedDict
+
+from . import profiler
+from .measurement_archive import file_state
+
+
+class SpectrumCache:
+    """
+    In-memory cache of the spectra of measurement files, shared by all
+    MeasurementFile and MeasurementStack reads of a process.
+
+    Scripts that create many composites over the same directory, i.e. a
+    sweep of set indexes, read each file from disk only once. Entries are
+    keyed by the absolute path, size and modification time of a file, so a
+    changed file is read again.
+
+    The total size of the cached spectra is bounded. When a new spectrum
+    exceeds the limit, the least recently used spectra are removed. Cached
+    spectra are read-only and shared by all readers.
+    """
+
+    MAX_BYTES = 64 * 1024 ** 2
+
+    def __init__(self, max_bytes=MAX_BYTES) -> None:
+        """
+        :param max_bytes: Maximum total size of all cached spectra. Zero
+                          disables the cache. (Default: 64 MB)
+        """
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value) -> None:
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: Total size of all cached spectra
+        """
+        return self._nbytes
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def statistics(self) -> dict:
+        """
+        :return: Dictionary with hits, misses, number of entries and total
+                 size in bytes
+        """
+        with self._lock:
+            return dict(
+                hits=self._hits,
+                misses=self._misses,
+                entries=len(self._entries),
+                nbytes=self._nbytes,
+            )
+
+    @staticmethod
+    def key(file) -> tuple:
+        """
+        :param file: Path to a measurement file
+        :return: Tuple of the absolute path, size and modification time
+        """
+        return (os.path.abspath(file), *file_state(file))
+
+    def get(self, key):
+        """
+        :param key: Key from key()
+        :return: Cached spectrum or None when it is not cached
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+
+        profiler.count(
+            'spectrum_cache_misses' if data is None else 'spectrum_cache_hits'
+        )
+        return data
+
+    def put(self, key, data):
+        """
+        Add a spectrum and remove the least recently used spectra above the
+        size limit. Spectra larger than the limit are not cached.
+
+        :param key: Key from key()
+        :param data: Spectrum of the file
+        :return: Read-only copy of the spectrum
+        """
+        if data.nbytes > self._max_bytes:
+            return data
+
+        data = data.copy()
+        data.setflags(write=False)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous.nbytes
+            self._entries[key] = data
+            self._nbytes += data.nbytes
+            self._evict()
+
+        return data
+
+    def clear(self) -> None:
+        """
+        Remove all spectra and reset the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def _evict(self) -> None:
+        while self._nbytes > self._max_bytes and len(self._entries) > 0:
+            _key, data = self._entries.popitem(last=False)
+            self._nbytes -= data.nbytes
+
+
+# Cache of this process for shared_spectrum_cache()
+_shared_spectrum_cache = None
+
+
+def shared_spectrum_cache() -> SpectrumCache:
+    """
+    Process wide spectrum cache used by MeasurementFile and
+    MeasurementStack. Set its max_bytes to change the memory budget, or to
+    zero to disable caching.
+
+    :return: SpectrumCache
+    """
+    global _shared_spectrum_cache
+    if _shared_spectrum_cache is None:
+        _shared_spectrum_cache = SpectrumCache()
+    return _shared_spectrum_cache
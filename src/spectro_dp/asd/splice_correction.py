@@ -0,0 +1,169 @@
+import numpy as np
+
+from .measurement_file import MeasurementFile
+
+
+class SpliceCorrection:
+    """
+    Remove the steps at the joins (splices) of the ASD detectors.
+
+    The ASD has three detectors, VNIR, SWIR1 and SWIR2, which are joined at
+    the splice wavelengths recorded in the file header (1000 and 1800 nm).
+    Each splice is the last band of the detector before the join. The
+    detectors are matched to a reference detector, by default SWIR1, using
+    the values of the two bands at each splice. Detectors further away from
+    the reference are matched to the already corrected neighbour.
+
+    Corrections are either:
+     * 'multiplicative': Scale the detector with the ratio of the bands
+     * 'additive': Shift the detector with the difference of the bands
+
+    Data is corrected in place and can be one spectrum or a stack with the
+    bands along the last axis, i.e. all files of a set before averaging.
+    """
+
+    SPLICE_WAVELENGTHS = [1000, 1800]  # in nm
+    MODES = ['multiplicative', 'additive']
+    # Detector all others are matched to, counted from the shortest
+    # wavelengths
+    REFERENCE_DETECTOR = 1
+
+    def __init__(self, splice_wavelengths=None, mode=MODES[0],
+                 reference_detector=REFERENCE_DETECTOR) -> None:
+        """
+        :param splice_wavelengths: Wavelength in nm of the last band of each
+                                   detector before a join
+                                   (Default: 1000 and 1800)
+        :param mode: Either 'multiplicative' or 'additive'
+                     (Default: multiplicative)
+        :param reference_detector: Number of the detector that is not
+                                   changed, starting at 0 (Default: 1)
+        """
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Unknown splice correction '{mode}'. "
+                f"Valid options: {', '.join(self.MODES)}"
+            )
+        if splice_wavelengths is None:
+            splice_wavelengths = self.SPLICE_WAVELENGTHS
+
+        bands = np.round(splice_wavelengths).astype(int) - \
+            MeasurementFile.MIN_WAVELENGTH
+        self._splice_bands = sorted(int(band) for band in bands)
+        if any(
+            band < 0 or band >= MeasurementFile.BAND_COUNT - 1
+            for band in self._splice_bands
+        ):
+            raise ValueError(
+                f"Splice wavelengths {list(splice_wavelengths)} are not "
+                f"within the ASD bands"
+            )
+        if not 0 <= reference_detector <= len(self._splice_bands):
+            raise ValueError(
+                f"Reference detector {reference_detector} does not exist "
+                f"with {len(self._splice_bands)} splice(s)"
+            )
+
+        self._mode = mode
+        self._reference_detector = reference_detector
+
+    @classmethod
+    def from_header(cls, header_record, **kwargs) -> 'SpliceCorrection':
+        """
+        Correction with the splice wavelengths of a file header. Headers
+        without splice wavelengths use the default wavelengths.
+
+        :param header_record: Record with the fields of
+                              MeasurementHeader.DTYPE
+        :param kwargs: Options for the correction, see __init__()
+        :return: SpliceCorrection
+        """
+        wavelengths = [
+            float(header_record[field])
+            for field in ['splice1_wavelength', 'splice2_wavelength']
+        ]
+        if not all(
+            MeasurementFile.MIN_WAVELENGTH < wavelength <
+            MeasurementFile.MAX_WAVELENGTH
+            for wavelength in wavelengths
+        ):
+            wavelengths = None
+
+        return cls(wavelengths, **kwargs)
+
+    @property
+    def splice_bands(self) -> list:
+        """
+        :return: Band index of the last band before each join
+        """
+        return self._splice_bands
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    def apply(self, data) -> np.ndarray:
+        """
+        Correct the data in place.
+
+        :param data: One spectrum or stack of spectra with the bands along
+                     the last axis
+        :return: The corrected data
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for detector, target_band, detector_band in self._joins():
+                values = data[..., detector]
+                target = data[..., target_band, np.newaxis]
+                source = data[..., detector_band, np.newaxis]
+                # Only the (spectra, 1) adjustment is a new array
+                if self._mode == 'multiplicative':
+                    np.multiply(values, target / source, out=values)
+                else:
+                    np.add(values, target - source, out=values)
+
+        return data
+
+    def adjustment(self, spectrum) -> tuple:
+        """
+        Per band scale and offset of the correction of one spectrum, i.e.
+        to correct statistics of the spectra that were averaged to it. The
+        corrected spectrum is `spectrum * scale + offset`.
+
+        :param spectrum: Array indexed by band
+        :return: Tuple with the scale and offset arrays indexed by band
+        """
+        corrected = np.array(spectrum, dtype=np.float64)
+        scale = np.ones_like(corrected)
+        offset = np.zeros_like(corrected)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for detector, target_band, detector_band in self._joins():
+                # Values of single bands are copies, not views
+                target = corrected[target_band]
+                source = corrected[detector_band]
+                if self._mode == 'multiplicative':
+                    factor = target / source
+                    corrected[detector] *= factor
+                    scale[detector] *= factor
+                else:
+                    shift = target - source
+                    corrected[detector] += shift
+                    offset[detector] += shift
+
+        return scale, offset
+
+    def _joins(self) -> list:
+        """
+        :return: List with the bands of each detector, the band it is
+                 matched to, and its own band at the join
+        """
+        reference = self._reference_detector
+        # Detectors are corrected starting next to the reference, so each
+        # join uses the corrected values of the neighbour
+        return [
+            (slice(None, band + 1), band + 1, band)
+            for band in reversed(self._splice_bands[:reference])
+        ] + [
+            (slice(band + 1, None), band, band + 1)
+            for band in self._splice_bands[reference:]
+        ]
@@ -0,0 +1,300 @@
+from pathlib import Path
+
+import click
+import numpy as np
+
+from .measurement_file import MeasurementFile
+from .measurement_header import MeasurementHeader
+from .profiler import profile_options
+
+
+class SyntheticCampaign:
+    """
+    Write synthetic ASD measurement files, i.e. to benchmark the processing
+    at scales that are not available with recorded sample files.
+
+    Each file has a valid header and 2151 bands. The spectra are modelled
+    as a solar irradiance shape with atmospheric absorption bands for up
+    looking measurements, multiplied with a snow reflectance curve for down
+    looking measurements. Each measurement gets random noise and steps at
+    the detector splits.
+
+    A campaign is written as one directory per site with albedo sequences
+    of down and up looking measurements, numbered like the files recorded
+    by the instrument.
+    """
+
+    FILE_PREFIX = 'synthetic'
+    SITE_PREFIX = 'site_'
+    SEQUENCE_COUNT = 10
+    # Highest digital number of up looking measurements
+    MAX_DN = 20000
+    # Band indices of the last band of the VNIR and SWIR1 detectors
+    DETECTOR_SPLITS = [650, 1450]
+    SOLAR_TEMPERATURE = 5778  # in Kelvin
+    # Center, width and depth of atmospheric absorption bands in nm
+    ATMOSPHERE_ABSORPTION = [
+        (760, 5, 0.6), (940, 30, 0.5), (1140, 40, 0.5),
+        (1400, 60, 0.95), (1900, 80, 0.95),
+    ]
+    # Center, width and depth of snow absorption features in nm
+    SNOW_ABSORPTION = [
+        (1030, 60, 0.25), (1260, 60, 0.4), (1500, 120, 0.9),
+        (2000, 150, 0.95),
+    ]
+    SNOW_ALBEDO = 0.95
+    START_TIME = np.datetime64('2021-03-17T11:00:00')
+
+    def __init__(self, noise=0.01, split_step=0.02, seed=None) -> None:
+        """
+        :param noise: Relative standard deviation of the random noise of each
+                      band (Default: 0.01)
+        :param split_step: Relative step between the detectors at each split
+                           (Default: 0.02)
+        :param seed: Seed for the random numbers (Default: None)
+        """
+        self.noise = noise
+        self.split_step = split_step
+        self._random = np.random.default_rng(seed)
+        self._irradiance = self.irradiance()
+        self._reflectance = self.snow_reflectance()
+
+    @classmethod
+    def irradiance(cls) -> np.ndarray:
+        """
+        :return: Shape of up looking measurements indexed by band
+        """
+        wavelength = MeasurementFile.BAND_RANGE * 1e-9
+        # Planck's law with constants h * c / k and the peak normalized
+        planck = 1 / (
+            wavelength ** 5 *
+            np.expm1(0.014388 / (wavelength * cls.SOLAR_TEMPERATURE))
+        )
+        planck /= planck.max()
+
+        return cls.MAX_DN * planck * cls._absorption(cls.ATMOSPHERE_ABSORPTION)
+
+    @classmethod
+    def snow_reflectance(cls) -> np.ndarray:
+        """
+        :return: Reflectance of snow indexed by band
+        """
+        return cls.SNOW_ALBEDO * cls._absorption(cls.SNOW_ABSORPTION)
+
+    @staticmethod
+    def _absorption(features) -> np.ndarray:
+        transmission = np.ones(MeasurementFile.BAND_COUNT)
+        for center, width, depth in features:
+            transmission *= 1 - depth * np.exp(
+                -0.5 * ((MeasurementFile.BAND_RANGE - center) / width) ** 2
+            )
+        return transmission
+
+    def header(self, time, comments='') -> bytes:
+        """
+        :param time: Acquisition time as numpy.datetime64
+        :param comments: Text for the comment field of the header
+        :return: Bytes of a valid file header
+        """
+        header = np.zeros(1, dtype=MeasurementHeader.DTYPE)
+        header['signature'] = b'ASD'
+        header['comments'] = comments.encode(MeasurementFile.HEADER_DECODE)
+
+        time = np.datetime64(time, 's')
+        date = time.astype('datetime64[D]')
+        month = date.astype('datetime64[M]')
+        year = month.astype('datetime64[Y]')
+        seconds = (time - date).astype(int)
+        header['when'] = [
+            seconds % 60, seconds // 60 % 60, seconds // 3600,
+            (date - month).astype(int) + 1,
+            (month - year).astype(int),
+            year.astype(int) + 70,
+            0, 0, 0,
+        ]
+
+        header['program_version'] = 99
+        header['file_version'] = 68
+        header['dc_corrected'] = 1
+        header['channel_1_wavelength'] = MeasurementFile.MIN_WAVELENGTH
+        header['wavelength_step'] = 1
+        header['channels'] = MeasurementFile.BAND_COUNT
+        header['integration_time'] = 17
+        header['calibration'] = 3
+        header['instrument_number'] = 18020
+        header['y_max'] = 65535
+        header['x_min'] = MeasurementFile.MIN_WAVELENGTH
+        header['x_max'] = MeasurementFile.MAX_WAVELENGTH
+        header['bits'] = 16
+        header['dc_count'] = 100
+        header['reference_count'] = 100
+        header['sample_count'] = 20
+        header['instrument'] = 4
+        header['splice1_wavelength'] = MeasurementFile.BAND_RANGE[
+            self.DETECTOR_SPLITS[0]
+        ]
+        header['splice2_wavelength'] = MeasurementFile.BAND_RANGE[
+            self.DETECTOR_SPLITS[1]
+        ]
+
+        return header.tobytes()
+
+    def spectrum(self, up_looking=False) -> np.ndarray:
+        """
+        :param up_looking: Spectrum of an up looking measurement instead of
+                           a down looking snow surface (Default: False)
+        :return: Array with digital numbers indexed by band
+        """
+        spectrum = self._irradiance.copy()
+        if not up_looking:
+            spectrum *= self._reflectance
+
+        spectrum *= 1 + self._random.normal(
+            scale=self.noise, size=spectrum.size
+        )
+        for split in self.DETECTOR_SPLITS:
+            spectrum[split + 1:] *= 1 + self.split_step * \
+                self._random.uniform(0.5, 1.5)
+
+        return spectrum.astype(MeasurementFile.DATA_TYPE)
+
+    def write_file(self, filepath, time, up_looking=False,
+                   truncated=False) -> Path:
+        """
+        :param filepath: Path of the file to write
+        :param time: Acquisition time as numpy.datetime64
+        :param up_looking: Write an up looking measurement (Default: False)
+        :param truncated: Write only half of the bands, as for a file that
+                          is still being written or was cut off
+                          (Default: False)
+        :return: Path of the written file
+        """
+        content = self.header(time) + self.spectrum(up_looking).tobytes()
+        if truncated:
+            content = content[:(MeasurementFile.FILE_BYTES +
+                                MeasurementFile.HEADER_BYTES) // 2]
+
+        filepath = Path(filepath)
+        filepath.write_bytes(content)
+
+        return filepath
+
+    def write_site(self, directory, sequences, file_prefix=FILE_PREFIX,
+                   missing=0.0, truncated=0.0, start_time=START_TIME) \
+            -> list:
+        """
+        Write albedo sequences for one site. Each sequence has
+        SEQUENCE_COUNT down looking measurements followed by the same count
+        of up looking ones, numbered continuously with the file extension.
+
+        :param directory: Directory of the site, created if missing
+        :param sequences: Number of albedo sequences
+        :param file_prefix: Prefix of the filename for all measurements
+        :param missing: Fraction of files to skip (Default: 0)
+        :param truncated: Fraction of files to truncate (Default: 0)
+        :param start_time: Acquisition time of the first file
+        :return: List of written files
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        file_count = sequences * 2 * self.SEQUENCE_COUNT
+        skip = self._random.random(file_count) < missing
+        cut = self._random.random(file_count) < truncated
+
+        files = []
+        for number in range(file_count):
+            if skip[number]:
+                continue
+
+            files.append(self.write_file(
+                directory.joinpath(f"{file_prefix}.{number:03d}"),
+                start_time + np.timedelta64(number * 2, 's'),
+                up_looking=number // self.SEQUENCE_COUNT % 2 == 1,
+                truncated=cut[number],
+            ))
+
+        return files
+
+    def write_campaign(self, directory, file_count, sites=1, **kwargs) \
+            -> list:
+        """
+        Write a campaign of the given size, split evenly over the sites.
+
+        :param directory: Root directory of the campaign
+        :param file_count: Total number of files before removing missing
+                           files. Rounded up to full albedo sequences.
+        :param sites: Number of site directories (Default: 1)
+        :param kwargs: Options for write_site()
+        :return: List of written files
+        """
+        sequence_files = 2 * self.SEQUENCE_COUNT
+        sequences = -(-file_count // sequence_files)
+
+        files = []
+        for site in range(sites):
+            site_sequences = sequences // sites + (
+                1 if site < sequences % sites else 0
+            )
+            if site_sequences == 0:
+                continue
+
+            files += self.write_site(
+                Path(directory).joinpath(f"{self.SITE_PREFIX}{site:03d}"),
+                site_sequences, **kwargs
+            )
+
+        return files
+
+
+@click.command(
+    help='Write a campaign of synthetic ASD measurement files, i.e. for '
+         'benchmarks.'
+)
+@click.option(
+    '-o', '--output-dir',
+    prompt=True, type=click.Path(file_okay=False),
+    help='Directory to write the site directories to.'
+)
+@click.option(
+    '-n', '--file-count',
+    default=1000, type=click.IntRange(min=1),
+    help='Total number of files. (Default: 1000)'
+)
+@click.option(
+    '--sites',
+    default=1, type=click.IntRange(min=1),
+    help='Number of sites to split the files over. (Default: 1)'
+)
+@click.option(
+    '--noise',
+    default=0.01, type=click.FloatRange(min=0),
+    help='Relative noise of each band. (Default: 0.01)'
+)
+@click.option(
+    '--split-step',
+    default=0.02, type=float,
+    help='Relative step at the detector splits. (Default: 0.02)'
+)
+@click.option(
+    '--missing',
+    default=0.0, type=click.FloatRange(0, 1),
+    help='Fraction of files to leave out. (Default: 0)'
+)
+@click.option(
+    '--truncated',
+    default=0.0, type=click.FloatRange(0, 1),
+    help='Fraction of truncated files. (Default: 0)'
+)
+@click.option(
+    '--seed',
+    default=None, type=int,
+    help='Seed for the random numbers.'
+)
+@profile_options
+def cli(output_dir, file_count, sites, noise, split_step, missing,
+        truncated, seed):
+    files = SyntheticCampaign(noise, split_step, seed).write_campaign(
+        output_dir, file_count, sites, missing=missing, truncated=truncated
+    )
+    print(f"Wrote {len(files)} file(s) to:\n  {Path(output_dir).as_posix()}")
@@ -0,0 +1,38 @@
+import time
+
+
+def watch_composite(composite, on_update, poll_interval=1.0, timeout=None):
+    """
+    Watch the input directory of a composite for new measurement files and
+    update the result as files are written by the spectrometer. The directory
+    is checked in the given interval until all files of both sets are read,
+    the timeout passed without an update of the result, or the watch is
+    interrupted with Ctrl+C.
+
+    :param composite: MeasurementComposite to update
+    :param on_update: Function called with the composite after each update
+                      of the result
+    :param poll_interval: Seconds between checks for new files (Default: 1)
+    :param timeout: Seconds to wait for an update before stopping.
+                    (Default: None; wait until all files are read)
+    :return: True if all files of the composite were read
+    """
+    last_update = time.monotonic()
+
+    try:
+        while True:
+            if composite.update():
+                last_update = time.monotonic()
+                on_update(composite)
+
+            if composite.complete:
+                break
+            if timeout is not None and \
+                    time.monotonic() - last_update > timeout:
+                break
+
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+    return composite.complete
@@ -1,9 +1,11 @@
-from pathlib import PurePath
-
 import click
 
 from .measurement_composite import MeasurementFile
+from .measurement_index import MeasurementIndex
 from .plotter import Plotter
+from .profiler import profile_options
+
+TITLE = 'White References'
 
 
 @click.command(
@@ -30,36 +32,60 @@ from .plotter import Plotter
     default=10, type=int,
     help='Total count of white reference measurements. (Default: 10)'
 )
+@click.option(
+    '--plot-out',
+    type=click.Path(dir_okay=False), default=None,
+    help='Save the plot of the white references to this image file instead '
+         'of showing it. The format is taken from the extension, '
+         'e.g. .png or .svg',
+)
 @click.option(
     '--debug',
     is_flag=True, default=False,
     help='Print information of processed files while processing',
 )
+@profile_options
 def cli(
         input_dir, file_prefix,
         wr_index, wr_count,
-        debug
+        plot_out, debug
 ):
     try:
-        input_dir = PurePath(input_dir)
-        file_suffix = '{file_index:03d}'
-        file_base = file_prefix + '.' + file_suffix
+        files = MeasurementIndex(input_dir).files(
+            file_prefix, wr_index, wr_count, exact=True
+        )
+        found = {MeasurementIndex.file_number(file.name) for file in files}
+        missing = [
+            f"{file_prefix}.{file_number:03d}"
+            for file_number in range(wr_index, wr_index + wr_count)
+            if file_number not in found
+        ]
+        if len(missing) > 0:
+            raise FileNotFoundError(
+                f"White reference file(s) not found: {', '.join(missing)}"
+            )
 
         if debug:
             print("Processing:")
 
-        with Plotter.show(title='White References') as plt:
-            for file_index in range(wr_index, wr_index + wr_count):
-                file = input_dir.joinpath(
-                    file_base.format(file_index=file_index)
-                )
+        spectra = []
+        for file in files:
+            if debug:
+                print(f' - {file.as_posix()}')
+            spectra.append((file.suffix[1:], MeasurementFile(file).data))
 
-                if debug:
-                    print(f' - {file.as_posix()}')
+        if plot_out is not None:
+            from .renderer import render_spectra
+            print(
+                f"Plot saved to:\n  "
+                f"{render_spectra(spectra, plot_out, title=TITLE)}"
+            )
+            return
 
+        with Plotter.show(title=TITLE) as plt:
+            for label, data in spectra:
                 plt.plot(
-                    MeasurementFile.BAND_RANGE, MeasurementFile(file).data,
-                    label=file_suffix.format(file_index=file_index), lw=1
+                    MeasurementFile.BAND_RANGE, data, label=label, lw=1
                 )
 
             plt.legend(
@@ -67,5 +93,5 @@ def cli(
                 bbox_to_anchor=(1.2, 1)
             )
 
-    except FileNotFoundError as fnfe:
-        print(f"ERROR: {fnfe}")
+    except (FileNotFoundError, ValueError) as error:
+        print(f"ERROR: {error}")
@@ -0,0 +1,10 @@
+from .library import SsaIceLibrary
+from .lookup_table import LookupTable
+from .ssa_ice import SsaIce, run_ssa_ice
+
+__all__ = [
+    'LookupTable',
+    'SsaIce',
+    'SsaIceLibrary',
+    'run_ssa_ice',
+]
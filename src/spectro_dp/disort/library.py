@@ -0,0 +1,96 @@
+import ctypes
+import threading
+
+import numpy as np
+
+from .ssa_ice import SsaIce
+
+
+class SsaIceLibrary(SsaIce):
+    """
+    Run the `ssa_ice` model in the Python process with a shared library of
+    the model, which is called with ctypes. The inputs and results are
+    passed as arrays in memory without starting a process or reading and
+    writing text files.
+
+    The library is built with the `compile_lib.sh` script of the DISORT
+    directory when it is missing or older than any of the model sources.
+    DISORT keeps state between calls, so calls are run one at a time.
+    """
+
+    EXECUTABLE = 'libssa_ice.so'
+    BUILD_SCRIPT = 'compile_lib.sh'
+    FUNCTION = 'ssa_ice_albedo'
+    INPUT_TYPE = np.float32
+
+    # Loaded libraries by path
+    _libraries = {}
+    _run_lock = threading.Lock()
+
+    def __init__(self, directory=None, quiet=True) -> None:
+        """
+        :param directory: Path to the DISORT directory with the model sources
+                          (Default: see SsaIce)
+        :param quiet: Skip the banner DISORT prints with each run. Errors
+                      and warnings of DISORT are still printed.
+                      (Default: True)
+        """
+        super().__init__(directory)
+        self._quiet = quiet
+
+    def load(self) -> ctypes.CDLL:
+        """
+        Build the library when it is stale and load it.
+
+        :return: Loaded library
+        """
+        path = self.build().as_posix()
+
+        if path not in self._libraries:
+            library = ctypes.CDLL(path)
+            array = np.ctypeslib.ndpointer(
+                dtype=self.INPUT_TYPE, ndim=2, flags='C_CONTIGUOUS'
+            )
+            function = getattr(library, self.FUNCTION)
+            function.argtypes = [
+                ctypes.c_int, ctypes.c_int, array, array,
+                ctypes.c_float, ctypes.c_int,
+                np.ctypeslib.ndpointer(
+                    dtype=self.INPUT_TYPE, ndim=2,
+                    flags='C_CONTIGUOUS, WRITEABLE'
+                ),
+            ]
+            function.restype = None
+            self._libraries[path] = library
+
+        return self._libraries[path]
+
+    def run(self, asymmetry, ssa, solar_zenith) -> np.ndarray:
+        """
+        Run the model for all bands.
+
+        :param asymmetry: Asymmetry parameter with shape (bands, GRAIN_SIZES)
+        :param ssa: Single scattering albedo with shape (bands, GRAIN_SIZES)
+        :param solar_zenith: Solar zenith angle in degrees
+        :return: Albedo with shape (bands, GRAIN_SIZES)
+        """
+        asymmetry = np.ascontiguousarray(asymmetry, dtype=self.INPUT_TYPE)
+        ssa = np.ascontiguousarray(ssa, dtype=self.INPUT_TYPE)
+        if asymmetry.shape != ssa.shape:
+            raise ValueError(
+                f"Asymmetry {asymmetry.shape} and SSA {ssa.shape} need the "
+                f"same shape"
+            )
+
+        albedo = np.empty_like(asymmetry)
+        # Fortran arrays are column major, which makes the Fortran shape
+        # (grain sizes, bands) the same memory layout as the NumPy shape
+        # (bands, grain sizes).
+        function = getattr(self.load(), self.FUNCTION)
+        with self._run_lock:
+            function(
+                asymmetry.shape[0], asymmetry.shape[1], asymmetry, ssa,
+                solar_zenith, int(self._quiet), albedo,
+            )
+
+        return albedo
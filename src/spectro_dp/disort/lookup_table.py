@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .ssa_ice import SsaIce, run_ssa_ice
+
+
+class LookupTable:
+    """
+    Precomputed albedo of the DISORT `ssa_ice` model for a range of solar
+    zenith angles.
+
+    The albedo is stored as a cube with the shape (zenith, grain size, band)
+    in a .npy file, which is read as memory map. Files are named after a hash
+    of the asymmetry and single scattering albedo inputs, the zenith angles,
+    the model sources and the backend that ran the model, so building a
+    table with the same inputs again reads the saved file instead of running
+    the model. The executable and the shared library of the model only agree
+    within the single precision of the model, so each has its own tables.
+
+    Queries for any zenith angle within the range of the table are linearly
+    interpolated between the two closest angles.
+    """
+
+    # Solar zenith angles in degrees of a table
+    ZENITH_ANGLES = np.arange(0, 90, 5, dtype=np.float64)
+    CACHE_DIR = Path.home().joinpath('.cache', 'spectro_dp', 'disort')
+    # Environment variable with the path to the cache directory
+    CACHE_VARIABLE = 'SPECTRO_DP_LUT_DIR'
+    DATA_TYPE = np.float32
+    # Model runs with the `ssa_ice` executable or the shared library
+    # (SsaIceLibrary)
+    BACKENDS = ['executable', 'library']
+
+    def __init__(self, albedo, zenith_angles, key=None) -> None:
+        """
+        :param albedo: Array with shape (zenith, grain size, band)
+        :param zenith_angles: Solar zenith angles in degrees of the first
+                              axis, in increasing order
+        :param key: Hash of the inputs (Default: None)
+        """
+        self._albedo = albedo
+        self._zenith_angles = np.asarray(zenith_angles, dtype=np.float64)
+        self._key = key
+
+        if self._albedo.shape[0] != self._zenith_angles.size:
+            raise ValueError(
+                f"Albedo has {self._albedo.shape[0]} zenith angle(s), "
+                f"but {self._zenith_angles.size} angle(s) were given"
+            )
+        if (np.diff(self._zenith_angles) <= 0).any():
+            raise ValueError('Zenith angles must be in increasing order')
+
+    @property
+    def albedo(self) -> np.ndarray:
+        return self._albedo
+
+    @property
+    def zenith_angles(self) -> np.ndarray:
+        return self._zenith_angles
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    @property
+    def grain_size_count(self) -> int:
+        return self._albedo.shape[1]
+
+    @property
+    def band_count(self) -> int:
+        return self._albedo.shape[2]
+
+    @staticmethod
+    def cache_key(asymmetry, ssa, zenith_angles, model_digest,
+                  backend=BACKENDS[0]) -> str:
+        """
+        :param asymmetry: Asymmetry parameter with shape (bands, grain sizes)
+        :param ssa: Single scattering albedo with shape (bands, grain sizes)
+        :param zenith_angles: Solar zenith angles in degrees
+        :param model_digest: Hash of the model sources and settings
+        :param backend: Either 'executable' or 'library', see BACKENDS
+                        (Default: executable)
+        :return: Hex digest of all inputs
+        """
+        digest = hashlib.sha256()
+        for values in [asymmetry, ssa]:
+            values = np.ascontiguousarray(values, dtype=np.float32)
+            digest.update(str(values.shape).encode())
+            digest.update(values.tobytes())
+        digest.update(
+            np.asarray(zenith_angles, dtype=np.float64).tobytes()
+        )
+        digest.update(model_digest.encode())
+        digest.update(backend.encode())
+
+        return digest.hexdigest()
+
+    @classmethod
+    def cache_dir(cls, cache_dir=None) -> Path:
+        """
+        :param cache_dir: Directory to use (Default: Value of the
+                          SPECTRO_DP_LUT_DIR environment variable or
+                          ~/.cache/spectro_dp/disort)
+        :return: Directory of the saved tables
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get(cls.CACHE_VARIABLE, cls.CACHE_DIR)
+        return Path(cache_dir)
+
+    @classmethod
+    def build(cls, asymmetry, ssa, zenith_angles=ZENITH_ANGLES,
+              cache_dir=None, workers=1, directory=None, in_process=False) \
+            -> 'LookupTable':
+        """
+        Load the table for the given inputs from the cache, or run the model
+        for all zenith angles and save the table.
+
+        :param asymmetry: Asymmetry parameter with shape (bands, grain sizes)
+        :param ssa: Single scattering albedo with shape (bands, grain sizes)
+        :param zenith_angles: Solar zenith angles in degrees
+                              (Default: 0 to 85 in steps of 5)
+        :param cache_dir: Directory of the saved tables (Default: see
+                          cache_dir())
+        :param workers: Number of parallel model processes (Default: 1)
+        :param directory: Path to the DISORT directory (Default: see SsaIce)
+        :param in_process: Run the model with the shared library in this
+                           process (Default: False)
+        :return: LookupTable
+        """
+        zenith_angles = np.sort(np.asarray(zenith_angles, dtype=np.float64))
+        key = cls.cache_key(
+            asymmetry, ssa, zenith_angles,
+            SsaIce(directory).source_digest(),
+            cls.BACKENDS[1] if in_process else cls.BACKENDS[0],
+        )
+        table_file = cls.cache_dir(cache_dir).joinpath(f"{key}.npy")
+
+        if table_file.exists():
+            return cls.load(table_file)
+
+        albedo = np.stack([
+            run_ssa_ice(
+                asymmetry, ssa, zenith, workers=workers, directory=directory,
+                in_process=in_process,
+            ).T
+            for zenith in zenith_angles
+        ]).astype(cls.DATA_TYPE)
+
+        table = cls(albedo, zenith_angles, key)
+        table.save(table_file)
+
+        return table
+
+    @classmethod
+    def from_files(cls, asymmetry_file, ssa_file, **kwargs) -> 'LookupTable':
+        """
+        Build the table from input files of the `ssa_ice` executable, with
+        one line per band and one value per grain size.
+
+        :param asymmetry_file: Path to the asymmetry parameter file
+        :param ssa_file: Path to the single scattering albedo file
+        :param kwargs: Options for build()
+        :return: LookupTable
+        """
+        return cls.build(
+            np.loadtxt(asymmetry_file, dtype=np.float32, ndmin=2),
+            np.loadtxt(ssa_file, dtype=np.float32, ndmin=2),
+            **kwargs
+        )
+
+    @classmethod
+    def load(cls, table_file) -> 'LookupTable':
+        """
+        :param table_file: Path to a saved table
+        :return: LookupTable with the albedo as read-only memory map
+        """
+        table_file = Path(table_file)
+        with open(table_file.with_suffix('.json')) as infile:
+            settings = json.load(infile)
+
+        return cls(
+            np.load(table_file, mmap_mode='r'),
+            settings['zenith_angles'],
+            settings['key'],
+        )
+
+    def save(self, table_file) -> Path:
+        """
+        Save the albedo as .npy file and the zenith angles with the key to a
+        .json file of the same name.
+
+        :param table_file: Path of the .npy file
+        :return: Path of the saved file
+        """
+        table_file = Path(table_file)
+        table_file.parent.mkdir(parents=True, exist_ok=True)
+
+        settings_file = table_file.with_suffix('.json')
+        with open(settings_file, 'w') as outfile:
+            json.dump(
+                dict(
+                    key=self.key,
+                    zenith_angles=self.zenith_angles.tolist(),
+                    shape=list(self.albedo.shape),
+                ),
+                outfile
+            )
+
+        # The albedo is written last, since its file marks a saved table
+        temp_file = table_file.with_name(table_file.name + '.tmp')
+        with open(temp_file, 'wb') as outfile:
+            np.save(outfile, self.albedo)
+        os.replace(temp_file, table_file)
+
+        return table_file
+
+    def interpolate(self, solar_zenith) -> np.ndarray:
+        """
+        Albedo for the given solar zenith angles, linearly interpolated
+        between the angles of the table.
+
+        :param solar_zenith: One angle or an array of angles in degrees
+        :return: Array with shape (grain size, band) for one angle or
+                 (angles, grain size, band) for an array of angles
+        """
+        zenith = np.asarray(solar_zenith, dtype=np.float64)
+        angles = zenith.reshape(-1)
+
+        if (angles < self.zenith_angles[0]).any() or \
+                (angles > self.zenith_angles[-1]).any():
+            raise ValueError(
+                f"Solar zenith outside of the table range "
+                f"{self.zenith_angles[0]} to {self.zenith_angles[-1]}"
+            )
+
+        if self.zenith_angles.size == 1:
+            albedo = np.repeat(self.albedo[:1], angles.size, axis=0)
+            return albedo[0] if zenith.ndim == 0 else albedo
+
+        lower = np.clip(
+            np.searchsorted(self.zenith_angles, angles, side='right') - 1,
+            0, self.zenith_angles.size - 2
+        )
+        weight = (
+            (angles - self.zenith_angles[lower]) /
+            (self.zenith_angles[lower + 1] - self.zenith_angles[lower])
+        ).astype(self.DATA_TYPE)[:, np.newaxis, np.newaxis]
+
+        albedo = self.albedo[lower] * (1 - weight) + \
+            self.albedo[lower + 1] * weight
+
+        return albedo[0] if zenith.ndim == 0 else albedo
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where builds are only locked per process
+    fcntl = None
+
+
+class SsaIce:
+    """
+    Manage the `ssa_ice` executable of the DISORT model, which calculates
+    the snow albedo for all grain sizes of each band from the asymmetry
+    parameter and single scattering albedo of pure ice.
+
+    The executable is built with the `compile.sh` script of the DISORT
+    directory when it is missing or older than any of the model sources.
+    Builds hold a lock file in the DISORT directory, so processes that use
+    the same directory build each target only once and one at a time.
+    Each run uses a separate temporary directory, since the model always
+    writes its results to `albedo.csv` in the working directory.
+    """
+
+    EXECUTABLE = 'ssa_ice'
+    BUILD_SCRIPT = 'compile.sh'
+    INPUT_FILES = dict(asymmetry='asymmetry.txt', ssa='ssa.txt')
+    OUTPUT_FILE = 'albedo.csv'
+    # Number of grain sizes for each band
+    GRAIN_SIZES = 148
+    # Environment variable with the path to the DISORT directory
+    DIRECTORY_VARIABLE = 'SPECTRO_DP_DISORT'
+    # Patterns of the model sources to check for a stale executable
+    SOURCES = ['*.f90', '*.F90', '*.sh', 'disort-*/*.f']
+    # Input file format that keeps the single precision of the model
+    INPUT_FORMAT = '%.8e'
+    # Lock file of the build in the DISORT directory
+    LOCK_FILE = '.{executable}.lock'
+
+    _build_lock = threading.Lock()
+
+    def __init__(self, directory=None) -> None:
+        """
+        :param directory: Path to the DISORT directory with the model sources
+                          (Default: Value of the SPECTRO_DP_DISORT environment
+                          variable)
+        """
+        if directory is None:
+            directory = os.environ.get(self.DIRECTORY_VARIABLE)
+        if directory is None:
+            raise FileNotFoundError(
+                f"No DISORT directory given. Pass the DISORT directory of the "
+                f"spectro_dp sources or set the {self.DIRECTORY_VARIABLE} "
+                f"environment variable to it."
+            )
+        self._directory = Path(directory)
+
+        if not self._directory.joinpath(self.BUILD_SCRIPT).exists():
+            raise FileNotFoundError(
+                f"No DISORT sources found in {self._directory.as_posix()}. "
+                f"Set the {self.DIRECTORY_VARIABLE} environment variable to "
+                f"the DISORT directory."
+            )
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def executable(self) -> Path:
+        return self._directory.joinpath(self.EXECUTABLE)
+
+    @property
+    def lock_file(self) -> Path:
+        return self._directory.joinpath(
+            self.LOCK_FILE.format(executable=self.EXECUTABLE)
+        )
+
+    def sources(self) -> list:
+        """
+        :return: List of all model source files
+        """
+        return [
+            source
+            for pattern in self.SOURCES
+            for source in self._directory.glob(pattern)
+        ]
+
+    def source_digest(self) -> str:
+        """
+        Hash of the content of all model sources, which include the model
+        settings in `ssa_ice.f90`.
+
+        :return: Hex digest
+        """
+        digest = hashlib.sha256()
+        for source in sorted(
+                self.sources(), key=lambda path: path.relative_to(
+                    self._directory).as_posix()
+        ):
+            digest.update(
+                source.relative_to(self._directory).as_posix().encode()
+            )
+            digest.update(source.read_bytes())
+
+        return digest.hexdigest()
+
+    def is_stale(self) -> bool:
+        """
+        :return: True if the executable is missing or older than any source
+        """
+        if not self.executable.exists():
+            return True
+
+        built = self.executable.stat().st_mtime_ns
+        return any(
+            source.stat().st_mtime_ns > built for source in self.sources()
+        )
+
+    def build(self, force=False) -> Path:
+        """
+        Compile the executable with the build script, when it is stale.
+        Other threads and processes wait for a running build of the same
+        executable to finish.
+
+        :param force: Build even if the executable is up to date
+                      (Default: False)
+        :return: Path of the executable
+        """
+        with self._build_lock, open(self.lock_file, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if force or self.is_stale():
+                process = subprocess.run(
+                    ['bash', self.BUILD_SCRIPT], cwd=self._directory,
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                    text=True,
+                )
+                if process.returncode != 0 or not self.executable.exists():
+                    raise RuntimeError(
+                        f"Building {self.EXECUTABLE} failed:\n"
+                        f"{process.stdout}"
+                    )
+
+        return self.executable
+
+    def run(self, asymmetry, ssa, solar_zenith) -> np.ndarray:
+        """
+        Run the model once in a temporary directory.
+
+        :param asymmetry: Asymmetry parameter with shape (bands, GRAIN_SIZES)
+        :param ssa: Single scattering albedo with shape (bands, GRAIN_SIZES)
+        :param solar_zenith: Solar zenith angle in degrees
+        :return: Albedo with shape (bands, GRAIN_SIZES)
+        """
+        with tempfile.TemporaryDirectory(prefix='ssa_ice_') as run_dir:
+            run_dir = Path(run_dir)
+            # File names are relative since the model limits the length
+            # of paths
+            for name, values in dict(asymmetry=asymmetry, ssa=ssa).items():
+                np.savetxt(
+                    run_dir.joinpath(self.INPUT_FILES[name]), values,
+                    fmt=self.INPUT_FORMAT,
+                )
+
+            process = subprocess.run(
+                [
+                    self.executable.as_posix(),
+                    '--asymmetry', self.INPUT_FILES['asymmetry'],
+                    '--ssa', self.INPUT_FILES['ssa'],
+                    '--solar-zenith', str(float(solar_zenith)),
+                ],
+                cwd=run_dir, stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE, text=True,
+            )
+
+            output = run_dir.joinpath(self.OUTPUT_FILE)
+            if process.returncode != 0 or not output.exists():
+                raise RuntimeError(
+                    f"{self.EXECUTABLE} failed with exit code "
+                    f"{process.returncode}:\n{process.stderr}"
+                )
+
+            # Values are read independent of line breaks within a band
+            albedo = np.array(output.read_text().split(), dtype=np.float32)
+
+        return albedo.reshape(-1, self.GRAIN_SIZES)
+
+
+def run_ssa_ice(asymmetry, ssa, solar_zenith, workers=1, shard_bands=None,
+                directory=None, in_process=False) -> np.ndarray:
+    """
+    Calculate the snow albedo for all bands and grain sizes with the
+    DISORT `ssa_ice` model. The bands are split into shards that run as
+    separate model processes in parallel.
+
+    With the in process option, all bands are calculated with the shared
+    library of the model (see SsaIceLibrary) in this process instead.
+
+    :param asymmetry: Asymmetry parameter with shape (bands, GRAIN_SIZES)
+    :param ssa: Single scattering albedo with shape (bands, GRAIN_SIZES)
+    :param solar_zenith: Solar zenith angle in degrees
+    :param workers: Number of parallel model processes (Default: 1)
+    :param shard_bands: Number of bands per model process
+                        (Default: Bands split evenly over the workers)
+    :param directory: Path to the DISORT directory (Default: see SsaIce)
+    :param in_process: Run the model with the shared library in this
+                       process (Default: False)
+    :return: Albedo with shape (bands, GRAIN_SIZES)
+    """
+    asymmetry = np.atleast_2d(np.asarray(asymmetry, dtype=np.float32))
+    ssa = np.atleast_2d(np.asarray(ssa, dtype=np.float32))
+
+    if asymmetry.shape != ssa.shape or \
+            asymmetry.shape[1] != SsaIce.GRAIN_SIZES:
+        raise ValueError(
+            f"Asymmetry {asymmetry.shape} and SSA {ssa.shape} need the same "
+            f"shape of (bands, {SsaIce.GRAIN_SIZES})"
+        )
+
+    if in_process:
+        from .library import SsaIceLibrary
+        return SsaIceLibrary(directory).run(asymmetry, ssa, solar_zenith)
+
+    model = SsaIce(directory)
+    model.build()
+
+    bands = asymmetry.shape[0]
+    if shard_bands is None:
+        shard_bands = -(-bands // max(workers, 1))
+    shards = [
+        slice(start, start + shard_bands)
+        for start in range(0, bands, max(shard_bands, 1))
+    ]
+
+    # Each shard is a separate model process; the threads only wait for
+    # them to finish.
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        results = executor.map(
+            lambda shard: model.run(
+                asymmetry[shard], ssa[shard], solar_zenith
+            ),
+            shards
+        )
+        return np.concatenate(list(results))
@@ -0,0 +1,176 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementComposite
+from spectro_dp.asd.batch import BatchJob, read_manifest, run_jobs
+from spectro_dp.asd.cube_store import CubeStore
+from spectro_dp.asd.set_cache import SetCache
+
+
+@pytest.fixture(scope='module')
+def file_prefix():
+    return '210317_a'
+
+
+@pytest.fixture
+def manifest(tmp_path, test_data_path, file_prefix):
+    manifest = tmp_path.joinpath('manifest.csv')
+    manifest.write_text(
+        'input_dir,file_prefix,set_1_index,set_2_index,set_1_count,'
+        'set_2_count,mode,output_file_suffix\n'
+        f'{test_data_path},{file_prefix},0,10,3,3,albedo,pytest_batch_1\n'
+        f'{test_data_path},{file_prefix},0,0,1,1,reflectance,'
+        'pytest_batch_2\n'
+    )
+    return manifest
+
+
+class TestBatchJob:
+    def test_mode_default(self, test_data_path, file_prefix):
+        subject = BatchJob(test_data_path, file_prefix, 0, 10)
+        assert subject.mode == 'albedo'
+        assert subject.set_1_count == 10
+        assert subject.output_file_suffix == 'albedo'
+
+    def test_mode_reflectance_defaults(self, test_data_path, file_prefix):
+        subject = BatchJob(
+            test_data_path, file_prefix, 0, 10, mode='reflectance'
+        )
+        assert subject.set_1_count == 1
+        assert subject.set_2_count == 10
+        assert subject.output_file_suffix == 'reflectance'
+
+    def test_count_zero(self, test_data_path, file_prefix):
+        subject = BatchJob(
+            test_data_path, file_prefix, 0, 10, set_1_count=0, set_2_count=''
+        )
+        assert subject.set_1_count == 0
+        assert subject.set_2_count == 10
+
+    def test_mode_unknown(self, test_data_path, file_prefix):
+        with pytest.raises(ValueError):
+            BatchJob(test_data_path, file_prefix, 0, 10, mode='unknown')
+
+    def test_run_matches_composite(self, test_data_path, file_prefix):
+        subject = BatchJob(
+            test_data_path, file_prefix, 0, 10,
+            set_1_count=3, set_2_count=3, output_file_suffix='pytest_batch'
+        )
+        result = subject.run()
+        assert result['status'] == 'ok'
+        batch_bytes = Path(result['output']).read_bytes()
+
+        composite = MeasurementComposite(
+            test_data_path, file_prefix, set_1_count=3, set_2_count=3
+        )
+        composite.calculate()
+        outfile = Path(composite.save('pytest_batch'))
+
+        assert outfile.read_bytes() == batch_bytes
+        outfile.unlink()
+
+    def test_run_missing_files(self, test_data_path, file_prefix):
+        result = BatchJob(test_data_path, file_prefix, 99, 98).run()
+        assert result['status'] == 'error'
+        assert result['message'].startswith('FileNotFoundError: ')
+        assert result['output'] == ''
+        assert result['seconds'] >= 0
+
+    def test_run_unexpected_error(self, test_data_path, file_prefix,
+                                  monkeypatch):
+        def calculate(_composite):
+            raise PermissionError('Permission denied')
+
+        monkeypatch.setattr(MeasurementComposite, 'calculate', calculate)
+        result = BatchJob(test_data_path, file_prefix, 0, 10).run()
+
+        assert result['status'] == 'error'
+        assert result['message'] == 'PermissionError: Permission denied'
+
+
+class TestManifest:
+    def test_read_manifest(self, manifest):
+        jobs = read_manifest(manifest)
+
+        assert len(jobs) == 2
+        assert jobs[0].set_1_count == 3
+        assert jobs[1].mode == 'reflectance'
+
+    def test_read_manifest_relative_dir(self, tmp_path):
+        manifest = tmp_path.joinpath('manifest.csv')
+        manifest.write_text(
+            'input_dir,file_prefix,set_1_index,set_2_index\n'
+            'site,prefix,0,10\n'
+        )
+        assert read_manifest(manifest)[0].input_dir == \
+            tmp_path.joinpath('site')
+
+    def test_read_manifest_missing_field(self, tmp_path):
+        manifest = tmp_path.joinpath('manifest.csv')
+        manifest.write_text('input_dir,file_prefix,set_1_index\nsite,a,0\n')
+
+        with pytest.raises(ValueError):
+            read_manifest(manifest)
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_run_jobs(self, manifest, workers):
+        results = run_jobs(read_manifest(manifest), workers=workers)
+
+        assert [result['status'] for result in results] == ['ok', 'ok']
+        for result in results:
+            Path(result['output']).unlink()
+
+    def test_run_jobs_read_workers(self, manifest):
+        results = run_jobs(read_manifest(manifest), read_workers=4)
+
+        assert [result['status'] for result in results] == ['ok', 'ok']
+        for result in results:
+            Path(result['output']).unlink()
+
+    def test_run_jobs_set_cache(self, manifest, tmp_path):
+        cache = SetCache(tmp_path.joinpath('cache'))
+        results = run_jobs(read_manifest(manifest), set_cache=cache)
+        for result in results:
+            Path(result['output']).unlink()
+
+        assert [result['status'] for result in results] == ['ok', 'ok']
+        # Both sets of the reflectance job are the first file
+        assert len(list(cache.directory.iterdir())) == 3
+
+    def test_run_jobs_store(self, manifest, tmp_path):
+        store = CubeStore(tmp_path.joinpath('store'))
+        results = run_jobs(read_manifest(manifest), store=store)
+
+        assert len(store) == 2
+        assert store[1]['suffix'] == 'pytest_batch_2'
+        assert np.allclose(
+            store.read(rows=[0])[0],
+            np.loadtxt(results[0]['output']), atol=0.0001
+        )
+        for result in results:
+            assert 'composite' not in result
+            Path(result['output']).unlink()
+
+    def test_run_jobs_plot(self, manifest, tmp_path):
+        plot_dir = tmp_path.joinpath('plots')
+        jobs = read_manifest(manifest)
+        results = run_jobs(jobs, workers=2, plot_dir=plot_dir)
+
+        for job, result in zip(jobs, results):
+            assert result['plot'] == job.plot_file(plot_dir).as_posix()
+            assert Path(result['plot']).is_file()
+            Path(result['output']).unlink()
+
+    def test_run_jobs_sensors(self, manifest):
+        results = run_jobs(
+            read_manifest(manifest), sensors=['modis', 'landsat8']
+        )
+
+        for result in results:
+            resampled = result['resampled'].split(';')
+            assert [Path(file).stem.rsplit('_', 1)[1] for file in resampled] \
+                == ['modis', 'landsat8']
+            for file in resampled + [result['output']]:
+                Path(file).unlink()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from spectro_dp.asd.catalog import MeasurementCatalog
+
+
+@pytest.fixture(scope='module')
+def subject(test_data_path):
+    return MeasurementCatalog.from_directory(test_data_path)
+
+
+class TestMeasurementCatalog:
+    def test_root(self, subject, test_data_path):
+        assert subject.root == test_data_path
+
+    def test_files(self, subject, test_data_path):
+        assert len(subject) == 7
+        assert subject.files[0] == test_data_path.joinpath('210317_a.000')
+        assert subject['path'][-1] == 'white-reference/210317_a.000'
+
+    def test_columns(self, subject):
+        assert 'acquisition_time' in subject.columns
+        assert 'instrument_number' in subject.columns
+        assert 'when' not in subject.columns
+
+    def test_comments(self, subject):
+        assert subject['comments'][0] == 'Atwater test'
+
+    def test_save_and_load(self, subject, tmp_path):
+        catalog_file = subject.save(tmp_path.joinpath('catalog.npz'))
+        loaded = MeasurementCatalog.load(catalog_file)
+
+        assert loaded.root == subject.root
+        assert loaded.columns == subject.columns
+        for column in subject.columns:
+            assert np.array_equal(loaded[column], subject[column])
+
+    def test_select_time(self, subject, test_data_path):
+        files = subject.select(
+            start='2021-03-17T11:49:40', end='2021-03-17T11:50:00'
+        )
+        assert [file.name for file in files] == \
+               ['210317_a.001', '210317_a.002']
+
+    def test_select_field(self, subject):
+        assert len(subject.select(instrument_number=18020)) == len(subject)
+        assert subject.select(instrument_number=1) == []
+
+    def test_find_files_skips_other_files(self, tmp_path):
+        tmp_path.joinpath('short.000').write_bytes(b'ASD')
+        tmp_path.joinpath('result.txt').write_bytes(bytes(484))
+
+        assert MeasurementCatalog.find_files(tmp_path) == []
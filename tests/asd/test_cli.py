@@ -0,0 +1,134 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from spectro_dp.asd.cli import COMMANDS, cli
+
+# Script run in a new interpreter to measure the start of the command line
+# interface without modules loaded by other tests.
+IMPORT_SCRIPT = '''
+import sys
+import time
+
+start = time.perf_counter()
+from spectro_dp.asd.cli import cli
+cli.main(sys.argv[1:], standalone_mode=False)
+elapsed = time.perf_counter() - start
+
+print(f"{elapsed} {int('matplotlib' in sys.modules)}")
+'''
+
+
+class TestCli:
+    # Generous limit to account for slow machines. The run without
+    # matplotlib takes a fraction of it.
+    IMPORT_BUDGET = 2.0
+    TEST_RESULT_FILE = 'pytest_cli'
+
+    @pytest.fixture
+    def albedo_args(self, test_data_path):
+        return [
+            'albedo', '-in', str(test_data_path), '-fp', '210317_a',
+            '-ofs', self.TEST_RESULT_FILE, '-up', '10', '-ulc', '3',
+            '-down', '0', '-dlc', '3', '--skip-plot',
+        ]
+
+    @pytest.fixture
+    def result_file(self, test_data_path):
+        result_file = Path(test_data_path).joinpath(
+            f"210317_a_{self.TEST_RESULT_FILE}.txt"
+        )
+        yield result_file
+        if result_file.exists():
+            result_file.unlink()
+
+    def test_list_commands(self):
+        assert cli.list_commands(None) == sorted(COMMANDS)
+
+    @pytest.mark.parametrize('command', sorted(COMMANDS))
+    def test_command_help(self, command):
+        result = CliRunner().invoke(cli, [command, '--help'])
+        assert result.exit_code == 0
+
+    def test_unknown_command(self):
+        result = CliRunner().invoke(cli, ['unknown'])
+        assert result.exit_code != 0
+
+    def test_albedo(self, albedo_args, result_file, set_cache_dir):
+        result = CliRunner().invoke(cli, albedo_args)
+
+        assert result.exit_code == 0
+        assert result_file.exists()
+        # Sets are cached in the directory of the test
+        assert len(list(set_cache_dir.iterdir())) == 2
+
+    def test_white_reference_missing(self, test_data_path):
+        result = CliRunner().invoke(cli, [
+            'white-reference', '-in', str(test_data_path), '-fp', '210317_a',
+            '-wrs', '0', '-wrc', '4',
+        ])
+
+        assert result.exit_code == 0
+        assert result.output == \
+            'ERROR: White reference file(s) not found: 210317_a.003\n'
+
+    def test_white_reference_truncated(self, test_data_path, tmp_path):
+        content = Path(test_data_path).joinpath('210317_a.000').read_bytes()
+        tmp_path.joinpath('210317_a.000').write_bytes(content[:-100])
+
+        result = CliRunner().invoke(cli, [
+            'white-reference', '-in', str(tmp_path), '-fp', '210317_a',
+            '-wrs', '0', '-wrc', '1',
+        ])
+
+        assert result.exit_code == 0
+        assert result.output.startswith('ERROR: ')
+
+    def test_white_reference_plot_out(self, test_data_path, tmp_path):
+        plot_out = tmp_path.joinpath('white_references.png')
+        result = CliRunner().invoke(cli, [
+            'white-reference', '-in', str(test_data_path), '-fp', '210317_a',
+            '-wrs', '0', '-wrc', '3', '--plot-out', str(plot_out),
+        ])
+
+        assert result.exit_code == 0
+        assert result.output == \
+            f"Plot saved to:\n  {plot_out.as_posix()}\n"
+        assert plot_out.read_bytes()[:4] == b'\x89PNG'
+
+    @pytest.mark.parametrize('option', [
+        ['--robust-mean', 'median'], ['--quality-screen'],
+    ])
+    def test_watch_options(self, albedo_args, option):
+        result = CliRunner().invoke(cli, albedo_args + ['--watch', *option])
+
+        assert result.exit_code == 2
+        assert f"--watch can not be combined with {option[0]}" in \
+            result.output
+
+    def test_skip_plot_import_budget(self, albedo_args, result_file):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_SCRIPT, *albedo_args],
+            capture_output=True, text=True, check=True,
+        ).stdout.splitlines()[-1]
+        elapsed, matplotlib_loaded = output.split()
+
+        assert matplotlib_loaded == '0'
+        assert float(elapsed) < self.IMPORT_BUDGET
+
+    def test_package_lazy_plotter(self):
+        output = subprocess.run(
+            [
+                sys.executable, '-c',
+                'import sys, spectro_dp.asd as asd; '
+                'plotter = "spectro_dp.asd.plotter"; '
+                'print(plotter in sys.modules, end=" "); '
+                'asd.Plotter; print(plotter in sys.modules)'
+            ],
+            capture_output=True, text=True, check=True,
+        ).stdout
+
+        assert output.split() == ['False', 'True']
@@ -0,0 +1,187 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementComposite, MeasurementFile
+from spectro_dp.asd.cube_store import CubeStore
+
+
+BANDS = MeasurementFile.BAND_COUNT
+
+
+@pytest.fixture(scope='module')
+def composite(test_data_path):
+    composite = MeasurementComposite(
+        test_data_path, '210317_a', set_1_count=3, set_2_count=3
+    )
+    composite.calculate()
+    return composite
+
+
+@pytest.fixture(params=[None, 'zlib'])
+def subject(tmp_path, request):
+    return CubeStore(
+        tmp_path.joinpath('store'), compression=request.param, chunk_rows=4
+    )
+
+
+def spectra(rows, offset=0):
+    return (
+        np.arange(rows * BANDS, dtype=np.float32).reshape(rows, BANDS) +
+        offset
+    )
+
+
+class TestCubeStore:
+    def test_create(self, subject):
+        assert subject.path.joinpath(CubeStore.SETTINGS_FILE).exists()
+        assert len(subject) == 0
+        assert subject.row_count('raw') == 0
+
+    def test_unknown_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            CubeStore(tmp_path, compression='lzma')
+
+    def test_unknown_dataset(self, subject):
+        with pytest.raises(ValueError):
+            subject.row_count('unknown')
+
+    def test_append(self, subject):
+        values = spectra(10)
+        for row, result in enumerate(values):
+            assert subject.append(result, site=f'site_{row % 2}') == row
+
+        assert len(subject) == 10
+        assert np.array_equal(subject.read(), values)
+        assert np.all(np.isnan(subject.read('set_1')))
+
+    def test_append_parts(self, subject):
+        values = spectra(6)
+        for result in values:
+            subject.append(result)
+
+        # Only the rows of the partly filled chunk are kept as parts
+        assert [
+            offset for offset, _file in subject._part_files('result', 1)
+        ] == [0, 1]
+        assert subject._part_files('result', 0) == []
+        assert np.array_equal(subject.read(), values)
+        assert np.array_equal(CubeStore(subject.path).read(), values)
+
+    def test_read_short_chunk(self, subject):
+        subject.append_many([dict(result=row) for row in spectra(4)])
+        # Chunk file of an interrupted append without parts
+        subject._write_file(
+            subject._chunk_file('result', 0), spectra(2)
+        )
+
+        with pytest.raises(ValueError):
+            subject.read()
+
+    def test_read_missing_part(self, subject):
+        subject.append_many([dict(result=row) for row in spectra(2)])
+        subject.append(spectra(1, 2)[0])
+        subject._part_files('result', 0)[0][1].unlink()
+
+        with pytest.raises(ValueError):
+            subject.read()
+
+    def test_append_many(self, subject, tmp_path):
+        values = spectra(10)
+        raw = spectra(7)
+        composites = [
+            dict(
+                result=result, site=f'site_{row}',
+                time='2021-03-17T11:00:00', raw=raw[row:row + 1]
+                if row < 7 else None,
+            )
+            for row, result in enumerate(values)
+        ]
+        subject.append(values[0])
+
+        assert subject.append_many(composites) == list(range(1, 11))
+        assert subject.append_many([]) == []
+        assert np.array_equal(subject.read(rows=slice(1, None)), values)
+        assert np.array_equal(subject.read('raw'), raw)
+        assert subject[7]['raw_start'] == 6
+        assert subject[10]['raw_count'] == 0
+        assert list(CubeStore(subject.path).column('site')[1:]) == \
+            [f'site_{row}' for row in range(10)]
+
+    def test_append_raw(self, subject):
+        raw = spectra(6)
+        subject.append(raw[0], raw=raw[:5])
+        subject.append(raw[1], raw=raw[5:])
+
+        assert subject.row_count('raw') == 6
+        assert np.array_equal(subject.read_raw(0), raw[:5])
+        assert np.array_equal(subject.read_raw(1), raw[5:])
+
+    def test_reopen(self, subject):
+        values = spectra(5)
+        for result in values:
+            subject.append(result, site='A', time='2021-03-17T11:49:38')
+
+        reopened = CubeStore(subject.path, compression='zstd')
+
+        assert reopened.compression == subject.compression
+        assert len(reopened) == 5
+        assert reopened[0]['site'] == 'A'
+        assert np.array_equal(reopened.read(), values)
+
+        reopened.append(values[0])
+        assert np.array_equal(reopened.read(rows=[5]), values[:1])
+
+    def test_read_partial(self, subject):
+        values = spectra(9)
+        for result in values:
+            subject.append(result)
+
+        bands = CubeStore.band_slice(1000, 1010)
+        assert np.array_equal(
+            subject.read(rows=[8, 1, 4], bands=bands),
+            values[[8, 1, 4], 650:661]
+        )
+        assert np.array_equal(
+            subject.read(rows=slice(2, 6)), values[2:6]
+        )
+
+    def test_read_out_of_range(self, subject):
+        subject.append(spectra(1)[0])
+
+        with pytest.raises(IndexError):
+            subject.read(rows=[1])
+
+    def test_select(self, subject):
+        for day in [17, 18, 19]:
+            subject.append(
+                spectra(1)[0], site='A' if day < 19 else 'B',
+                time=f'2021-03-{day}T12:00:00'
+            )
+
+        assert list(subject.select(site='A')) == [0, 1]
+        assert list(subject.select(start='2021-03-18')) == [1, 2]
+        assert list(subject.select(end='2021-03-18', site='A')) == [0]
+
+    def test_append_composite(self, subject, composite):
+        row = subject.append_composite(composite, suffix='albedo', raw=True)
+        entry = subject[row]
+
+        assert entry['site'] == composite.input_dir.name
+        assert entry['prefix'] == composite.file_prefix
+        assert entry['time'] == '2021-03-17T11:49:38'
+        assert np.array_equal(subject.read(rows=[row])[0], composite.result)
+        assert np.array_equal(
+            subject.read('set_2', rows=[row])[0], composite.set_2
+        )
+        assert subject.read_raw(row).shape == (6, BANDS)
+
+    def test_export_txt(self, subject, composite, tmp_path):
+        subject.append_composite(composite, suffix='pytest')
+        outfile = Path(subject.export_txt(0, tmp_path))
+
+        saved = Path(composite.save('pytest'))
+        assert outfile.name == saved.name
+        assert outfile.read_bytes() == saved.read_bytes()
+        saved.unlink()
@@ -0,0 +1,226 @@
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from spectro_dp.asd import MeasurementFile
+from spectro_dp.asd.cube_store import CubeStore
+from spectro_dp.asd.features import BandDepth, BroadbandAlbedo, \
+    FeaturePipeline, NormalizedDifference, band_slice, cli, \
+    default_features, solar_irradiance
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+WAVELENGTHS = MeasurementFile.BAND_RANGE.astype(np.float64)
+FLAT_IRRADIANCE = np.ones(MeasurementFile.BAND_COUNT)
+
+
+def absorption(center, width, depth):
+    return 1 - depth * np.exp(-0.5 * ((WAVELENGTHS - center) / width) ** 2)
+
+
+@pytest.fixture(scope='module')
+def spectra():
+    return np.stack([
+        np.full(MeasurementFile.BAND_COUNT, 0.8),
+        np.linspace(0.9, 0.3, MeasurementFile.BAND_COUNT),
+        0.9 * absorption(1030, 15, 0.3),
+        SyntheticCampaign.snow_reflectance(),
+    ])
+
+
+class TestBandSlice:
+    def test_range(self):
+        bands = band_slice(950, 1100)
+        assert MeasurementFile.BAND_RANGE[bands][[0, -1]].tolist() == \
+            [950, 1100]
+
+    @pytest.mark.parametrize('wavelengths', [(300, 400), (2400, 2600)])
+    def test_out_of_range(self, wavelengths):
+        with pytest.raises(ValueError):
+            band_slice(*wavelengths)
+
+
+class TestNormalizedDifference:
+    def test_compute(self, spectra):
+        subject = NormalizedDifference('ndsi', 560, 1640)
+        result = subject(spectra)['ndsi']
+
+        assert result[0] == pytest.approx(0)
+        assert result[1] == pytest.approx(
+            (spectra[1, 560 - 350] - spectra[1, 1640 - 350]) /
+            (spectra[1, 560 - 350] + spectra[1, 1640 - 350])
+        )
+        assert result[3] > result[1]
+
+    def test_missing_values(self):
+        spectrum = np.full((1, MeasurementFile.BAND_COUNT), 0.5)
+        spectrum[0, 560 - 350] = np.nan
+        spectrum[0, 1630 - 350:1651 - 350] = np.nan
+
+        result = NormalizedDifference('nd', 560, 1640)(spectrum)['nd']
+        assert np.isnan(result[0])
+
+
+class TestBandDepth:
+    def test_columns(self):
+        subject = BandDepth('ice', 950, 1100)
+        assert subject.columns == ['ice_depth', 'ice_area']
+
+    def test_no_absorption(self, spectra):
+        result = BandDepth('ice', 950, 1100)(spectra[:2])
+
+        assert result['ice_depth'] == pytest.approx(0, abs=1e-6)
+        assert result['ice_area'] == pytest.approx(0, abs=1e-4)
+
+    def test_absorption(self, spectra):
+        result = BandDepth('ice', 950, 1100)(spectra[2:3])
+
+        assert result['ice_depth'][0] == pytest.approx(0.3, abs=1e-3)
+        # Area of the Gaussian absorption: depth * width * sqrt(2 * pi)
+        assert result['ice_area'][0] == pytest.approx(
+            0.3 * 15 * np.sqrt(2 * np.pi), rel=1e-2
+        )
+
+    def test_continuum_removed(self, spectra):
+        subject = BandDepth('ice', 950, 1100)
+        assert subject.continuum_removed(spectra[1:2]) == \
+            pytest.approx(1)
+
+    def test_missing_values(self):
+        spectrum = np.full((1, MeasurementFile.BAND_COUNT), np.nan)
+        result = BandDepth('ice', 950, 1100)(spectrum)
+
+        assert np.isnan(result['ice_depth'][0])
+        assert np.isnan(result['ice_area'][0])
+
+
+class TestBroadbandAlbedo:
+    def test_constant(self, spectra):
+        result = BroadbandAlbedo(
+            'albedo', 350, 2500, FLAT_IRRADIANCE
+        )(spectra[:1])
+        assert result['albedo'] == pytest.approx(0.8)
+
+    def test_irradiance_weights(self, spectra):
+        irradiance = np.zeros(MeasurementFile.BAND_COUNT)
+        irradiance[500 - 350] = 1
+        result = BroadbandAlbedo('albedo', 350, 2500, irradiance)(spectra)
+
+        assert result['albedo'] == pytest.approx(spectra[:, 500 - 350])
+
+    def test_missing_values(self):
+        spectrum = np.full((1, MeasurementFile.BAND_COUNT), 0.6)
+        spectrum[0, 400:600] = np.nan
+
+        result = BroadbandAlbedo(
+            'albedo', 350, 2500, FLAT_IRRADIANCE
+        )(spectrum)
+        assert result['albedo'] == pytest.approx(0.6)
+
+    def test_solar_irradiance_table(self, tmp_path):
+        table = tmp_path.joinpath('solar.csv')
+        table.write_text('wavelength,irradiance\n2500,0\n350,2151\n')
+
+        irradiance = solar_irradiance(table)
+        assert irradiance[0] == pytest.approx(2151)
+        assert irradiance[-1] == pytest.approx(0)
+
+
+class TestFeaturePipeline:
+    def test_columns(self):
+        assert FeaturePipeline().columns == [
+            'ndsi', 'ice_1030_depth', 'ice_1030_area', 'ice_1260_depth',
+            'ice_1260_area',
+        ]
+
+    def test_columns_irradiance(self):
+        assert FeaturePipeline(
+            default_features(FLAT_IRRADIANCE)
+        ).columns[5:] == ['albedo_vis', 'albedo_nir', 'albedo_broadband']
+
+    def test_unique_columns(self):
+        with pytest.raises(ValueError):
+            FeaturePipeline([
+                BandDepth('ice', 950, 1100), BandDepth('ice', 1150, 1300)
+            ])
+
+    def test_band_count(self):
+        with pytest.raises(ValueError):
+            FeaturePipeline().compute(np.ones((2, 10)))
+
+    def test_compute_matches_single(self, spectra, monkeypatch):
+        subject = FeaturePipeline(default_features(FLAT_IRRADIANCE))
+        monkeypatch.setattr(subject, 'CHUNK_SPECTRA', 3)
+
+        spectra = spectra.astype(np.float32)
+        result = subject.compute(spectra)
+        for row, spectrum in enumerate(spectra):
+            single = subject.compute(spectrum)
+            for column in subject.columns:
+                assert result[column][row] == \
+                    pytest.approx(single[column][0])
+
+    def test_snow_features(self, spectra):
+        result = FeaturePipeline(
+            default_features(SyntheticCampaign.irradiance())
+        ).compute(spectra[3])
+
+        assert result['ice_1260_depth'][0] > result['ice_1030_depth'][0]
+        assert result['albedo_vis'][0] > result['albedo_nir'][0]
+
+
+class TestCli:
+    def test_input_dir(self, spectra, tmp_path):
+        site = tmp_path.joinpath('site')
+        site.mkdir()
+        np.savetxt(site.joinpath('a_albedo.txt'), spectra[0], fmt='%.4f')
+        np.savetxt(site.joinpath('b_albedo.txt'), spectra[3], fmt='%.4f')
+
+        result = CliRunner().invoke(cli, ['-in', str(tmp_path)])
+
+        assert result.exit_code == 0
+        lines = tmp_path.joinpath('features.csv').read_text().splitlines()
+        assert lines[0].split(',')[:2] == ['file', 'ndsi']
+        assert len(lines) == 3
+        assert lines[1].split(',')[:2] == ['site/a_albedo.txt', '0.000000']
+        assert 'albedo_broadband' not in lines[0]
+
+    def test_solar_spectrum(self, spectra, tmp_path):
+        np.savetxt(tmp_path.joinpath('a_albedo.txt'), spectra[0], fmt='%.4f')
+        solar = tmp_path.joinpath('solar.csv')
+        solar.write_text('wavelength,irradiance\n350,1\n2500,1\n')
+
+        result = CliRunner().invoke(
+            cli, ['-in', str(tmp_path), '--solar-spectrum', str(solar)]
+        )
+
+        assert result.exit_code == 0
+        lines = tmp_path.joinpath('features.csv').read_text().splitlines()
+        assert lines[0].endswith('albedo_broadband')
+        assert lines[1].endswith('0.800000')
+
+    def test_store(self, spectra, tmp_path):
+        store = CubeStore(tmp_path.joinpath('store'))
+        for row, spectrum in enumerate(spectra):
+            store.append(
+                spectrum, site=f"site_{row}", prefix='a',
+                time='2021-03-17T11:00:00',
+            )
+        output = tmp_path.joinpath('features.csv')
+
+        result = CliRunner().invoke(
+            cli, ['--store', str(store.path), '-o', str(output)]
+        )
+
+        assert result.exit_code == 0
+        lines = output.read_text().splitlines()
+        assert len(lines) == 1 + len(spectra)
+        assert lines[0].startswith('row,site,time,prefix,ndsi')
+        assert lines[2].startswith('1,site_1,2021-03-17T11:00:00,a,')
+
+    def test_input_required(self):
+        result = CliRunner().invoke(cli, [])
+        assert 'ERROR' in result.output
+
+    def test_no_files(self, tmp_path):
+        result = CliRunner().invoke(cli, ['-in', str(tmp_path)])
+        assert 'ERROR' in result.output
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from spectro_dp.asd import MeasurementFile
+from spectro_dp.asd.grain_size import GrainSizeRetrieval, cli
+
+GRAIN_SIZES = 148
+
+
+@pytest.fixture(scope='module')
+def model():
+    """
+    Albedo decreasing with grain size in the near infrared
+    """
+    wavelength = MeasurementFile.BAND_RANGE[:, np.newaxis]
+    grain_size = np.arange(1, GRAIN_SIZES + 1)[np.newaxis, :]
+    return 0.95 - 0.4 * np.sqrt(grain_size / GRAIN_SIZES) * \
+        np.clip((wavelength - 700) / 1000, 0, 1)
+
+
+@pytest.fixture(scope='module')
+def subject(model):
+    return GrainSizeRetrieval(model)
+
+
+class TestGrainSizeRetrieval:
+    def test_bands(self, subject):
+        wavelengths = MeasurementFile.BAND_RANGE[subject.bands]
+
+        assert wavelengths.min() == 950
+        assert wavelengths.max() == 1300
+        assert 1125 not in wavelengths
+
+    def test_grain_sizes_default(self, subject):
+        assert (subject.grain_sizes == np.arange(1, GRAIN_SIZES + 1)).all()
+
+    def test_grain_sizes_count(self, model):
+        with pytest.raises(ValueError):
+            GrainSizeRetrieval(model, grain_sizes=[1, 2])
+
+    def test_model_bands_required(self, model):
+        with pytest.raises(ValueError):
+            GrainSizeRetrieval(model[::10])
+
+    def test_model_wavelengths(self, model):
+        subject = GrainSizeRetrieval(
+            model[::10], wavelengths=MeasurementFile.BAND_RANGE[::10]
+        )
+        assert subject.retrieve(model[:, 40])['index'][0] == 40
+
+    def test_no_bands_in_windows(self, model):
+        with pytest.raises(ValueError):
+            GrainSizeRetrieval(model, windows=[(100, 200)])
+
+    def test_retrieve(self, subject, model):
+        columns = np.array([0, 5, 70, 147])
+        result = subject.retrieve(model[:, columns].T)
+
+        assert (result['index'] == columns).all()
+        assert (result['grain_size'] == columns + 1).all()
+        assert result['rmse'] == pytest.approx(0, abs=1e-6)
+
+    def test_retrieve_noise(self, subject, model):
+        random = np.random.default_rng(0)
+        spectra = model[:, [30] * 100].T + \
+            random.normal(scale=0.002, size=(100, model.shape[0]))
+
+        result = subject.retrieve(spectra)
+        assert np.abs(result['index'] - 30).max() <= 2
+
+    def test_retrieve_chunks(self, subject, model, monkeypatch):
+        spectra = model[:, :20].T
+        expected = subject.retrieve(spectra)
+        monkeypatch.setattr(GrainSizeRetrieval, 'CHUNK_SPECTRA', 3)
+
+        result = subject.retrieve(spectra)
+        assert (result['index'] == expected['index']).all()
+        assert (result['index'] == np.arange(20)).all()
+
+    def test_retrieve_missing_values(self, subject, model):
+        spectra = model[:, [10, 20]].T.copy()
+        spectra[0, subject.bands[:50]] = np.nan
+        spectra[1] = np.inf
+
+        result = subject.retrieve(spectra)
+        assert result['index'][0] == 10
+        assert np.isnan(result['grain_size'][1])
+        assert np.isnan(result['rmse'][1])
+
+    def test_retrieve_sub_grid(self, subject, model):
+        spectrum = (model[:, 60] + model[:, 61]) / 2
+        result = subject.retrieve(spectrum, sub_grid=True)
+
+        assert 61 < result['grain_size'][0] < 62
+
+    def test_retrieve_sub_grid_exact(self, subject, model):
+        result = subject.retrieve(model[:, [0, 50, 147]].T, sub_grid=True)
+        assert result['grain_size'] == pytest.approx([1, 51, 148], abs=0.1)
+
+    def test_resample(self, model):
+        resampled = GrainSizeRetrieval.resample(
+            model[::2], MeasurementFile.BAND_RANGE[::2]
+        )
+        assert resampled == pytest.approx(model)
+
+
+class TestCli:
+    def test_cli(self, model, tmp_path):
+        model_file = tmp_path.joinpath('albedo.csv')
+        np.savetxt(model_file, model, fmt='%.6f')
+        site = tmp_path.joinpath('site')
+        site.mkdir()
+        np.savetxt(site.joinpath('a_albedo.txt'), model[:, 12], fmt='%.4f')
+
+        result = CliRunner().invoke(cli, [
+            '-in', str(tmp_path), '-m', str(model_file),
+            '-w', '900', '1300',
+        ])
+
+        assert result.exit_code == 0
+        lines = tmp_path.joinpath('grain_size.csv').read_text().splitlines()
+        assert lines[1].split(',')[:3] == \
+            ['site/a_albedo.txt', '13.0000', '12']
+
+    def test_cli_no_files(self, model, tmp_path):
+        model_file = tmp_path.joinpath('albedo.csv')
+        np.savetxt(model_file, model[:5])
+
+        result = CliRunner().invoke(
+            cli, ['-in', str(tmp_path), '-m', str(model_file)]
+        )
+        assert 'ERROR' in result.output
@@ -0,0 +1,272 @@
+import shutil
+import tarfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from spectro_dp.asd import MeasurementComposite, MeasurementFile, \
+    MeasurementHeader, MeasurementIndex, MeasurementStack
+from spectro_dp.asd.albedo import cli as albedo_cli
+from spectro_dp.asd.measurement_archive import MeasurementArchive, \
+    file_state, read_members
+from spectro_dp.asd.set_cache import SetCache
+from spectro_dp.asd.spectrum_cache import shared_spectrum_cache
+
+DATA_FILES = [
+    '210317_a.000', '210317_a.001', '210317_a.002',
+    '210317_a.010', '210317_a.011', '210317_a.012',
+    'white-reference/210317_a.000',
+]
+
+
+@pytest.fixture(autouse=True)
+def empty_spectrum_cache():
+    # Data is read from the archives and not from spectra of other tests
+    shared_spectrum_cache().clear()
+
+
+@pytest.fixture(params=['zip', 'tar.gz'])
+def archive(request, tmp_path, test_data_path):
+    archive = tmp_path.joinpath(f"session.{request.param}")
+    # Stored in reverse order to check reading in archive order
+    if request.param == 'zip':
+        with zipfile.ZipFile(archive, 'w') as outfile:
+            for name in reversed(DATA_FILES):
+                outfile.write(test_data_path.joinpath(name), name)
+    else:
+        with tarfile.open(archive, 'w:gz') as outfile:
+            for name in reversed(DATA_FILES):
+                outfile.add(test_data_path.joinpath(name), f"./{name}")
+    return archive
+
+
+@pytest.fixture
+def composite_options():
+    return dict(
+        set_1_index=0, set_1_count=3, set_2_index=10, set_2_count=3
+    )
+
+
+class TestMeasurementArchive:
+    def test_is_archive(self):
+        assert MeasurementArchive.is_archive('session.ZIP')
+        assert MeasurementArchive.is_archive('session.tar.gz')
+        assert not MeasurementArchive.is_archive('210317_a.000')
+
+    def test_file_names(self, archive):
+        subject = MeasurementArchive.open(archive)
+
+        assert sorted(subject.file_names()) == sorted(DATA_FILES[:6])
+        assert subject.file_names('white-reference') == ['210317_a.000']
+        assert subject.is_dir('white-reference')
+        assert not subject.is_dir('missing')
+
+    def test_open_once(self, archive):
+        assert MeasurementArchive.open(archive) is \
+            MeasurementArchive.open(archive)
+
+    def test_find(self, archive, test_data_path):
+        subject, name = MeasurementArchive.find(
+            archive.joinpath('white-reference', '210317_a.000')
+        )
+
+        assert subject.path == archive
+        assert name == 'white-reference/210317_a.000'
+        assert MeasurementArchive.find(archive)[1] == ''
+        assert MeasurementArchive.find(
+            test_data_path.joinpath(DATA_FILES[0])
+        ) is None
+
+    def test_read(self, archive, test_data_path):
+        subject = MeasurementArchive.open(archive)
+
+        contents = subject.read(DATA_FILES[:2])
+
+        for name, content in zip(DATA_FILES, contents):
+            with open(test_data_path.joinpath(name), 'rb') as infile:
+                assert content == infile.read()
+
+    def test_read_size(self, archive):
+        content = MeasurementArchive.open(archive).read(
+            DATA_FILES[:1], MeasurementHeader.BYTES
+        )[0]
+
+        assert len(content) == MeasurementHeader.BYTES
+
+    def test_read_missing_member(self, archive):
+        with pytest.raises(FileNotFoundError):
+            MeasurementArchive.open(archive).read(['210317_a.099'])
+
+    def test_not_an_archive(self, tmp_path):
+        archive = tmp_path.joinpath('session.zip')
+        archive.write_bytes(b'no archive')
+
+        with pytest.raises(ValueError):
+            MeasurementArchive(archive)
+
+    def test_read_members_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            read_members([tmp_path.joinpath('210317_a.000')])
+
+    def test_file_state(self, archive):
+        archive_state = file_state(archive)
+
+        assert file_state(archive.joinpath(DATA_FILES[0])) == \
+            (MeasurementFile.FILE_BYTES, archive_state[1])
+
+
+class TestReadFromArchive:
+    def test_measurement_file(self, archive, test_data_path):
+        expected = MeasurementFile(test_data_path.joinpath(DATA_FILES[0]))
+        subject = MeasurementFile(archive.joinpath(DATA_FILES[0]))
+
+        assert subject.header == expected.header
+        assert subject.acquisition_time == expected.acquisition_time
+        assert np.array_equal(subject.data, expected.data)
+
+    def test_measurement_file_mmap(self, archive, test_data_path):
+        subject = MeasurementFile(archive.joinpath(DATA_FILES[0]), mmap=True)
+
+        assert np.array_equal(
+            subject.data,
+            MeasurementFile(test_data_path.joinpath(DATA_FILES[0])).data
+        )
+
+    def test_measurement_file_missing(self, archive):
+        with pytest.raises(FileNotFoundError):
+            MeasurementFile(archive.joinpath('210317_a.099')).data
+
+    def test_headers(self, archive, test_data_path):
+        files = [
+            archive.joinpath(DATA_FILES[1]),
+            test_data_path.joinpath(DATA_FILES[2]),
+            archive.joinpath(DATA_FILES[0]),
+        ]
+
+        assert np.array_equal(
+            MeasurementHeader.read(files),
+            MeasurementHeader.read(
+                [test_data_path.joinpath(name) for name in DATA_FILES[:3]]
+            )[[1, 2, 0]]
+        )
+
+    @pytest.mark.parametrize('read_workers', [1, 2])
+    def test_stack(self, archive, test_data_path, read_workers):
+        files = [
+            archive.joinpath(DATA_FILES[1]),
+            test_data_path.joinpath(DATA_FILES[2]),
+            archive.joinpath(DATA_FILES[0]),
+        ]
+        expected = MeasurementStack(
+            [test_data_path.joinpath(name) for name in DATA_FILES[:3]]
+        ).data[[1, 2, 0]]
+
+        assert np.array_equal(
+            MeasurementStack(files, read_workers).data, expected
+        )
+        stack = MeasurementStack(files, read_workers)
+        stack.read()
+        assert np.array_equal(stack.data, expected)
+
+    def test_stack_truncated_member(self, tmp_path, test_data_path):
+        archive = tmp_path.joinpath('session.zip')
+        with zipfile.ZipFile(archive, 'w') as outfile:
+            outfile.writestr(
+                DATA_FILES[0],
+                Path(test_data_path, DATA_FILES[0]).read_bytes()[:-4]
+            )
+
+        with pytest.raises(ValueError):
+            MeasurementStack([archive.joinpath(DATA_FILES[0])]).data
+
+    def test_index(self, archive):
+        subject = MeasurementIndex(archive, cache=True)
+
+        assert [file.name for file in subject.files('210317_a', 10, 3)] == \
+            DATA_FILES[3:6]
+        assert MeasurementIndex.exists(archive.joinpath('white-reference'))
+        assert not MeasurementIndex.exists(archive.joinpath('missing'))
+        assert not archive.parent.joinpath(MeasurementIndex.CACHE_FILE) \
+            .exists()
+
+
+class TestCompositeFromArchive:
+    def test_calculate(self, archive, test_data_path, composite_options):
+        expected = MeasurementComposite(
+            test_data_path, '210317_a', **composite_options
+        )
+        expected.calculate()
+
+        subject = MeasurementComposite(
+            archive, '210317_a', **composite_options
+        )
+        subject.calculate()
+
+        assert np.array_equal(subject.result, expected.result)
+        assert subject.output_dir == archive.parent
+        assert Path(subject.save('archive')).parent == archive.parent
+
+    def test_set_2_prefix(self, archive, test_data_path):
+        options = dict(
+            set_1_index=0, set_1_count=3, set_2_index=0, set_2_count=1,
+            set_2_prefix='white-reference/',
+        )
+        expected = MeasurementComposite(test_data_path, '210317_a', **options)
+        expected.calculate()
+
+        subject = MeasurementComposite(archive, '210317_a', **options)
+        subject.calculate()
+
+        assert np.array_equal(subject.result, expected.result)
+
+    def test_set_cache(self, archive, tmp_path, composite_options):
+        cache = SetCache(tmp_path.joinpath('cache'))
+        first = MeasurementComposite(
+            archive, '210317_a', set_cache=cache, **composite_options
+        )
+        first.calculate()
+
+        second = MeasurementComposite(
+            archive, '210317_a', set_cache=cache, **composite_options
+        )
+        second.calculate()
+
+        assert len(list(cache.directory.iterdir())) == 2
+        assert np.array_equal(second.result, first.result)
+
+    def test_update(self, archive, composite_options):
+        subject = MeasurementComposite(
+            archive, '210317_a', **composite_options
+        )
+
+        assert subject.update()
+        assert subject.complete
+
+    def test_albedo_cli(self, archive):
+        result = CliRunner().invoke(albedo_cli, [
+            '-in', str(archive), '-fp', '210317_a', '-ofs', 'archive',
+            '-up', '10', '-ulc', '3', '-down', '0', '-dlc', '3',
+            '--skip-plot', '--no-cache',
+        ])
+
+        assert result.exit_code == 0
+        assert archive.parent.joinpath('210317_a_archive.txt').exists()
+
+    def test_archive_subdirectory(self, tmp_path, test_data_path,
+                                  composite_options):
+        session = tmp_path.joinpath('archive', 'session')
+        shutil.copytree(test_data_path, session)
+        archive = shutil.make_archive(
+            tmp_path.joinpath('session'), 'zip', session.parent
+        )
+
+        subject = MeasurementComposite(
+            Path(archive).joinpath('session'), '210317_a',
+            **composite_options
+        )
+        subject.calculate()
+
+        assert len(subject.set_1_files) == 3
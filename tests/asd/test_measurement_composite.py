@@ -184,3 +184,175 @@ class TestMeasurementComposite:
         )
 
         assert measurements.mean() == 1.5
+
+    def test_file_glob_range(self, subject):
+        files = subject._file_glob(0, count=20)
+
+        assert len(files) == 6
+
+    def test_file_glob_missing_set_2_directory(self, subject):
+        subject._set_2_prefix = 'missing/'
+        files = subject._file_glob(0, True)
+        subject._set_2_prefix = ''
+
+        assert files == []
+
+    # ## Incremental updates
+    @pytest.fixture
+    def session_dir(self, tmp_path):
+        return tmp_path
+
+    @staticmethod
+    def copy_file(test_data_path, session_dir, name, size=None):
+        with open(test_data_path.joinpath(name), 'rb') as infile:
+            session_dir.joinpath(name).write_bytes(infile.read(size))
+
+    def test_update_no_files(self, session_dir, file_prefix):
+        subject = MeasurementComposite(session_dir, file_prefix)
+
+        assert not subject.update()
+        assert subject.result is None
+        assert not subject.complete
+
+    def test_update_requires_both_sets(
+            self, test_data_path, session_dir, file_prefix
+    ):
+        subject = MeasurementComposite(
+            session_dir, file_prefix, set_1_count=3, set_2_count=3
+        )
+        self.copy_file(test_data_path, session_dir, '210317_a.000')
+
+        assert not subject.update()
+        assert subject.result is None
+
+        self.copy_file(test_data_path, session_dir, '210317_a.010')
+
+        assert subject.update()
+        assert subject.result is not None
+
+    def test_update_skips_incomplete_files(
+            self, test_data_path, session_dir, file_prefix
+    ):
+        subject = MeasurementComposite(
+            session_dir, file_prefix, set_1_count=1, set_2_count=1
+        )
+        self.copy_file(test_data_path, session_dir, '210317_a.000')
+        self.copy_file(
+            test_data_path, session_dir, '210317_a.010',
+            MeasurementFile.HEADER_BYTES + 100
+        )
+
+        assert not subject.update()
+
+        self.copy_file(test_data_path, session_dir, '210317_a.010')
+
+        assert subject.update()
+        assert subject.complete
+
+    def test_update_reads_files_once(
+            self, test_data_path, session_dir, file_prefix
+    ):
+        subject = MeasurementComposite(
+            session_dir, file_prefix, set_1_count=3, set_2_count=3
+        )
+        self.copy_file(test_data_path, session_dir, '210317_a.000')
+        self.copy_file(test_data_path, session_dir, '210317_a.010')
+        subject.update()
+
+        assert not subject.update()
+        assert subject.set_1_statistics.count == 1
+        assert subject.set_2_statistics.count == 1
+
+    def test_update_matches_calculate(
+            self, test_data_path, session_dir, file_prefix
+    ):
+        subject = MeasurementComposite(
+            session_dir, file_prefix, set_1_count=3, set_2_count=3
+        )
+        for index in [0, 10, 1, 11, 2, 12]:
+            self.copy_file(
+                test_data_path, session_dir, f'210317_a.{index:03d}'
+            )
+            subject.update()
+
+        assert subject.complete
+
+        expected = MeasurementComposite(
+            test_data_path, file_prefix, set_1_count=3, set_2_count=3
+        )
+        expected.calculate()
+
+        assert np.array_equal(subject.set_1, expected.set_1)
+        assert np.array_equal(subject.set_2, expected.set_2)
+        assert np.array_equal(subject.result, expected.result)
+
+    def test_read_workers(self, test_data_path, file_prefix):
+        subject = MeasurementComposite(
+            test_data_path, file_prefix, set_1_count=3, set_2_count=3,
+            read_workers=3,
+        )
+        subject.calculate()
+        expected = MeasurementComposite(
+            test_data_path, file_prefix, set_1_count=3, set_2_count=3
+        )
+        expected.calculate()
+
+        assert np.array_equal(subject.result, expected.result)
+
+    def test_update_read_workers(self, test_data_path, file_prefix):
+        subject = MeasurementComposite(
+            test_data_path, file_prefix, set_1_count=3, set_2_count=3,
+            read_workers=3,
+        )
+        subject.update()
+        expected = MeasurementComposite(
+            test_data_path, file_prefix, set_1_count=3, set_2_count=3
+        )
+        expected.update()
+
+        assert np.array_equal(subject.result, expected.result)
+
+    # ## Statistics
+    def test_robust_mean_unknown(self):
+        with pytest.raises(ValueError):
+            MeasurementComposite('', '', robust_mean='mode')
+
+    def test_set_statistics(self, subject):
+        subject.calculate()
+
+        assert subject.set_1_statistics.count == 3
+        assert subject.set_2_statistics.count == 3
+        # Bands in the SWIR1 detector are not adjusted by the detector split
+        assert subject.set_1_statistics.mean[1000] == \
+               pytest.approx(subject.set_1[1000])
+        assert subject.set_1_std.shape == subject.set_1.shape
+        assert subject.set_2_std.shape == subject.set_2.shape
+
+    def test_calculate_robust_mean(self, test_data_path, file_prefix):
+        subject = MeasurementComposite(
+            test_data_path, file_prefix, robust_mean='median'
+        )
+        subject.calculate()
+
+        assert subject.set_1.dtype == np.float32
+        assert subject.set_1[1000] == pytest.approx(
+            np.median([
+                MeasurementFile(
+                    test_data_path.joinpath(f'{file_prefix}.{index:03d}')
+                ).data[1000] for index in range(3)
+            ]), abs=0.001
+        )
+
+    def test_save_statistics(self, subject):
+        subject.calculate()
+        outfile = Path(subject.save_statistics(self.TEST_RESULT_FILE))
+        statistics = np.loadtxt(outfile.as_posix())
+        outfile.unlink()
+
+        assert statistics.shape == (MeasurementFile.BAND_COUNT, 9)
+        assert statistics[0, 0] == MeasurementFile.MIN_WAVELENGTH
+
+    def test_save_statistics_no_results(self):
+        assert MeasurementComposite('', '').save_statistics(
+            self.TEST_RESULT_FILE
+        ) == ''
@@ -55,3 +55,31 @@ class TestMeasurement(object):
 
     def test_header(self, subject):
         assert subject.header == 'ASDAtwater test'
+
+    def test_mmap_default(self, subject):
+        assert not subject.mmap
+
+    def test_data_mmap(self, test_data_path, data_file, subject):
+        mmap_subject = MeasurementFile(
+            test_data_path.joinpath(data_file), mmap=True
+        )
+
+        assert isinstance(mmap_subject.data, np.memmap)
+        assert not mmap_subject.data.flags.writeable
+        assert mmap_subject.data.dtype == np.float32
+        assert np.array_equal(mmap_subject.data, subject.data)
+
+    @pytest.mark.parametrize('mmap', [False, True])
+    def test_data_truncated_file(self, tmp_path, subject, mmap):
+        truncated = tmp_path.joinpath('truncated.000')
+        truncated.write_bytes(open(subject.file, 'rb').read()[:-4])
+
+        with pytest.raises(ValueError):
+            MeasurementFile(truncated, mmap=mmap).data
+
+    def test_header_record(self, subject):
+        assert subject.header_record['channels'] == MeasurementFile.BAND_COUNT
+
+    def test_acquisition_time(self, subject):
+        assert subject.acquisition_time == \
+               np.datetime64('2021-03-17T11:49:38')
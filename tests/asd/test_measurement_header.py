@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementHeader
+
+
+@pytest.fixture(scope='module')
+def data_files(test_data_path):
+    return [
+        test_data_path.joinpath(f'210317_a.{index:03d}')
+        for index in [0, 1, 2, 10, 11, 12]
+    ]
+
+
+@pytest.fixture(scope='module')
+def subject(data_files):
+    return MeasurementHeader.read(data_files)
+
+
+class TestMeasurementHeader:
+    def test_bytes(self):
+        assert MeasurementHeader.BYTES == 484
+        assert MeasurementHeader.DTYPE.itemsize == MeasurementHeader.BYTES
+
+    def test_read_records(self, subject, data_files):
+        assert subject.shape == (len(data_files),)
+
+    def test_signature(self, subject):
+        assert np.all(subject['signature'] == b'ASD')
+
+    def test_comments(self, subject):
+        assert subject['comments'][0] == b'Atwater test'
+
+    def test_channels(self, subject):
+        assert np.all(subject['channels'] == 2151)
+
+    def test_wavelengths(self, subject):
+        assert subject['channel_1_wavelength'][0] == 350
+        assert subject['wavelength_step'][0] == 1
+
+    def test_splice_wavelengths(self, subject):
+        assert subject['splice1_wavelength'][0] == 1000
+        assert subject['splice2_wavelength'][0] == 1800
+
+    def test_integration_time(self, subject):
+        assert subject['integration_time'][0] == 17
+
+    def test_instrument_number(self, subject):
+        assert subject['instrument_number'][0] == 18020
+
+    def test_counts(self, subject):
+        assert subject['dc_count'][0] == 100
+        assert subject['reference_count'][0] == 100
+        assert subject['sample_count'][0] == 20
+
+    def test_data_type(self, subject):
+        assert MeasurementHeader.DATA_TYPES[subject['data_type'][0]] == 'raw'
+
+    def test_acquisition_time(self, subject):
+        times = MeasurementHeader.acquisition_time(subject)
+
+        assert times.dtype == np.dtype('datetime64[s]')
+        assert times[0] == np.datetime64('2021-03-17T11:49:38')
+        assert times[-1] == np.datetime64('2021-03-17T11:50:36')
+
+    def test_acquisition_time_record(self, subject):
+        assert MeasurementHeader.acquisition_time(subject[1]) == \
+               np.datetime64('2021-03-17T11:49:44')
+
+    def test_from_bytes(self, data_files, subject):
+        with open(data_files[0], 'rb') as infile:
+            header = infile.read(MeasurementHeader.BYTES)
+
+        assert MeasurementHeader.from_bytes(header)[0] == subject[0]
+
+    def test_read_truncated(self, tmp_path):
+        truncated = tmp_path.joinpath('truncated.000')
+        truncated.write_bytes(b'ASD')
+
+        with pytest.raises(ValueError):
+            MeasurementHeader.read([truncated])
@@ -0,0 +1,142 @@
+import json
+import os
+
+import pytest
+
+from spectro_dp.asd import MeasurementIndex
+
+
+@pytest.fixture
+def session_dir(tmp_path):
+    for name in [
+        'site_a.000', 'site_a.001', 'site_a.010', 'site_a.999',
+        'site_a.1000', 'site_a.1001', 'site_b.001', 'site_a_albedo.txt',
+        'site_ab.001', 'site_a.12', 'site_a.0012',
+    ]:
+        tmp_path.joinpath(name).touch()
+    tmp_path.joinpath('sub.002').mkdir()
+
+    return tmp_path
+
+
+@pytest.fixture(scope='module')
+def subject(test_data_path):
+    return MeasurementIndex(test_data_path)
+
+
+class TestMeasurementIndex:
+    def test_directory(self, subject, test_data_path):
+        assert subject.directory == test_data_path
+
+    def test_length(self, subject):
+        assert len(subject) == 6
+
+    def test_files_single(self, subject, test_data_path):
+        assert subject.files('210317_a', 0) == \
+               [test_data_path.joinpath('210317_a.000')]
+
+    def test_files_range(self, subject):
+        files = subject.files('210317_a', 0, 20)
+        assert [file.suffix for file in files] == \
+               ['.000', '.001', '.002', '.010', '.011', '.012']
+
+    def test_files_not_found(self, subject):
+        assert subject.files('210317_a', 3, 5) == []
+
+    def test_files_prefix(self, session_dir):
+        subject = MeasurementIndex(session_dir)
+        assert [file.name for file in subject.files('site_b', 0, 10)] == \
+               ['site_b.001']
+
+    def test_files_prefix_matches_glob(self, session_dir):
+        subject = MeasurementIndex(session_dir)
+        assert subject.files('site', 1) == \
+               sorted(session_dir.glob('site*.001'))
+
+    def test_files_exact(self, session_dir):
+        subject = MeasurementIndex(session_dir)
+        assert [file.name for file in subject.files('site_a', 1)] == \
+               ['site_a.001', 'site_ab.001']
+        assert [
+            file.name for file in subject.files('site_a', 1, exact=True)
+        ] == ['site_a.001']
+
+    def test_files_zero_padded(self, session_dir):
+        subject = MeasurementIndex(session_dir)
+        assert [file.name for file in subject.files('site_a', 12)] == []
+
+    def test_files_beyond_999(self, session_dir):
+        subject = MeasurementIndex(session_dir)
+        assert [file.name for file in subject.files('site_a', 999, 3)] == \
+               ['site_a.999', 'site_a.1000', 'site_a.1001']
+
+    def test_numbered_files(self, session_dir):
+        subject = MeasurementIndex(session_dir)
+        assert [
+            (number, file.name)
+            for number, file in subject.numbered_files('site_a')
+        ] == [
+            (0, 'site_a.000'), (1, 'site_a.001'), (1, 'site_ab.001'),
+            (10, 'site_a.010'),
+            (999, 'site_a.999'), (1000, 'site_a.1000'),
+            (1001, 'site_a.1001'),
+        ]
+
+    def test_skips_directories(self, session_dir):
+        assert MeasurementIndex(session_dir).files('sub', 2) == []
+
+    @pytest.mark.parametrize('name, number', [
+        ('210317_a.000', 0),
+        ('210317_a.1234', 1234),
+        ('210317_a.12', None),
+        ('210317_a.0012', None),
+        ('210317_a.0999', None),
+        ('210317_a.txt', None),
+        ('.000', None),
+        ('210317_a', None),
+    ])
+    def test_file_number(self, name, number):
+        assert MeasurementIndex.file_number(name) == number
+
+    def test_missing_directory(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            MeasurementIndex(tmp_path.joinpath('missing'))
+
+    def test_cache_default(self, session_dir):
+        MeasurementIndex(session_dir)
+        assert not session_dir.joinpath(MeasurementIndex.CACHE_FILE).exists()
+
+    def test_cache_written(self, session_dir):
+        subject = MeasurementIndex(session_dir, cache=True)
+        assert subject.cache_file.exists()
+
+    def test_cache_read(self, session_dir):
+        MeasurementIndex(session_dir, cache=True)
+        stat = os.stat(session_dir)
+        session_dir.joinpath('site_a.000').unlink()
+        # Keep the directory modification time to use the stale cache
+        os.utime(session_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        subject = MeasurementIndex(session_dir, cache=True)
+        assert len(subject.files('site_a', 0)) == 1
+
+    def test_cache_invalidated(self, session_dir):
+        MeasurementIndex(session_dir, cache=True)
+        session_dir.joinpath('site_a.002').touch()
+        stat = os.stat(session_dir)
+        os.utime(
+            session_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000)
+        )
+
+        subject = MeasurementIndex(session_dir, cache=True)
+        assert len(subject.files('site_a', 2)) == 1
+
+    def test_cache_parsed_again(self, session_dir):
+        subject = MeasurementIndex(session_dir, cache=True)
+        cache = json.loads(subject.cache_file.read_text())
+        cache['files'].append([12, 'site_a.12'])
+        subject.cache_file.write_text(json.dumps(cache))
+
+        assert MeasurementIndex(session_dir, cache=True).files(
+            'site_a', 12
+        ) == []
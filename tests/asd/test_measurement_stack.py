@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementFile, MeasurementStack
+
+
+@pytest.fixture(scope='module')
+def data_files(test_data_path):
+    return [
+        test_data_path.joinpath(f'210317_a.{index:03d}')
+        for index in [0, 1, 2]
+    ]
+
+
+@pytest.fixture(scope='module')
+def subject(data_files):
+    return MeasurementStack(data_files)
+
+
+class TestMeasurementStack:
+    def test_length(self, subject, data_files):
+        assert len(subject) == len(data_files)
+
+    def test_files(self, subject, data_files):
+        assert subject.files == data_files
+
+    def test_data_shape(self, subject, data_files):
+        assert subject.data.shape == \
+               (len(data_files), MeasurementFile.BAND_COUNT)
+
+    def test_data_dtype(self, subject):
+        assert subject.data.dtype == np.float32
+
+    def test_data_rows(self, subject, data_files):
+        for row, file in zip(subject.data, data_files):
+            assert np.array_equal(row, MeasurementFile(file).data)
+
+    def test_header(self, subject):
+        assert subject.header(0) == 'ASDAtwater test'
+
+    def test_headers_lazy(self, data_files):
+        subject = MeasurementStack(data_files)
+        assert subject._headers == [None] * len(data_files)
+
+        subject.header(1)
+        assert subject._headers[0] is None
+        assert subject._headers[1] is not None
+
+    def test_headers(self, subject, data_files):
+        assert len(subject.headers) == len(data_files)
+
+    def test_header_records(self, subject, data_files):
+        assert subject.header_records.shape == (len(data_files),)
+        assert subject.header_records['comments'][0] == b'Atwater test'
+
+    def test_mean(self, subject):
+        assert subject.mean()[0] == pytest.approx(692.0561, abs=0.0001)
+        assert subject.mean().dtype == np.float32
+
+    def test_median(self, subject):
+        assert np.array_equal(
+            subject.median(), np.median(subject.data, axis=0)
+        )
+
+    def test_std(self, subject):
+        assert np.allclose(subject.std(), subject.data.std(axis=0))
+
+    def test_empty(self):
+        subject = MeasurementStack([])
+        assert subject.data.shape == (0, MeasurementFile.BAND_COUNT)
+
+    def test_truncated_file(self, tmp_path, data_files):
+        truncated = tmp_path.joinpath('truncated.000')
+        truncated.write_bytes(open(data_files[0], 'rb').read()[:-4])
+
+        with pytest.raises(ValueError):
+            MeasurementStack([truncated]).data
+
+    @pytest.mark.parametrize('read_workers', [2, 8])
+    def test_read_workers(self, subject, data_files, read_workers):
+        stack = MeasurementStack(data_files * 3, read_workers=read_workers)
+        assert np.array_equal(stack.data, np.tile(subject.data, (3, 1)))
+
+    def test_read_workers_first_error(self, tmp_path, data_files):
+        truncated = []
+        for index in [1, 2]:
+            file = tmp_path.joinpath(f'truncated.{index:03d}')
+            file.write_bytes(open(data_files[0], 'rb').read()[:-4])
+            truncated.append(file)
+
+        with pytest.raises(ValueError, match='truncated.001'):
+            MeasurementStack(
+                data_files + truncated, read_workers=4
+            ).data
+
+    def test_read(self, subject, data_files):
+        stack = MeasurementStack(data_files, read_workers=2)
+        stack.read()
+
+        assert np.array_equal(stack.data, subject.data)
+        assert stack.header_records.tobytes() == \
+            subject.header_records.tobytes()
+
+    def test_read_truncated_file(self, tmp_path, data_files):
+        truncated = tmp_path.joinpath('truncated.000')
+        truncated.write_bytes(open(data_files[0], 'rb').read()[:-4])
+
+        with pytest.raises(ValueError):
+            MeasurementStack([truncated]).read()
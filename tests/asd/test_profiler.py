@@ -0,0 +1,221 @@
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from spectro_dp.asd import MeasurementComposite, MeasurementStack, profiler
+from spectro_dp.asd.albedo import cli as albedo_cli
+from spectro_dp.asd.batch import BatchJob, run_jobs
+from spectro_dp.asd.set_cache import SetCache
+from spectro_dp.asd.spectrum_cache import shared_spectrum_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_spectrum_cache():
+    # Counted reads go to disk, not to spectra cached by other tests
+    shared_spectrum_cache().clear()
+
+
+@pytest.fixture
+def active_profiler():
+    active = profiler.enable()
+    yield active
+    profiler.disable()
+
+
+class TestProfiler:
+    def test_stage(self):
+        subject = profiler.Profiler()
+
+        with subject.stage('read'):
+            pass
+        with subject.stage('read'):
+            pass
+
+        assert subject.stages['read']['calls'] == 2
+        assert subject.stages['read']['wall'] >= 0
+        assert subject.stages['read']['cpu'] >= 0
+
+    def test_stage_with_error(self):
+        subject = profiler.Profiler()
+
+        with pytest.raises(ValueError):
+            with subject.stage('read'):
+                raise ValueError()
+
+        assert subject.stages['read']['calls'] == 1
+
+    def test_count(self):
+        subject = profiler.Profiler()
+
+        subject.count('files_read')
+        subject.count('bytes_read', 100)
+        subject.count('bytes_read', 50)
+
+        assert subject.counters == dict(files_read=1, bytes_read=150)
+
+    def test_merge(self):
+        subject = profiler.Profiler()
+        subject.add_stage('read', 1.0, 0.5)
+        subject.count('files_read', 2)
+        other = profiler.Profiler()
+        other.add_stage('read', 2.0, 1.0, calls=3)
+        other.add_stage('save', 1.0, 1.0)
+        other.count('files_read', 4)
+
+        subject.merge(other.state())
+
+        assert subject.stages == dict(
+            read=dict(calls=4, wall=3.0, cpu=1.5),
+            save=dict(calls=1, wall=1.0, cpu=1.0),
+        )
+        assert subject.counters == dict(files_read=6)
+
+    def test_save(self, tmp_path):
+        subject = profiler.Profiler()
+        subject.add_stage('read', 1.0, 0.5)
+        subject.count('files_read', 2)
+
+        outfile = subject.save(tmp_path.joinpath('profile.jsonl'))
+
+        with open(outfile) as infile:
+            records = [json.loads(line) for line in infile]
+        assert records == [
+            dict(type='stage', name='read', calls=1, wall=1.0, cpu=0.5),
+            dict(type='counter', name='files_read', value=2),
+        ]
+
+    def test_summary(self):
+        subject = profiler.Profiler()
+        subject.add_stage('average', 1.0, 0.5)
+        subject.count('files_read', 2)
+
+        summary = subject.summary().splitlines()
+
+        assert summary[0].split() == \
+            ['Stage', 'Calls', 'Wall', '[s]', 'CPU', '[s]']
+        assert summary[1].split() == ['average', '1', '1.0000', '0.5000']
+        assert summary[-1].split() == ['files_read', '2']
+
+    def test_disabled(self):
+        assert profiler.active() is None
+
+        with profiler.stage('read'):
+            profiler.count('files_read')
+
+        assert profiler.stage('read') is profiler.stage('save')
+
+    def test_enable(self, active_profiler):
+        with profiler.stage('read'):
+            profiler.count('files_read')
+
+        assert profiler.active() is active_profiler
+        assert active_profiler.stages['read']['calls'] == 1
+        assert active_profiler.counters == dict(files_read=1)
+
+
+class TestProfiledReads:
+    def test_stack_counters(self, active_profiler, test_data_path):
+        stack = MeasurementStack(
+            sorted(Path(test_data_path).glob('210317_a*.00[0-2]'))
+        )
+
+        stack.data
+
+        assert len(stack) == 3
+        assert active_profiler.counters['files_read'] == 3
+        assert active_profiler.counters['bytes_read'] == stack.data.nbytes
+        assert active_profiler.stages['read']['calls'] == 1
+
+    def test_composite_stages(self, active_profiler, test_data_path,
+                              tmp_path):
+        composite = MeasurementComposite(
+            test_data_path, '210317_a',
+            set_1_index=0, set_1_count=3, set_2_index=10, set_2_count=3,
+            set_cache=SetCache(tmp_path),
+        )
+
+        composite.calculate()
+        composite.calculate()
+
+        for stage in ['glob', 'read', 'average', 'splice']:
+            assert stage in active_profiler.stages
+        assert active_profiler.counters['set_cache_misses'] == 2
+        assert active_profiler.counters['set_cache_hits'] == 2
+        assert active_profiler.counters['files_read'] == 6
+
+    def test_batch_workers(self, active_profiler, test_data_path):
+        jobs = [
+            BatchJob(
+                test_data_path, '210317_a', 0, 10,
+                set_1_count=3, set_2_count=3,
+                output_file_suffix='pytest_profile_batch',
+            )
+            for _ in range(2)
+        ]
+
+        try:
+            results = run_jobs(jobs, workers=2)
+        finally:
+            Path(test_data_path).joinpath(
+                '210317_a_pytest_profile_batch.txt'
+            ).unlink(missing_ok=True)
+
+        assert [result['status'] for result in results] == ['ok', 'ok']
+        assert all('profile' not in result for result in results)
+        assert active_profiler.counters['files_read'] == 12
+        assert active_profiler.stages['save']['calls'] == 2
+
+
+class TestProfileOptions:
+    ARGS = [
+        '-fp', '210317_a', '-ofs', 'pytest_profile',
+        '-up', '10', '-ulc', '3', '-down', '0', '-dlc', '3',
+        '--skip-plot', '--no-cache',
+    ]
+
+    @pytest.fixture
+    def result_file(self, test_data_path):
+        result_file = Path(test_data_path).joinpath(
+            '210317_a_pytest_profile.txt'
+        )
+        yield result_file
+        if result_file.exists():
+            result_file.unlink()
+
+    def test_profile(self, test_data_path, result_file):
+        result = CliRunner().invoke(
+            albedo_cli, ['-in', str(test_data_path), *self.ARGS, '--profile']
+        )
+
+        assert result.exit_code == 0
+        assert 'Stage' in result.output
+        assert 'files_read' in result.output
+        assert profiler.active() is None
+
+    def test_profile_out(self, test_data_path, result_file, tmp_path):
+        outfile = tmp_path.joinpath('profile.jsonl')
+
+        result = CliRunner().invoke(
+            albedo_cli,
+            ['-in', str(test_data_path), *self.ARGS,
+             '--profile-out', str(outfile)]
+        )
+
+        assert result.exit_code == 0
+        with open(outfile) as infile:
+            records = {
+                record['name']: record
+                for record in map(json.loads, infile)
+            }
+        assert records['total']['calls'] == 1
+        assert records['files_read']['value'] == 6
+
+    def test_without_profile(self, test_data_path, result_file):
+        result = CliRunner().invoke(
+            albedo_cli, ['-in', str(test_data_path), *self.ARGS]
+        )
+
+        assert result.exit_code == 0
+        assert 'Stage' not in result.output
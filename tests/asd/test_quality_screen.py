@@ -0,0 +1,272 @@
+import csv
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from spectro_dp.asd import MeasurementComposite, MeasurementFile, \
+    MeasurementStack
+from spectro_dp.asd.quality_screen import QualityScreen, cli
+from spectro_dp.asd.set_cache import SetCache
+from spectro_dp.asd.spectrum_cache import shared_spectrum_cache
+
+FILE_NAMES = [
+    '210317_a.000', '210317_a.001', '210317_a.002',
+    '210317_a.010', '210317_a.011', '210317_a.012',
+]
+
+
+@pytest.fixture(scope='module')
+def data(test_data_path):
+    return MeasurementStack(
+        [test_data_path.joinpath(name) for name in FILE_NAMES]
+    ).data
+
+
+@pytest.fixture
+def session(tmp_path, test_data_path):
+    """
+    Copy of the test data with a dark frame as second file
+    """
+    shared_spectrum_cache().clear()
+    session = tmp_path.joinpath('session')
+    shutil.copytree(test_data_path, session, symlinks=True)
+    dark_file = session.joinpath(FILE_NAMES[1])
+    content = bytearray(dark_file.read_bytes())
+    content[MeasurementFile.HEADER_BYTES:] = np.full(
+        MeasurementFile.BAND_COUNT, 5, dtype=MeasurementFile.DATA_TYPE
+    ).tobytes()
+    dark_file.write_bytes(bytes(content))
+    yield session
+    shared_spectrum_cache().clear()
+
+
+@pytest.fixture
+def composite_options():
+    return dict(
+        set_1_index=0, set_1_count=3, set_2_index=10, set_2_count=3
+    )
+
+
+class TestQualityScreen:
+    def test_passes_test_data(self, data):
+        table = QualityScreen().screen(data, [0, 0, 0, 1, 1, 1])
+
+        assert len(table) == len(FILE_NAMES)
+        assert np.all(table['flags'] == 0)
+
+    def test_saturated(self, data):
+        data = data[:3].copy()
+        data[0, 100:110] = QualityScreen.SATURATION_DN
+
+        table = QualityScreen().screen(data)
+
+        assert list(table['saturated']) == [10, 0, 0]
+        assert QualityScreen.reasons(table['flags'][0]) == ['saturated']
+
+    def test_negative(self, data):
+        data = data[:3].copy()
+        data[1] = -data[1]
+
+        table = QualityScreen().screen(data)
+
+        assert table['negative'][1] > 0.9 * MeasurementFile.BAND_COUNT
+        assert 'negative' in QualityScreen.reasons(table['flags'][1])
+        assert table['flags'][0] == 0
+
+    def test_dark(self, data):
+        data = data[:3].copy()
+        data[2] = 5
+
+        table = QualityScreen(checks=['dark']).screen(data)
+
+        assert table['signal'][2] == 5
+        assert list(table['flags'] != 0) == [False, False, True]
+
+    def test_deviation(self, data):
+        data = data[:3].copy()
+        data[0] *= 1.5
+
+        table = QualityScreen(checks=['deviation']).screen(data)
+
+        assert table['deviation'][0] == pytest.approx(0.5, abs=0.02)
+        assert list(table['flags'] != 0) == [True, False, False]
+
+    def test_splice_step(self, data):
+        data = data[:3].copy()
+        data[1, :QualityScreen.SPLICE_BAND + 1] *= 1.2
+
+        table = QualityScreen(checks=['splice_step']).screen(data)
+
+        assert table['splice_step'][1] == pytest.approx(-1 / 6, abs=0.01)
+        assert list(table['flags'] != 0) == [False, True, False]
+
+    def test_drift(self, data):
+        data = np.repeat(data[:1], 10, axis=0)
+        data *= np.linspace(1, 1.18, 10, dtype=np.float32)[:, None]
+
+        table = QualityScreen(checks=['drift']).screen(data)
+
+        assert table['drift'] == pytest.approx(np.full(10, 0.18), rel=1e-3)
+        assert np.all(table['flags'] != 0)
+
+    def test_drift_groups(self, data):
+        data = np.repeat(data[:1], 6, axis=0)
+        data[3:] *= np.linspace(1, 1.1, 3, dtype=np.float32)[:, None]
+
+        table = QualityScreen(checks=['drift']).screen(
+            data, [0, 0, 0, 1, 1, 1]
+        )
+
+        assert list(table['flags'] != 0) == [False] * 3 + [True] * 3
+
+    def test_groups(self, data):
+        # Without groups, the second set deviates from the first one
+        assert np.all(
+            QualityScreen(checks=['deviation']).screen(data)['flags'][3:]
+        )
+        assert not np.any(
+            QualityScreen(checks=['deviation']).screen(
+                data, ['b', 'b', 'b', 'a', 'a', 'a']
+            )['flags']
+        )
+
+    def test_groups_of_different_size(self, data):
+        data = data.copy()
+        data[4] *= 1.5
+
+        table = QualityScreen().screen(data, [0, 0, 1, 2, 2, 2])
+
+        assert list(table['flags'] != 0) == \
+            [False, False, False, False, True, False]
+        assert table['deviation'][2] == 0
+
+    def test_unknown_check(self):
+        with pytest.raises(ValueError):
+            QualityScreen(checks=['unknown'])
+
+    def test_empty(self):
+        assert len(QualityScreen().screen(
+            np.empty((0, MeasurementFile.BAND_COUNT))
+        )) == 0
+
+    def test_screen_files(self, data, test_data_path, monkeypatch):
+        monkeypatch.setattr(QualityScreen, 'CHUNK_FILES', 2)
+        files = [test_data_path.joinpath(name) for name in FILE_NAMES]
+        subject = QualityScreen()
+
+        assert np.array_equal(
+            subject.screen_files(files),
+            subject.screen(data, [0, 0, 0, 1, 1, 1])
+        )
+
+    def test_save(self, tmp_path, session):
+        files = [session.joinpath(name) for name in FILE_NAMES[:3]]
+        table = QualityScreen().screen_files(files)
+
+        outfile = QualityScreen.save(
+            tmp_path.joinpath('quality.csv'), files, table
+        )
+
+        with open(outfile) as infile:
+            rows = list(csv.DictReader(infile))
+        assert [row['flagged'] for row in rows] == ['0', '1', '0']
+        assert rows[1]['reasons'].split(';')[0] == 'dark'
+        assert rows[1]['signal'] == '5'
+
+
+class TestCompositeQualityScreen:
+    def test_exclude_flagged(self, session, test_data_path,
+                             composite_options):
+        expected = MeasurementStack(
+            [test_data_path.joinpath(FILE_NAMES[name]) for name in [0, 2]]
+        ).mean()
+
+        subject = MeasurementComposite(
+            session, '210317_a', splice_correction=None,
+            quality_screen=QualityScreen(), **composite_options
+        )
+        subject.calculate()
+
+        assert np.array_equal(subject.set_1, expected)
+        assert subject.set_1_statistics.count == 2
+        assert len(subject.set_1_files) == 3
+        assert list(subject.set_1_quality['flags'] != 0) == \
+            [False, True, False]
+        assert not np.any(subject.set_2_quality['flags'])
+
+    def test_drift_kept(self, session, composite_options, capsys):
+        subject = MeasurementComposite(
+            session, '210317_a', splice_correction=None,
+            quality_screen=QualityScreen(checks=['drift'], drift_limit=0),
+            **composite_options
+        )
+        subject.calculate()
+
+        assert subject.set_1_statistics.count == 3
+        assert np.all(subject.set_1_quality['flags'] != 0)
+        assert 'Warning: Set-1 failed: drift' in capsys.readouterr().out
+
+    def test_without_screen(self, session, composite_options):
+        subject = MeasurementComposite(
+            session, '210317_a', **composite_options
+        )
+        subject.calculate()
+
+        assert subject.set_1_statistics.count == 3
+        assert subject.set_1_quality is None
+
+    def test_all_flagged(self, session, composite_options):
+        composite_options.update(set_1_index=1, set_1_count=1)
+        subject = MeasurementComposite(
+            session, '210317_a', quality_screen=QualityScreen(),
+            **composite_options
+        )
+
+        with pytest.raises(ValueError):
+            subject.calculate()
+
+    def test_set_cache(self, session, tmp_path, composite_options):
+        cache = SetCache(tmp_path.joinpath('cache'))
+        first = MeasurementComposite(
+            session, '210317_a', set_cache=cache,
+            quality_screen=QualityScreen(), **composite_options
+        )
+        first.calculate()
+
+        second = MeasurementComposite(
+            session, '210317_a', set_cache=cache,
+            quality_screen=QualityScreen(), **composite_options
+        )
+        second.calculate()
+
+        assert np.array_equal(second.result, first.result)
+        assert np.array_equal(second.set_1_quality, first.set_1_quality)
+        assert second.set_1_statistics.count == 2
+
+        unscreened = MeasurementComposite(
+            session, '210317_a', set_cache=cache, **composite_options
+        )
+        unscreened.calculate()
+
+        assert unscreened.set_1_statistics.count == 3
+
+
+class TestQualityScreenCli:
+    def test_cli(self, session):
+        result = CliRunner().invoke(cli, ['-in', str(session)])
+
+        assert result.exit_code == 0
+        assert 'Flagged 1 of 7 file(s)' in result.output
+        with open(Path(session, 'quality.csv')) as infile:
+            rows = list(csv.DictReader(infile))
+        assert [
+            row['file'] for row in rows if row['flagged'] == '1'
+        ] == [session.joinpath(FILE_NAMES[1]).as_posix()]
+
+    def test_cli_no_files(self, tmp_path):
+        result = CliRunner().invoke(cli, ['-in', str(tmp_path)])
+
+        assert 'ERROR: No complete measurement files found.' in result.output
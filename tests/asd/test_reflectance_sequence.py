@@ -0,0 +1,206 @@
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from spectro_dp.asd import MeasurementFile
+from spectro_dp.asd.cube_store import CubeStore
+from spectro_dp.asd.reflectance_sequence import ReflectanceSequence, cli
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+START_TIME = np.datetime64('2021-03-17T11:00:00')
+FILE_PREFIX = 'transect'
+# File numbers of the white references, in groups of two
+WHITE_REFERENCES = [(0, 2), (5, 2), (10, 2)]
+FILE_COUNT = 12
+
+
+def white_reference_scale(seconds):
+    """
+    Illumination changing linearly over time
+    """
+    return 1 + seconds / 100
+
+
+@pytest.fixture(scope='module')
+def session_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('session')
+    campaign = SyntheticCampaign()
+    white = np.array([
+        number for first, count in WHITE_REFERENCES
+        for number in range(first, first + count)
+    ])
+    for number in range(FILE_COUNT):
+        seconds = number * 10
+        spectrum = np.full(
+            MeasurementFile.BAND_COUNT, white_reference_scale(seconds)
+        )
+        if number not in white:
+            spectrum *= 0.5 + number / 100
+        directory.joinpath(f"{FILE_PREFIX}.{number:03d}").write_bytes(
+            campaign.header(START_TIME + np.timedelta64(seconds, 's')) +
+            spectrum.astype(MeasurementFile.DATA_TYPE).tobytes()
+        )
+    return directory
+
+
+def surface_numbers():
+    return [2, 3, 4, 7, 8, 9]
+
+
+class TestReflectanceSequence:
+    def subject(self, session_dir, **kwargs):
+        return ReflectanceSequence.from_directory(
+            session_dir, FILE_PREFIX,
+            white_reference_ranges=WHITE_REFERENCES, **kwargs
+        )
+
+    def test_files(self, session_dir):
+        subject = self.subject(session_dir)
+
+        assert [file.name for file in subject.surface_files] == [
+            f"{FILE_PREFIX}.{number:03d}" for number in surface_numbers()
+        ]
+        assert [len(group) for group in subject.white_reference_groups] == \
+            [2, 2, 2]
+
+    def test_mode_unknown(self, session_dir):
+        with pytest.raises(ValueError):
+            self.subject(session_dir, mode='closest')
+
+    def test_white_references_required(self, session_dir):
+        with pytest.raises(ValueError):
+            ReflectanceSequence.from_directory(session_dir, FILE_PREFIX)
+
+    def test_no_white_reference_files(self, session_dir):
+        with pytest.raises(FileNotFoundError):
+            ReflectanceSequence.from_directory(
+                session_dir, FILE_PREFIX, white_reference_ranges=[(50, 2)]
+            )
+
+    def test_no_surface_files(self, session_dir):
+        with pytest.raises(FileNotFoundError):
+            ReflectanceSequence.from_directory(
+                session_dir, FILE_PREFIX,
+                white_reference_ranges=[(0, FILE_COUNT)]
+            )
+
+    def test_white_reference_times(self, session_dir):
+        subject = self.subject(session_dir)
+        subject.calculate()
+
+        assert subject.white_reference_times.tolist() == [
+            (START_TIME + np.timedelta64(seconds, 's')).tolist()
+            for seconds in [5, 55, 105]
+        ]
+        assert subject.white_references[:, 0] == pytest.approx(
+            white_reference_scale(np.array([5, 55, 105]))
+        )
+
+    def test_nearest(self, session_dir):
+        subject = self.subject(session_dir, splice_correction=None)
+        result = subject.calculate()
+
+        assert result.shape == (6, MeasurementFile.BAND_COUNT)
+        assert result is subject.result
+        for row, number in enumerate(surface_numbers()):
+            group_time = min(
+                [5, 55, 105], key=lambda time: abs(time - number * 10)
+            )
+            assert result[row] == pytest.approx(
+                (0.5 + number / 100) *
+                white_reference_scale(number * 10) /
+                white_reference_scale(group_time)
+            )
+
+    def test_interpolate(self, session_dir):
+        subject = self.subject(session_dir, mode='interpolate')
+        result = subject.calculate()
+
+        for row, number in enumerate(surface_numbers()):
+            assert result[row] == pytest.approx(0.5 + number / 100)
+
+    def test_matches_single_file(self, session_dir):
+        subject = self.subject(session_dir)
+        result = subject.calculate()
+
+        surface = MeasurementFile(subject.surface_files[0]).data
+        white_reference = np.mean([
+            MeasurementFile(file).data
+            for file in subject.white_reference_groups[0]
+        ], axis=0)
+        assert result[0] == pytest.approx(surface / white_reference)
+
+    def test_white_reference_prefix(self, session_dir, tmp_path):
+        campaign = SyntheticCampaign(noise=0, split_step=0)
+        for number, seconds in [(0, 0), (1, 1), (4, 60), (5, 61)]:
+            campaign.write_file(
+                tmp_path.joinpath(f"wr_{FILE_PREFIX}.{number:03d}"),
+                START_TIME + np.timedelta64(seconds, 's'), up_looking=True
+            )
+        for number in range(3):
+            campaign.write_file(
+                tmp_path.joinpath(f"{FILE_PREFIX}.{number:03d}"),
+                START_TIME + np.timedelta64(number * 20, 's'),
+            )
+
+        subject = ReflectanceSequence.from_directory(
+            tmp_path, FILE_PREFIX, white_reference_prefix='wr_',
+            splice_correction=None,
+        )
+        result = subject.calculate()
+
+        assert [len(group) for group in subject.white_reference_groups] == \
+            [2, 2]
+        assert result == pytest.approx(
+            np.tile(SyntheticCampaign.snow_reflectance(), (3, 1)), rel=1e-5
+        )
+
+    def test_save(self, session_dir, tmp_path):
+        subject = self.subject(session_dir)
+        assert subject.save(tmp_path.joinpath('empty.csv')) == ''
+
+        subject.calculate()
+        lines = tmp_path.joinpath(
+            subject.save(tmp_path.joinpath('result.csv'))
+        ).read_text().splitlines()
+
+        assert len(lines) == 7
+        assert lines[0].startswith('file,time,350,351')
+        assert lines[1].startswith(
+            f"{FILE_PREFIX}.002,2021-03-17T11:00:20,"
+        )
+        assert len(lines[1].split(',')) == 2 + MeasurementFile.BAND_COUNT
+
+    def test_append_to_store(self, session_dir, tmp_path):
+        subject = self.subject(session_dir)
+        subject.calculate()
+        store = CubeStore(tmp_path.joinpath('store'))
+
+        rows = subject.append_to_store(store, site='transect')
+
+        assert rows == list(range(6))
+        assert store.read() == pytest.approx(subject.result)
+        assert store[0]['prefix'] == f"{FILE_PREFIX}.002"
+
+
+class TestCli:
+    def test_cli(self, session_dir, tmp_path):
+        output = tmp_path.joinpath('result.csv')
+        arguments = [
+            '-in', str(session_dir), '-fp', FILE_PREFIX, '-o', str(output),
+            '--interpolate', '--store', str(tmp_path.joinpath('store')),
+        ]
+        for first, count in WHITE_REFERENCES:
+            arguments += ['-wr', str(first), str(count)]
+
+        result = CliRunner().invoke(cli, arguments)
+
+        assert result.exit_code == 0
+        assert len(output.read_text().splitlines()) == 7
+        assert len(CubeStore(tmp_path.joinpath('store'))) == 6
+
+    def test_cli_no_white_references(self, session_dir):
+        result = CliRunner().invoke(
+            cli, ['-in', str(session_dir), '-fp', FILE_PREFIX]
+        )
+        assert 'ERROR' in result.output
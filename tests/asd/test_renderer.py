@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import pytest
+
+from spectro_dp.asd import MeasurementComposite, MeasurementFile
+from spectro_dp.asd.renderer import (
+    Renderer, render_composites, render_spectra, shared_renderer
+)
+
+
+@pytest.fixture(scope='module')
+def composite(test_data_path):
+    composite = MeasurementComposite(
+        test_data_path, '210317_a', set_1_count=3, set_2_count=3
+    )
+    composite.calculate()
+    return composite
+
+
+PNG_SIGNATURE = b'\x89PNG'
+
+
+class TestRenderer:
+    def test_render_png(self, composite, tmp_path):
+        outfile = tmp_path.joinpath('albedo.png')
+        result = Renderer().render(composite, outfile)
+
+        assert result == outfile.as_posix()
+        assert outfile.read_bytes()[:4] == PNG_SIGNATURE
+
+    def test_render_svg(self, composite, tmp_path):
+        outfile = tmp_path.joinpath('albedo.svg')
+        Renderer().render(composite, outfile)
+
+        assert b'<svg' in outfile.read_bytes()
+
+    def test_render_reuses_lines(self, composite, tmp_path):
+        subject = Renderer()
+        lines = subject.figure.axes[0].lines + subject.figure.axes[1].lines
+
+        subject.render(composite, tmp_path.joinpath('1.png'))
+        subject.render(
+            composite, tmp_path.joinpath('2.png'), set_1_label='Down'
+        )
+
+        assert len(subject.figure.axes) == 2
+        assert subject.figure.axes[0].lines + \
+            subject.figure.axes[1].lines == lines
+        assert (lines[2].get_ydata() == composite.result).all()
+
+    def test_render_labels(self, composite, tmp_path):
+        subject = Renderer()
+        subject.render(
+            composite, tmp_path.joinpath('1.png'),
+            composite_title='Albedo', set_1_label='Down', set_2_label='Up',
+        )
+
+        legend = subject.figure.axes[0].get_legend()
+        assert [text.get_text() for text in legend.get_texts()] == \
+            ['Down', 'Up']
+        assert subject.figure.axes[1].get_title() == 'Albedo'
+
+    def test_render_layout_per_title(self, composite, tmp_path):
+        subject = Renderer()
+        subject.render(composite, tmp_path.joinpath('1.png'))
+        top = subject.figure.axes[1].get_position().y1
+
+        subject.render(
+            composite, tmp_path.joinpath('2.png'),
+            composite_title='Albedo\nSite A\nTransect 3',
+        )
+
+        # The lower plot shrinks to make room for the longer title
+        assert subject.figure.axes[1].get_position().y1 < top
+
+    def test_dpi(self):
+        assert Renderer(dpi=50).figure.dpi == 50
+
+    def test_shared_renderer(self):
+        assert shared_renderer() is shared_renderer()
+        assert shared_renderer(dpi=50).figure.dpi == 50
+
+
+class TestRenderComposites:
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_render_all(self, composite, tmp_path, workers):
+        jobs = [
+            (composite, tmp_path.joinpath(f"{index}.png"), {})
+            for index in range(3)
+        ]
+
+        result = render_composites(jobs, workers=workers)
+
+        assert result == [outfile.as_posix() for _c, outfile, _o in jobs]
+        for outfile in result:
+            assert Path(outfile).read_bytes()[:4] == PNG_SIGNATURE
+
+
+class TestRenderSpectra:
+    def test_render_png(self, test_data_path, tmp_path):
+        spectra = [
+            (suffix, MeasurementFile(
+                Path(test_data_path).joinpath(f"210317_a.{suffix}")
+            ).data)
+            for suffix in ['000', '001']
+        ]
+        outfile = tmp_path.joinpath('white_references.png')
+
+        result = render_spectra(spectra, outfile, title='White References')
+
+        assert result == outfile.as_posix()
+        assert outfile.read_bytes()[:4] == PNG_SIGNATURE
@@ -0,0 +1,138 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementComposite, MeasurementFile
+from spectro_dp.asd.resampling import BandResampler
+
+
+@pytest.fixture
+def response_table(tmp_path):
+    table = tmp_path.joinpath('sensor.csv')
+    table.write_text(
+        'wavelength,blue,red\n'
+        '400,0,0\n'
+        '450,1,0\n'
+        '500,0,0\n'
+        '600,0,0\n'
+        '650,0,0.5\n'
+        '700,0,0\n'
+    )
+    return table
+
+
+class TestBandResampler:
+    def test_weights_normalized(self):
+        subject = BandResampler.from_gaussian([500, 1000], [10, 50])
+
+        assert subject.weights.shape == (2, MeasurementFile.BAND_COUNT)
+        assert subject.weights.sum(axis=1) == pytest.approx(1)
+        assert subject.band_names == ['1', '2']
+        assert (subject.centers == [500, 1000]).all()
+
+    def test_gaussian_fwhm(self):
+        subject = BandResampler.from_gaussian([1000], [20])
+        weights = subject.weights[0]
+        peak = weights.max()
+
+        assert weights[1000 - 350] == peak
+        assert weights[1010 - 350] == pytest.approx(peak / 2)
+
+    def test_from_response_table(self, response_table):
+        subject = BandResampler.from_response_table(response_table)
+
+        assert subject.band_names == ['blue', 'red']
+        assert subject.centers == pytest.approx([450, 650])
+        assert subject.weights[0, :400 - 350].sum() == 0
+
+    def test_weights_shape(self):
+        with pytest.raises(ValueError):
+            BandResampler(np.ones((1, 10)), ['a'])
+
+    def test_weights_no_response(self):
+        with pytest.raises(ValueError):
+            BandResampler(np.zeros((1, MeasurementFile.BAND_COUNT)), ['a'])
+
+    def test_band_names_count(self):
+        with pytest.raises(ValueError):
+            BandResampler(np.ones((2, MeasurementFile.BAND_COUNT)), ['a'])
+
+    @pytest.mark.parametrize('sensor', list(BandResampler.SENSORS))
+    def test_for_sensor(self, sensor):
+        subject = BandResampler.for_sensor(sensor)
+
+        assert len(subject) == len(BandResampler.SENSORS[sensor])
+        assert subject is BandResampler.for_sensor(sensor)
+
+    def test_for_sensor_unknown(self):
+        with pytest.raises(ValueError):
+            BandResampler.for_sensor('unknown')
+
+    def test_load_table_cached(self, response_table):
+        subject = BandResampler.load(response_table)
+
+        assert subject is BandResampler.load(str(response_table))
+        assert subject.band_names == ['blue', 'red']
+
+    def test_load_missing_table(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            BandResampler.load(tmp_path.joinpath('missing.csv'))
+
+    def test_resample_stack(self):
+        subject = BandResampler.for_sensor('modis')
+        spectra = np.random.default_rng(0).random(
+            (5, MeasurementFile.BAND_COUNT)
+        )
+
+        result = subject.resample(spectra)
+        assert result.shape == (5, len(subject))
+        assert result[2] == pytest.approx(subject.resample(spectra[2]))
+        assert result[3] == pytest.approx(subject.weights @ spectra[3])
+
+    def test_resample_constant(self):
+        subject = BandResampler.for_sensor('sentinel2')
+        result = subject.resample(np.full(MeasurementFile.BAND_COUNT, 0.8))
+        assert result == pytest.approx(0.8)
+
+    def test_resample_missing_values(self):
+        subject = BandResampler.from_gaussian([500, 1000], [10, 10])
+        spectrum = np.full(MeasurementFile.BAND_COUNT, 0.5)
+        spectrum[500 - 350] = np.nan
+        spectrum[1000 - 360:1000 - 340] = np.inf
+
+        result = subject.resample(spectrum)
+        assert result[0] == pytest.approx(0.5)
+        assert np.isnan(result[1])
+
+
+class TestCompositeResampling:
+    def test_resample_composite(self, test_data_path):
+        composite = MeasurementComposite(test_data_path, '210317_a')
+        composite.calculate()
+        subject = BandResampler.for_sensor('landsat8')
+
+        result = subject.resample_composite(composite)
+        assert result['set_1'] == pytest.approx(
+            subject.resample(composite.set_1)
+        )
+        assert result['result'] == pytest.approx(
+            result['set_1'] / result['set_2']
+        )
+
+    def test_save_resampled(self, test_data_path):
+        composite = MeasurementComposite(test_data_path, '210317_a')
+        composite.calculate()
+
+        outfile = Path(composite.save_resampled('pytest', 'modis'))
+        lines = outfile.read_text().splitlines()
+        outfile.unlink()
+
+        assert outfile.name == '210317_a_pytest_modis.csv'
+        assert lines[0] == 'band,center,set_1,set_2,result'
+        assert len(lines) == 1 + len(BandResampler.SENSORS['modis'])
+        assert lines[1].startswith('B1,645.0,')
+
+    def test_save_resampled_not_calculated(self, test_data_path):
+        composite = MeasurementComposite(test_data_path, '210317_a')
+        assert composite.save_resampled('pytest', 'modis') == ''
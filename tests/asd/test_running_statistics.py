@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementFile, RunningStatistics
+
+
+@pytest.fixture(scope='module')
+def spectra():
+    rng = np.random.default_rng(0)
+    return rng.normal(100, 5, size=(50, 20)).astype(np.float32)
+
+
+class TestRunningStatistics:
+    def test_band_count_default(self):
+        assert RunningStatistics().mean.size == MeasurementFile.BAND_COUNT
+
+    def test_empty(self):
+        subject = RunningStatistics(3)
+
+        assert subject.count == 0
+        assert np.all(np.isnan(subject.variance))
+
+    def test_add(self, spectra):
+        subject = RunningStatistics(spectra.shape[1])
+        for spectrum in spectra:
+            subject.add(spectrum)
+
+        assert subject.count == spectra.shape[0]
+        assert np.allclose(subject.mean, spectra.mean(axis=0, dtype=float))
+        assert np.allclose(subject.variance, spectra.var(axis=0, dtype=float))
+        assert np.array_equal(subject.min, spectra.min(axis=0))
+        assert np.array_equal(subject.max, spectra.max(axis=0))
+
+    def test_add_stack(self, spectra):
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add_stack(spectra)
+
+        assert subject.count == spectra.shape[0]
+        assert np.allclose(subject.mean, spectra.mean(axis=0, dtype=float))
+        assert np.allclose(subject.std, spectra.std(axis=0, dtype=float))
+
+    def test_add_stack_chunks(self, spectra, monkeypatch):
+        monkeypatch.setattr(RunningStatistics, 'CHUNK_ROWS', 7)
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add(spectra[0])
+        subject.add_stack(spectra[1:])
+
+        assert subject.count == spectra.shape[0]
+        assert np.allclose(subject.mean, spectra.mean(axis=0, dtype=float))
+        assert np.allclose(subject.variance, spectra.var(axis=0, dtype=float))
+
+    def test_add_stack_empty(self):
+        subject = RunningStatistics(3)
+        subject.add_stack(np.empty((0, 3)))
+
+        assert subject.count == 0
+
+    def test_robust_mean_sigma_clip(self, spectra):
+        outlier = spectra.copy()
+        outlier[0] = 1e6
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add_stack(outlier)
+
+        # Values of the other spectra beyond three standard deviations
+        # are clipped as well, which changes the mean slightly
+        assert np.allclose(
+            subject.robust_mean(outlier, sigma=3),
+            spectra[1:].mean(axis=0, dtype=float), atol=0.5
+        )
+
+    def test_robust_mean_sigma_clip_set(self):
+        # Ten files of a set with one bad measurement, which is less than
+        # three population standard deviations from the mean
+        spectra = np.random.default_rng(0).normal(
+            100, 0.5, size=(10, 20)
+        ).astype(np.float32)
+        spectra[3] = 0
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add_stack(spectra)
+
+        assert subject.mean == pytest.approx(90, abs=0.5)
+        assert np.allclose(
+            subject.robust_mean(spectra, sigma=3),
+            np.delete(spectra, 3, axis=0).mean(axis=0, dtype=float),
+            atol=0.25
+        )
+
+    def test_robust_mean_sigma_clip_chunks(self, spectra, monkeypatch):
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add_stack(spectra)
+        expected = subject.robust_mean(spectra)
+        monkeypatch.setattr(RunningStatistics, 'CHUNK_BANDS', 3)
+
+        assert np.array_equal(subject.robust_mean(spectra), expected)
+
+    def test_robust_mean_median(self, spectra, monkeypatch):
+        monkeypatch.setattr(RunningStatistics, 'CHUNK_BANDS', 3)
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add_stack(spectra)
+
+        assert np.array_equal(
+            subject.robust_mean(spectra, method='median'),
+            np.median(spectra, axis=0)
+        )
+
+    def test_robust_mean_unknown(self, spectra):
+        with pytest.raises(ValueError):
+            RunningStatistics(spectra.shape[1]).robust_mean(spectra, 'mode')
+
+    def test_state(self, spectra):
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add_stack(spectra)
+
+        restored = RunningStatistics.from_state(subject.state())
+
+        assert restored.count == subject.count
+        assert np.array_equal(restored.mean, subject.mean)
+        assert np.array_equal(restored.std, subject.std)
+        assert np.array_equal(restored.min, subject.min)
+        assert np.array_equal(restored.max, subject.max)
+
+    def test_transformed(self, spectra):
+        subject = RunningStatistics(spectra.shape[1])
+        subject.add_stack(spectra)
+        scale = np.linspace(-2, 2, spectra.shape[1])
+        offset = np.arange(spectra.shape[1], dtype=float)
+        transformed = spectra * scale + offset
+
+        result = subject.transformed(scale, offset)
+
+        assert result.count == subject.count
+        assert np.allclose(result.mean, transformed.mean(axis=0))
+        assert np.allclose(result.variance, transformed.var(axis=0))
+        assert np.allclose(result.min, transformed.min(axis=0))
+        assert np.allclose(result.max, transformed.max(axis=0))
+        # The source statistics are not changed
+        assert np.allclose(subject.mean, spectra.mean(axis=0, dtype=float))
@@ -0,0 +1,128 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementComposite, MeasurementStack
+from spectro_dp.asd.set_cache import SetCache
+
+
+@pytest.fixture
+def subject(tmp_path):
+    return SetCache(tmp_path.joinpath('cache'))
+
+
+@pytest.fixture
+def session_dir(tmp_path, test_data_path):
+    directory = tmp_path.joinpath('session')
+    directory.mkdir()
+    for index in [0, 1, 2, 10, 11, 12]:
+        shutil.copy(
+            test_data_path.joinpath(f'210317_a.{index:03d}'), directory
+        )
+    return directory
+
+
+class TestSetCache:
+    def test_directory_environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(SetCache.CACHE_VARIABLE, str(tmp_path))
+        assert SetCache().directory == tmp_path
+
+    def test_key_files(self, subject, session_dir):
+        files = sorted(session_dir.iterdir())
+        key = subject.key(files[:3])
+
+        assert key == subject.key(files[:3])
+        assert key != subject.key(files[:2])
+        assert key != subject.key(files[:3], robust_mean='median')
+
+    def test_key_modified_file(self, subject, session_dir):
+        file = sorted(session_dir.iterdir())[0]
+        key = subject.key([file])
+
+        stat = os.stat(file)
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        assert key != subject.key([file])
+
+    def test_get_missing(self, subject):
+        assert subject.get('missing') is None
+
+    def test_put_get(self, subject):
+        subject.put('key', average=np.arange(3), count=np.int64(3))
+
+        entry = subject.get('key')
+        assert (entry['average'] == np.arange(3)).all()
+        assert entry['count'] == 3
+
+    def test_evict_least_recently_used(self, tmp_path):
+        subject = SetCache(tmp_path, max_bytes=2 * 8500)
+        values = np.zeros(1000)
+        for index, key in enumerate(['a', 'b']):
+            subject.put(key, values=values)
+            os.utime(subject.entry_file(key), ns=(index, index))
+
+        subject.get('a')
+        subject.put('c', values=values)
+
+        assert subject.get('a') is not None
+        assert subject.get('b') is None
+        assert subject.get('c') is not None
+
+    def test_clear(self, subject):
+        subject.put('key', values=np.zeros(3))
+        subject.clear()
+        assert subject.get('key') is None
+
+
+class TestCompositeSetCache:
+    def composite(self, directory, cache, set_1_index=0, **kwargs):
+        return MeasurementComposite(
+            directory, '210317_a', set_1_index=set_1_index,
+            set_1_count=3, set_2_count=3, set_cache=cache, **kwargs
+        )
+
+    def test_matches_uncached(self, subject, session_dir):
+        expected = self.composite(session_dir, None)
+        expected.calculate()
+
+        for _ in range(2):
+            cached = self.composite(session_dir, subject)
+            cached.calculate()
+
+            assert np.array_equal(cached.set_1, expected.set_1)
+            assert np.array_equal(cached.set_2, expected.set_2)
+            assert np.array_equal(cached.result, expected.result)
+            assert cached.set_2_statistics.count == 3
+            assert cached.set_2_std == pytest.approx(expected.set_2_std)
+            assert cached.set_2_files == expected.set_2_files
+
+    def test_reads_changed_sets(self, subject, session_dir, monkeypatch):
+        self.composite(session_dir, subject).calculate()
+
+        read = []
+
+        class RecordingStack(MeasurementStack):
+            def __init__(self, files, *args) -> None:
+                read.append(files)
+                super().__init__(files, *args)
+
+        monkeypatch.setattr(
+            'spectro_dp.asd.measurement_composite.MeasurementStack',
+            RecordingStack
+        )
+        self.composite(session_dir, subject, set_1_index=1).calculate()
+
+        assert [[file.name for file in files] for files in read] == \
+            [['210317_a.001', '210317_a.002']]
+
+    def test_settings_in_key(self, subject, session_dir):
+        self.composite(session_dir, subject).calculate()
+        median = self.composite(session_dir, subject, robust_mean='median')
+        median.calculate()
+
+        expected = self.composite(session_dir, None, robust_mean='median')
+        expected.calculate()
+
+        assert np.array_equal(median.set_1, expected.set_1)
@@ -0,0 +1,188 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementComposite, MeasurementFile, \
+    MeasurementStack
+from spectro_dp.asd.spectrum_cache import SpectrumCache, \
+    shared_spectrum_cache
+
+SPECTRUM_BYTES = MeasurementFile.BAND_COUNT * 4
+
+
+@pytest.fixture
+def shared_cache():
+    cache = shared_spectrum_cache()
+    cache.clear()
+    yield cache
+    cache.max_bytes = SpectrumCache.MAX_BYTES
+    cache.clear()
+
+
+@pytest.fixture
+def data_files(test_data_path):
+    return [
+        test_data_path.joinpath(f"210317_a.{number:03d}")
+        for number in [0, 1, 2]
+    ]
+
+
+@pytest.fixture
+def session_dir(tmp_path, test_data_path):
+    for number in [0, 1, 2, 10, 11, 12]:
+        shutil.copy(
+            test_data_path.joinpath(f"210317_a.{number:03d}"), tmp_path
+        )
+    return tmp_path
+
+
+def spectrum(value):
+    return np.full(MeasurementFile.BAND_COUNT, value, dtype=np.float32)
+
+
+class TestSpectrumCache:
+    def test_get_put(self):
+        subject = SpectrumCache()
+
+        assert subject.get('a') is None
+        subject.put('a', spectrum(1))
+
+        assert np.array_equal(subject.get('a'), spectrum(1))
+        assert subject.hits == 1
+        assert subject.misses == 1
+        assert subject.nbytes == SPECTRUM_BYTES
+
+    def test_put_read_only_copy(self):
+        subject = SpectrumCache()
+        data = spectrum(1)
+
+        cached = subject.put('a', data)
+        data[:] = 2
+
+        assert not cached.flags.writeable
+        assert np.array_equal(subject.get('a'), spectrum(1))
+
+    def test_replace(self):
+        subject = SpectrumCache()
+
+        subject.put('a', spectrum(1))
+        subject.put('a', spectrum(2))
+
+        assert len(subject) == 1
+        assert subject.nbytes == SPECTRUM_BYTES
+        assert np.array_equal(subject.get('a'), spectrum(2))
+
+    def test_evict_least_recently_used(self):
+        subject = SpectrumCache(max_bytes=2 * SPECTRUM_BYTES)
+        subject.put('a', spectrum(1))
+        subject.put('b', spectrum(2))
+        subject.get('a')
+
+        subject.put('c', spectrum(3))
+
+        assert subject.get('b') is None
+        assert subject.get('a') is not None
+        assert subject.get('c') is not None
+        assert subject.nbytes == 2 * SPECTRUM_BYTES
+
+    def test_reduce_max_bytes(self):
+        subject = SpectrumCache()
+        subject.put('a', spectrum(1))
+        subject.put('b', spectrum(2))
+
+        subject.max_bytes = SPECTRUM_BYTES
+
+        assert len(subject) == 1
+        assert subject.get('b') is not None
+
+    def test_disabled(self):
+        subject = SpectrumCache(max_bytes=0)
+
+        subject.put('a', spectrum(1))
+
+        assert not subject.enabled
+        assert len(subject) == 0
+
+    def test_clear(self):
+        subject = SpectrumCache()
+        subject.put('a', spectrum(1))
+        subject.get('a')
+
+        subject.clear()
+
+        assert subject.statistics() == dict(
+            hits=0, misses=0, entries=0, nbytes=0
+        )
+
+    def test_key_changes_with_file(self, tmp_path, data_files):
+        file = tmp_path.joinpath('210317_a.000')
+        shutil.copy(data_files[0], file)
+        key = SpectrumCache.key(file)
+
+        stat = os.stat(file)
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+        assert SpectrumCache.key(file) != key
+        assert SpectrumCache.key(file)[0] == os.path.abspath(file)
+
+
+class TestSharedSpectrumCache:
+    def test_measurement_file(self, shared_cache, data_files):
+        first = MeasurementFile(data_files[0]).data
+        second = MeasurementFile(data_files[0]).data
+
+        assert second is first
+        assert not second.flags.writeable
+        assert shared_cache.statistics()['hits'] == 1
+        assert shared_cache.statistics()['misses'] == 1
+
+    def test_measurement_file_disabled(self, shared_cache, data_files):
+        shared_cache.max_bytes = 0
+
+        data = MeasurementFile(data_files[0]).data
+
+        assert data.flags.writeable
+        assert len(shared_cache) == 0
+
+    def test_stack(self, shared_cache, data_files):
+        expected = MeasurementFile(data_files[1]).data
+
+        stack = MeasurementStack(data_files)
+
+        assert np.array_equal(stack.data[1], expected)
+        assert stack.data.flags.writeable
+        assert shared_cache.hits == 1
+        assert shared_cache.misses == 3
+        assert len(shared_cache) == 3
+
+    def test_stack_modified_file(self, shared_cache, session_dir):
+        file = session_dir.joinpath('210317_a.000')
+        MeasurementStack([file]).data
+
+        data = np.fromfile(file, dtype=np.uint8)
+        data[MeasurementFile.HEADER_BYTES:] = 0
+        data.tofile(file)
+        stat = os.stat(file)
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+        assert not MeasurementStack([file]).data.any()
+
+    def test_stack_corrected_in_place(self, shared_cache, data_files):
+        stack = MeasurementStack(data_files)
+        expected = stack.data.copy()
+        stack.data[:] = 0
+
+        assert np.array_equal(MeasurementStack(data_files).data, expected)
+
+    def test_index_sweep(self, shared_cache, session_dir):
+        for set_1_index in [0, 1, 2]:
+            MeasurementComposite(
+                session_dir, '210317_a',
+                set_1_index=set_1_index, set_1_count=3 - set_1_index,
+                set_2_index=10, set_2_count=3, splice_per_file=True,
+            ).calculate()
+
+        assert shared_cache.misses == 6
+        assert shared_cache.hits == 2 + 1 + 3 * 2
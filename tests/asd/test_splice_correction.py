@@ -0,0 +1,190 @@
+import numpy as np
+import pytest
+
+from spectro_dp.asd import MeasurementComposite, MeasurementFile
+from spectro_dp.asd.measurement_header import MeasurementHeader
+from spectro_dp.asd.splice_correction import SpliceCorrection
+
+VNIR = slice(0, 651)
+SWIR1 = slice(651, 1451)
+SWIR2 = slice(1451, None)
+
+
+@pytest.fixture
+def stack():
+    """
+    Three spectra with a constant value per detector
+    """
+    data = np.empty((3, MeasurementFile.BAND_COUNT), dtype=np.float32)
+    for row, scale in enumerate([1, 2, 4]):
+        data[row, VNIR] = 1.0 * scale
+        data[row, SWIR1] = 1.5 * scale
+        data[row, SWIR2] = 0.75 * scale
+    return data
+
+
+class TestSpliceCorrection:
+    def test_splice_bands(self):
+        assert SpliceCorrection().splice_bands == [650, 1450]
+
+    def test_mode_unknown(self):
+        with pytest.raises(ValueError):
+            SpliceCorrection(mode='divide')
+
+    def test_splice_out_of_range(self):
+        with pytest.raises(ValueError):
+            SpliceCorrection([2500])
+
+    def test_reference_detector(self):
+        with pytest.raises(ValueError):
+            SpliceCorrection(reference_detector=3)
+
+    def test_multiplicative(self, stack):
+        expected = stack[:, 651:652] * np.ones_like(stack)
+
+        result = SpliceCorrection().apply(stack)
+
+        assert result is stack
+        assert stack == pytest.approx(expected)
+
+    def test_additive(self, stack):
+        swir1 = stack[:, 651].copy()
+        stack[:, VNIR] *= np.linspace(1, 2, 651, dtype=np.float32)
+        # Offset between the last VNIR and first SWIR1 band
+        offset = swir1 - stack[:, 650]
+        vnir = stack[:, VNIR] + offset[:, np.newaxis]
+
+        SpliceCorrection(mode='additive').apply(stack)
+
+        assert stack[:, VNIR] == pytest.approx(vnir)
+        assert stack[:, 650] == pytest.approx(swir1)
+        assert stack[:, SWIR1] == pytest.approx(
+            swir1[:, np.newaxis] * np.ones((1, 800))
+        )
+        assert stack[:, SWIR2] == pytest.approx(
+            swir1[:, np.newaxis] * np.ones((1, 700))
+        )
+
+    def test_one_spectrum(self, stack):
+        spectrum = stack[1].copy()
+        SpliceCorrection().apply(stack)
+
+        assert SpliceCorrection().apply(spectrum) == pytest.approx(stack[1])
+
+    @pytest.mark.parametrize('mode', SpliceCorrection.MODES)
+    def test_adjustment(self, stack, mode):
+        spectrum = stack[1] * np.linspace(1, 2, stack.shape[1])
+        subject = SpliceCorrection(mode=mode)
+
+        scale, offset = subject.adjustment(spectrum)
+
+        assert spectrum * scale + offset == \
+            pytest.approx(subject.apply(spectrum.copy()))
+
+    def test_reference_first_detector(self, stack):
+        expected = stack[:, :1] * np.ones_like(stack)
+
+        SpliceCorrection(reference_detector=0).apply(stack)
+
+        assert stack == pytest.approx(expected)
+
+    def test_reference_last_detector(self, stack):
+        expected = stack[:, -1:] * np.ones_like(stack)
+
+        SpliceCorrection(reference_detector=2).apply(stack)
+
+        assert stack == pytest.approx(expected)
+
+    def test_from_header(self):
+        header = np.zeros(1, dtype=MeasurementHeader.DTYPE)[0]
+        header['splice1_wavelength'] = 1001
+        header['splice2_wavelength'] = 1830
+
+        subject = SpliceCorrection.from_header(header, mode='additive')
+
+        assert subject.splice_bands == [651, 1480]
+        assert subject.mode == 'additive'
+
+    def test_from_header_missing(self):
+        header = np.zeros(1, dtype=MeasurementHeader.DTYPE)[0]
+        assert SpliceCorrection.from_header(header).splice_bands == \
+            [650, 1450]
+
+
+@pytest.fixture(scope='module')
+def uncorrected(test_data_path):
+    composite = MeasurementComposite(
+        test_data_path, '210317_a', set_1_count=3, set_2_count=3,
+        splice_correction=None,
+    )
+    composite.calculate()
+    return composite
+
+
+class TestCompositeSpliceCorrection:
+    def test_splice_correction_unknown(self):
+        with pytest.raises(ValueError):
+            MeasurementComposite('', '', splice_correction='divide')
+
+    def test_sets_corrected(self, test_data_path, uncorrected):
+        subject = MeasurementComposite(
+            test_data_path, '210317_a', set_1_count=3, set_2_count=3,
+        )
+        subject.calculate()
+
+        expected = SpliceCorrection().apply(uncorrected.set_1.copy())
+        assert np.array_equal(subject.set_1, expected)
+        assert subject.set_1[SWIR1] == pytest.approx(
+            uncorrected.set_1[SWIR1]
+        )
+        assert subject.set_1[1451] == pytest.approx(subject.set_1[1450])
+
+    def test_statistics_corrected(self, test_data_path, uncorrected):
+        subject = MeasurementComposite(
+            test_data_path, '210317_a', set_1_count=3, set_2_count=3,
+        )
+        subject.calculate()
+
+        for statistics, set_data, raw, raw_std in [
+            (
+                subject.set_1_statistics, subject.set_1,
+                uncorrected.set_1, uncorrected.set_1_std,
+            ),
+            (
+                subject.set_2_statistics, subject.set_2,
+                uncorrected.set_2, uncorrected.set_2_std,
+            ),
+        ]:
+            scale, _offset = SpliceCorrection().adjustment(raw)
+            assert statistics.mean == pytest.approx(set_data, rel=1e-5)
+            assert statistics.std == pytest.approx(raw_std * scale, rel=1e-5)
+            assert np.all(statistics.min <= statistics.max)
+
+    def test_splice_per_file(self, test_data_path, uncorrected):
+        subject = MeasurementComposite(
+            test_data_path, '210317_a', set_1_count=3, set_2_count=3,
+            splice_per_file=True,
+        )
+        subject.calculate()
+
+        assert subject.set_1[SWIR1] == pytest.approx(
+            uncorrected.set_1[SWIR1]
+        )
+        assert subject.set_1[650] == pytest.approx(subject.set_1[651])
+        assert subject.set_1_statistics.mean[650] == \
+            pytest.approx(subject.set_1[650])
+
+    def test_update_matches_calculate(self, test_data_path):
+        options = dict(
+            set_1_count=3, set_2_count=3, splice_correction='additive'
+        )
+        subject = MeasurementComposite(
+            test_data_path, '210317_a', **options
+        )
+        subject.update()
+        expected = MeasurementComposite(
+            test_data_path, '210317_a', **options
+        )
+        expected.calculate()
+
+        assert subject.result == pytest.approx(expected.result, rel=1e-5)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from spectro_dp.asd import (
+    MeasurementComposite, MeasurementFile, MeasurementIndex
+)
+from spectro_dp.asd.synthetic import SyntheticCampaign
+
+
+@pytest.fixture
+def subject():
+    return SyntheticCampaign(seed=1)
+
+
+class TestSyntheticCampaign:
+    def test_write_file(self, subject, tmp_path):
+        time = np.datetime64('2022-02-28T23:59:07')
+        filepath = subject.write_file(tmp_path.joinpath('a.000'), time)
+        measurement = MeasurementFile(filepath)
+
+        assert filepath.stat().st_size == MeasurementFile.FILE_BYTES
+        assert measurement.header_record['signature'] == b'ASD'
+        assert measurement.header_record['channels'] == \
+            MeasurementFile.BAND_COUNT
+        assert measurement.acquisition_time == time
+        assert measurement.data.shape == (MeasurementFile.BAND_COUNT,)
+
+    def test_write_file_truncated(self, subject, tmp_path):
+        filepath = subject.write_file(
+            tmp_path.joinpath('a.000'), SyntheticCampaign.START_TIME,
+            truncated=True
+        )
+
+        with pytest.raises(ValueError):
+            MeasurementFile(filepath).data
+
+    def test_spectrum_up_looking(self, subject):
+        up = subject.spectrum(up_looking=True)
+        down = subject.spectrum()
+
+        assert up.dtype == MeasurementFile.DATA_TYPE
+        assert up.max() <= SyntheticCampaign.MAX_DN * 1.2
+        assert (down < up * 1.1).all()
+
+    def test_spectrum_split_step(self):
+        subject = SyntheticCampaign(noise=0, split_step=0.1, seed=1)
+        step = subject.spectrum(up_looking=True)
+        smooth = SyntheticCampaign.irradiance()
+
+        split = SyntheticCampaign.DETECTOR_SPLITS[0]
+        assert step[split] == pytest.approx(smooth[split])
+        assert step[split + 1] / smooth[split + 1] > 1.04
+
+    def test_seed(self):
+        assert (
+            SyntheticCampaign(seed=2).spectrum() ==
+            SyntheticCampaign(seed=2).spectrum()
+        ).all()
+
+    def test_write_site_albedo(self, subject, tmp_path):
+        files = subject.write_site(tmp_path, sequences=2)
+        assert len(files) == 40
+
+        composite = MeasurementComposite(
+            tmp_path, SyntheticCampaign.FILE_PREFIX,
+            set_1_index=20, set_2_index=30,
+        )
+        composite.calculate()
+        assert composite.result[:600].mean() == pytest.approx(
+            SyntheticCampaign.SNOW_ALBEDO, abs=0.05
+        )
+
+    def test_write_site_missing(self, subject, tmp_path):
+        files = subject.write_site(tmp_path, sequences=5, missing=0.5)
+
+        assert 0 < len(files) < 100
+        assert len(MeasurementIndex(tmp_path)) == len(files)
+
+    def test_write_campaign(self, subject, tmp_path):
+        files = subject.write_campaign(tmp_path, 90, sites=2)
+
+        assert len(files) == 100
+        assert len(list(tmp_path.iterdir())) == 2
+        assert len(list(tmp_path.joinpath('site_000').iterdir())) == 60
@@ -0,0 +1,26 @@
+import shutil
+
+from spectro_dp.asd import MeasurementComposite
+from spectro_dp.asd.watch import watch_composite
+
+
+class TestWatchComposite:
+    def test_watch_until_complete(self, test_data_path, tmp_path):
+        for name in ['210317_a.000', '210317_a.010']:
+            shutil.copy(test_data_path.joinpath(name), tmp_path)
+        composite = MeasurementComposite(
+            tmp_path, '210317_a', set_1_count=1, set_2_count=1
+        )
+        updates = []
+
+        assert watch_composite(composite, updates.append, poll_interval=0)
+        assert updates == [composite]
+
+    def test_watch_timeout(self, tmp_path):
+        composite = MeasurementComposite(tmp_path, '210317_a')
+        updates = []
+
+        assert not watch_composite(
+            composite, updates.append, poll_interval=0.01, timeout=0.05
+        )
+        assert updates == []
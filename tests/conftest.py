@@ -2,7 +2,20 @@ from pathlib import PurePath
 
 import pytest
 
+from spectro_dp.asd.set_cache import SetCache
+
 
 @pytest.fixture(scope='session')
 def test_data_path():
     return PurePath(__file__).with_name('data')
+
+
+@pytest.fixture(autouse=True)
+def set_cache_dir(tmp_path, monkeypatch):
+    """
+    Keep the set cache of the command line interfaces out of the home
+    directory, and start each test with an empty cache
+    """
+    directory = tmp_path.joinpath('set_cache')
+    monkeypatch.setenv(SetCache.CACHE_VARIABLE, str(directory))
+    return directory
@@ -0,0 +1,42 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from spectro_dp.disort import SsaIce
+
+REPOSITORY_DISORT = Path(__file__).parents[2].joinpath('DISORT')
+
+
+@pytest.fixture(scope='session')
+def disort_dir(tmp_path_factory):
+    """
+    Copy of the DISORT sources to not build into the repository
+    """
+    directory = tmp_path_factory.mktemp('disort').joinpath('DISORT')
+    shutil.copytree(
+        REPOSITORY_DISORT, directory,
+        ignore=shutil.ignore_patterns(
+            'ssa_ice', 'libssa_ice.so', '*_model.f', '*.mod', '.*.lock',
+            'build',
+        )
+    )
+    return directory
+
+
+@pytest.fixture(scope='session')
+def model(disort_dir):
+    subject = SsaIce(disort_dir)
+    subject.build()
+    return subject
+
+
+@pytest.fixture(scope='session')
+def inputs():
+    random = np.random.default_rng(0)
+    shape = (7, SsaIce.GRAIN_SIZES)
+    return (
+        random.uniform(0.8, 0.9, shape).astype(np.float32),
+        random.uniform(0.99, 0.99999, shape).astype(np.float32),
+    )
@@ -0,0 +1,86 @@
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from spectro_dp.disort import LookupTable, SsaIceLibrary, run_ssa_ice
+
+pytestmark = pytest.mark.skipif(
+    shutil.which('gfortran') is None, reason='Requires gfortran'
+)
+
+
+@pytest.fixture(scope='module')
+def library(disort_dir):
+    subject = SsaIceLibrary(disort_dir)
+    subject.build()
+    return subject
+
+
+class TestSsaIceLibrary:
+    def test_build(self, library):
+        assert library.executable.name == SsaIceLibrary.EXECUTABLE
+        assert library.executable.exists()
+        assert not library.is_stale()
+        assert library.directory.joinpath(
+            'build', 'libssa_ice', 'disort_model.f'
+        ).exists()
+
+    def test_load_cached(self, library):
+        assert library.load() is library.load()
+
+    @pytest.mark.parametrize('solar_zenith', [0, 30, 62.5])
+    def test_matches_executable(self, library, model, inputs, solar_zenith):
+        result = library.run(*inputs, solar_zenith)
+
+        assert result.shape == inputs[0].shape
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(
+            result, model.run(*inputs, solar_zenith), rtol=1e-5
+        )
+
+    def test_repeated_runs(self, library, inputs):
+        assert (
+            library.run(*inputs, 30) == library.run(*inputs, 30)
+        ).all()
+
+    def test_band_order(self, library, inputs):
+        result = library.run(inputs[0][::-1], inputs[1][::-1], 30)
+        assert (result[::-1] == library.run(*inputs, 30)).all()
+
+    def test_shape_mismatch(self, library, inputs):
+        with pytest.raises(ValueError):
+            library.run(inputs[0], inputs[1][:2], 30)
+
+    def test_run_ssa_ice_in_process(self, library, inputs):
+        result = run_ssa_ice(
+            *inputs, 30, directory=library.directory, in_process=True
+        )
+        assert (result == library.run(*inputs, 30)).all()
+
+    def test_lookup_table_in_process(self, library, inputs, tmp_path):
+        table = LookupTable.build(
+            *inputs, zenith_angles=[0, 60], cache_dir=tmp_path,
+            directory=library.directory, in_process=True,
+        )
+        assert (table.interpolate(60) == library.run(*inputs, 60).T).all()
+
+    def test_quiet_per_run(self, library):
+        # Fortran output is only seen on the file descriptor of a process
+        script = (
+            "import sys\n"
+            "import numpy as np\n"
+            "from spectro_dp.disort import SsaIceLibrary\n"
+            "inputs = np.full((1, SsaIceLibrary.GRAIN_SIZES), 0.85), "
+            "np.full((1, SsaIceLibrary.GRAIN_SIZES), 0.999)\n"
+            "for quiet in [True, False, True]:\n"
+            "    SsaIceLibrary(sys.argv[1], quiet=quiet).run(*inputs, 30)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script, str(library.directory)],
+            stdout=subprocess.PIPE, check=True, text=True,
+        ).stdout
+
+        assert output.count('DISORT: ssa_ice') == SsaIceLibrary.GRAIN_SIZES
@@ -0,0 +1,145 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from spectro_dp.disort import LookupTable, SsaIce
+from spectro_dp.disort import lookup_table
+
+REPOSITORY_DISORT = Path(__file__).parents[2].joinpath('DISORT')
+BANDS = 4
+
+
+@pytest.fixture
+def inputs():
+    random = np.random.default_rng(0)
+    shape = (BANDS, SsaIce.GRAIN_SIZES)
+    return (
+        random.uniform(0.8, 0.9, shape).astype(np.float32),
+        random.uniform(0.99, 0.99999, shape).astype(np.float32),
+    )
+
+
+@pytest.fixture
+def model_runs(monkeypatch):
+    """
+    Replace the model with the cosine of the zenith angle for each band and
+    grain size, and record the zenith angle of each run.
+    """
+    runs = []
+
+    def run_ssa_ice(asymmetry, ssa, solar_zenith, **_kwargs):
+        runs.append(solar_zenith)
+        return np.full(
+            asymmetry.shape, np.cos(np.radians(solar_zenith)),
+            dtype=np.float32
+        )
+
+    monkeypatch.setattr(lookup_table, 'run_ssa_ice', run_ssa_ice)
+    return runs
+
+
+@pytest.fixture
+def build_options(tmp_path):
+    return dict(
+        zenith_angles=[0, 30, 60], cache_dir=tmp_path,
+        directory=REPOSITORY_DISORT,
+    )
+
+
+class TestLookupTable:
+    def test_build(self, inputs, model_runs, build_options):
+        subject = LookupTable.build(*inputs, **build_options)
+
+        assert model_runs == [0, 30, 60]
+        assert subject.albedo.shape == (3, SsaIce.GRAIN_SIZES, BANDS)
+        assert subject.grain_size_count == SsaIce.GRAIN_SIZES
+        assert subject.band_count == BANDS
+
+    def test_build_cached(self, inputs, model_runs, build_options):
+        first = LookupTable.build(*inputs, **build_options)
+        second = LookupTable.build(*inputs, **build_options)
+
+        assert len(model_runs) == 3
+        assert second.key == first.key
+        assert isinstance(second.albedo, np.memmap)
+        assert (second.albedo == first.albedo).all()
+        assert (second.zenith_angles == first.zenith_angles).all()
+
+    def test_build_changed_inputs(self, inputs, model_runs, build_options):
+        LookupTable.build(*inputs, **build_options)
+        inputs[1][0, 0] = 0.5
+        LookupTable.build(*inputs, **build_options)
+
+        assert len(model_runs) == 6
+
+    def test_build_changed_zenith(self, inputs, model_runs, build_options):
+        LookupTable.build(*inputs, **build_options)
+        build_options['zenith_angles'] = [0, 45]
+        LookupTable.build(*inputs, **build_options)
+
+        assert len(model_runs) == 5
+
+    def test_build_changed_backend(self, inputs, model_runs,
+                                   build_options):
+        executable = LookupTable.build(*inputs, **build_options)
+        library = LookupTable.build(
+            *inputs, in_process=True, **build_options
+        )
+
+        assert len(model_runs) == 6
+        assert library.key != executable.key
+
+    def test_from_files(self, inputs, model_runs, build_options, tmp_path):
+        files = [tmp_path.joinpath('asym.txt'), tmp_path.joinpath('ssa.txt')]
+        for file, values in zip(files, inputs):
+            np.savetxt(file, values, fmt=SsaIce.INPUT_FORMAT)
+
+        subject = LookupTable.from_files(*files, **build_options)
+
+        assert subject.key == LookupTable.build(*inputs, **build_options).key
+        assert len(model_runs) == 3
+
+    def test_cache_key_model(self, inputs):
+        assert LookupTable.cache_key(*inputs, [0], 'a') != \
+            LookupTable.cache_key(*inputs, [0], 'b')
+
+    def test_cache_key_backend(self, inputs):
+        assert LookupTable.cache_key(*inputs, [0], 'a') == \
+            LookupTable.cache_key(*inputs, [0], 'a', 'executable')
+        assert LookupTable.cache_key(*inputs, [0], 'a', 'executable') != \
+            LookupTable.cache_key(*inputs, [0], 'a', 'library')
+
+    def test_cache_dir_environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(LookupTable.CACHE_VARIABLE, str(tmp_path))
+        assert LookupTable.cache_dir() == tmp_path
+
+    def test_interpolate_angle(self, inputs, model_runs, build_options):
+        subject = LookupTable.build(*inputs, **build_options)
+
+        result = subject.interpolate(15)
+        assert result.shape == (SsaIce.GRAIN_SIZES, BANDS)
+        assert result == pytest.approx((1 + np.cos(np.radians(30))) / 2)
+
+    def test_interpolate_table_angle(self, inputs, model_runs, build_options):
+        subject = LookupTable.build(*inputs, **build_options)
+        assert (subject.interpolate(60) == subject.albedo[2]).all()
+
+    def test_interpolate_array(self, inputs, model_runs, build_options):
+        subject = LookupTable.build(*inputs, **build_options)
+
+        result = subject.interpolate([0, 45, 60])
+        assert result.shape == (3, SsaIce.GRAIN_SIZES, BANDS)
+        assert result[1] == pytest.approx(
+            (np.cos(np.radians(30)) + np.cos(np.radians(60))) / 2
+        )
+
+    def test_interpolate_out_of_range(self, inputs, model_runs,
+                                      build_options):
+        subject = LookupTable.build(*inputs, **build_options)
+        with pytest.raises(ValueError):
+            subject.interpolate(70)
+
+    def test_zenith_order(self):
+        with pytest.raises(ValueError):
+            LookupTable(np.zeros((2, 1, 1)), [30, 0])
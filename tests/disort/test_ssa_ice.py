@@ -0,0 +1,119 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+from spectro_dp.disort import SsaIce, run_ssa_ice
+from spectro_dp.disort.ssa_ice import fcntl
+
+REPOSITORY_DISORT = Path(__file__).parents[2].joinpath('DISORT')
+
+requires_gfortran = pytest.mark.skipif(
+    shutil.which('gfortran') is None, reason='Requires gfortran'
+)
+
+
+class TestSsaIce:
+    def test_directory_required(self, monkeypatch):
+        monkeypatch.delenv(SsaIce.DIRECTORY_VARIABLE, raising=False)
+        with pytest.raises(FileNotFoundError, match=SsaIce.DIRECTORY_VARIABLE):
+            SsaIce()
+
+    def test_directory_environment(self, disort_dir, monkeypatch):
+        monkeypatch.setenv(SsaIce.DIRECTORY_VARIABLE, str(disort_dir))
+        assert SsaIce().directory == disort_dir
+
+    def test_missing_directory(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            SsaIce(tmp_path)
+
+    def test_sources(self, disort_dir):
+        sources = [source.name for source in SsaIce(disort_dir).sources()]
+
+        assert 'ssa_ice.f90' in sources
+        assert 'DISORT.f' in sources
+        assert 'disort_model.f' not in sources
+
+    def test_stale_missing(self, tmp_path):
+        shutil.copy(REPOSITORY_DISORT.joinpath('compile.sh'), tmp_path)
+        assert SsaIce(tmp_path).is_stale()
+
+    @requires_gfortran
+    def test_build(self, model):
+        assert model.executable.exists()
+        assert not model.is_stale()
+
+    @requires_gfortran
+    def test_build_lock_file(self, model):
+        assert model.lock_file.name == '.ssa_ice.lock'
+        assert model.lock_file.exists()
+
+    @requires_gfortran
+    def test_build_directory(self, model, disort_dir):
+        assert disort_dir.joinpath(
+            'build', SsaIce.EXECUTABLE, 'disort_model.f'
+        ).exists()
+        assert not disort_dir.joinpath('disort_model.f').exists()
+
+    @requires_gfortran
+    @pytest.mark.skipif(fcntl is None, reason='Requires fcntl')
+    def test_build_waits_for_lock(self, model):
+        with open(model.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            build = threading.Thread(target=model.build)
+            build.start()
+            build.join(timeout=0.2)
+            assert build.is_alive()
+
+        build.join(timeout=10)
+        assert not build.is_alive()
+
+    @requires_gfortran
+    def test_stale_source(self, model, disort_dir):
+        built = model.executable.stat().st_mtime_ns
+        source = disort_dir.joinpath('ssa_ice.f90')
+        modified = source.stat().st_mtime_ns
+        os.utime(source, ns=(built + 10 ** 9, built + 10 ** 9))
+
+        assert model.is_stale()
+        os.utime(source, ns=(modified, modified))
+        assert not model.is_stale()
+
+    @requires_gfortran
+    def test_run(self, model, inputs):
+        result = model.run(*inputs, solar_zenith=30)
+
+        assert result.shape == inputs[0].shape
+        assert ((result > 0) & (result < 1)).all()
+
+
+@requires_gfortran
+class TestRunSsaIce:
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_matches_single_run(self, model, inputs, workers):
+        result = run_ssa_ice(
+            *inputs, solar_zenith=30, workers=workers,
+            directory=model.directory
+        )
+        assert (result == model.run(*inputs, solar_zenith=30)).all()
+
+    def test_shard_bands(self, model, inputs):
+        result = run_ssa_ice(
+            *inputs, solar_zenith=30, workers=2, shard_bands=1,
+            directory=model.directory
+        )
+        assert result.shape == inputs[0].shape
+
+    def test_solar_zenith(self, model, inputs):
+        overhead = run_ssa_ice(*inputs, 0, directory=model.directory)
+        low_sun = run_ssa_ice(*inputs, 60, directory=model.directory)
+
+        assert (low_sun >= overhead).all()
+
+    def test_shape_mismatch(self, model, inputs):
+        with pytest.raises(ValueError):
+            run_ssa_ice(
+                inputs[0], inputs[1][:3], 30, directory=model.directory
+            )